@@ -0,0 +1,92 @@
+"""
+In-process store view/impression counters, flushed to Postgres in bulk.
+
+Writing a row per detail view would double the load of GET /stores/{id}.
+Instead each worker process counts in a plain dict and a PeriodicTask
+flushes the deltas every STORE_ACTIVITY_FLUSH_SECONDS with one
+INSERT ... ON CONFLICT DO UPDATE over all touched stores
+(store_repo.add_store_activity), adding them to the current hour of
+gerobakku.store_activity_hourly. Several workers simply add their own deltas.
+
+No lock is needed: counting happens in async routes and the swap in
+flush() happens on the same event loop thread, so they never interleave.
+Only the database write runs in a worker thread, on a dict nobody else
+holds any more. A failed write puts its deltas back for the next flush.
+
+Usage:
+
+    store_activity.record_view(store_id)           # GET /stores/{id}
+    store_activity.record_impressions(store_ids)   # stores shown in a list
+    await store_activity.flush()                   # periodically and at shutdown
+"""
+import asyncio
+import os
+from typing import Callable, Dict, Iterable, List
+
+from .repositories.store_repo import add_store_activity
+
+STORE_ACTIVITY_FLUSH_SECONDS = float(os.getenv("STORE_ACTIVITY_FLUSH_SECONDS", "5"))
+
+
+class ActivityCounter:
+    def __init__(self, write: Callable[[List[int], List[int], List[int]], int]):
+        # write(store_ids, views, impressions) -> rows written
+        self.write = write
+        self._views: Dict[int, int] = {}
+        self._impressions: Dict[int, int] = {}
+
+        # Metrics
+        self.flushes = 0
+        self.flushed_views = 0
+        self.flushed_impressions = 0
+
+    def record_view(self, store_id: int) -> None:
+        self._views[store_id] = self._views.get(store_id, 0) + 1
+
+    def record_impressions(self, store_ids: Iterable[int]) -> None:
+        impressions = self._impressions
+        for store_id in store_ids:
+            impressions[store_id] = impressions.get(store_id, 0) + 1
+
+    def pending(self) -> int:
+        """Stores with counts not yet written."""
+        return len(self._views.keys() | self._impressions.keys())
+
+    async def flush(self) -> int:
+        """Write all pending deltas in one statement; returns the stores written."""
+        views, self._views = self._views, {}
+        impressions, self._impressions = self._impressions, {}
+        store_ids = sorted(views.keys() | impressions.keys())
+        if not store_ids:
+            return 0
+
+        try:
+            written = await asyncio.to_thread(
+                self.write,
+                store_ids,
+                [views.get(store_id, 0) for store_id in store_ids],
+                [impressions.get(store_id, 0) for store_id in store_ids],
+            )
+        except Exception:
+            # Back on the event loop: merge into whatever was counted meanwhile
+            for store_id, count in views.items():
+                self._views[store_id] = self._views.get(store_id, 0) + count
+            for store_id, count in impressions.items():
+                self._impressions[store_id] = self._impressions.get(store_id, 0) + count
+            raise
+
+        self.flushes += 1
+        self.flushed_views += sum(views.values())
+        self.flushed_impressions += sum(impressions.values())
+        return written
+
+    def stats(self) -> dict:
+        return {
+            "pending_stores": self.pending(),
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "flushed_impressions": self.flushed_impressions,
+        }
+
+
+store_activity = ActivityCounter(add_store_activity)
@@ -0,0 +1,77 @@
+"""
+Periodic background jobs started from the app lifespan.
+
+Each PeriodicTask runs a blocking function (usually a DB sweep) in a worker
+thread every `interval_seconds`; an async function is awaited on the event
+loop instead. A failing run is logged and retried on the
+next tick; it never takes the app down. Runs never overlap: the next tick is
+scheduled after the previous run returns.
+
+Usage in main.py:
+
+    sweeper = PeriodicTask("store-status", 30, sweep_store_status)
+    sweeper.start()        # in lifespan startup
+    await sweeper.stop()   # in lifespan shutdown
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Optional
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], Any]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.runs = 0
+        self.failures = 0
+        self.last_run_s = 0.0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> Any:
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(self.func):
+                return await self.func()
+            return await asyncio.to_thread(self.func)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Background task {self.name} failed: {e}")
+            return None
+        finally:
+            self.runs += 1
+            self.last_run_s = time.perf_counter() - started
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_ms": round(self.last_run_s * 1000, 1),
+            "last_error": self.last_error,
+        }
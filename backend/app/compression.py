@@ -0,0 +1,135 @@
+"""
+Brotli response compression.
+
+GZip is handled by Starlette's GZipMiddleware. This middleware sits in front of
+it and takes over for clients that send `Accept-Encoding: br`: it hides the
+header from the inner GZip middleware and brotli-encodes compressible bodies
+itself. If the optional `brotli` package is not installed, it passes every
+request through and GZip still applies.
+
+Paths in `exclude_paths` (static images, already compressed) skip both
+encoders: the Accept-Encoding header is dropped before GZip sees it, so file
+responses keep their Content-Length, Range support and zero-copy sends.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/msgpack",
+    "application/x-msgpack",
+)
+
+
+def _without_accept_encoding(scope):
+    scope = dict(scope)
+    scope["headers"] = [
+        (name, value) for name, value in scope["headers"]
+        if name != b"accept-encoding"
+    ]
+    return scope
+
+
+def _accepts_brotli(scope) -> bool:
+    accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+    return any(
+        part.split(";")[0].strip() == "br"
+        for part in accept_encoding.split(",")
+    )
+
+
+class BrotliMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, quality: int = 4, exclude_paths: tuple = ()):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.exclude_paths and scope["path"].startswith(self.exclude_paths):
+            await self.app(_without_accept_encoding(scope), receive, send)
+            return
+
+        if scope["type"] != "http" or brotli is None or not _accepts_brotli(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Inner middleware must not gzip what we are about to brotli-encode
+        scope = _without_accept_encoding(scope)
+        responder = _BrotliResponder(send, self.minimum_size, self.quality)
+        await self.app(scope, receive, responder.send)
+
+
+class _BrotliResponder:
+    def __init__(self, send, minimum_size: int, quality: int):
+        self._send = send
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until we know how big the body is
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            # e.g. http.response.pathsend: nothing to compress, release the headers
+            if self.start_message is not None:
+                start, self.start_message = self.start_message, None
+                await self._send(start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                await self._send(start)
+                await self._send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                # Whole body in one message: compress in one go
+                compressed = brotli.compress(body, quality=self.quality)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming body: compress chunk by chunk
+            del headers["Content-Length"]
+            self.compressor = brotli.Compressor(quality=self.quality)
+            await self._send(start)
+
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        chunk = self.compressor.process(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,4 +1,6 @@
 from psycopg_pool import ConnectionPool
+from psycopg.rows import RowFactory, dict_row, tuple_row, no_result
+from collections import namedtuple
 from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
@@ -6,6 +8,9 @@ import os
 load_dotenv()  # Load environment variables from .env file
 database_pool: ConnectionPool | None = None
 
+# lat/lon pair folded out of two result columns by point_namedtuple_row
+Point = namedtuple("Point", ["lat", "lon"])
+
 def init_db_pool():
 	"""
 	Create the global connection pool if it doesn't exist yet.
@@ -50,26 +55,26 @@ def init_db_pool():
 		database_pool = None
 	
 @contextmanager
-def get_cursor(commit: bool = False):
+def get_cursor(commit: bool = False, row_factory: RowFactory | None = None):
 	"""
 	Usage in repo layer:
 
-	from ..database import get_cursor
+	from ..database import get_cursor, dict_row
 
 	def some_query(...):
-		with get_cursor() as cur:
+		with get_cursor(row_factory=dict_row) as cur:
 			cur.execute("SELECT ...")
-			return cur.fetchall()
+			return cur.fetchall()  # list of {column: value}
 	
 	def some_insert(...):
 		with get_cursor() as cur:
 			cur.execute("INSERT ... RETURNING ...")
-			row = cur.fetchone()
+			row = cur.fetchone()  # plain tuple
 			return row
 	
 	This:
 	- borrows a connection from the global pool
-	- gives you a cursor to work with
+	- gives you a cursor to work with (tuples unless a row_factory is given)
 	- commits or rolls back for you
 	- returns the connection to the pool
 
@@ -79,7 +84,7 @@ def get_cursor(commit: bool = False):
 		raise RuntimeError("Database pool not initialized. Have you called init_db_pool()?")
 
 	with database_pool.connection() as conn:
-		with conn.cursor() as cur:
+		with conn.cursor(row_factory=row_factory) as cur:
 			try:
 				yield cur
 				if commit:
@@ -88,6 +93,83 @@ def get_cursor(commit: bool = False):
 				conn.rollback()
 				raise
 
+def point_dict_row(lat_col: str = "lat", lon_col: str = "lon", into: str = "current_location") -> RowFactory:
+	"""
+	Row factory building dicts straight from the cursor, with the lat/lon
+	columns folded into a nested {lat, lon} dict under `into` (None when
+	either is NULL).
+
+	Column names are resolved once per query; each row is a single
+	dict(zip(...)) with the lat/lon entries popped into the nested dict.
+
+	with get_cursor(row_factory=point_dict_row()) as cur:
+		cur.execute("SELECT store_id, ST_Y(...) AS lat, ST_X(...) AS lon ...")
+		cur.fetchall()  # [{"store_id": 1, "current_location": {"lat": ..., "lon": ...}}]
+	"""
+
+	def factory(cursor):
+		description = cursor.description
+		if description is None:
+			return no_result
+
+		names = [column.name for column in description]
+		if lat_col not in names or lon_col not in names:
+			raise ValueError(f"point_dict_row needs both {lat_col!r} and {lon_col!r} columns")
+
+		def make_row(values):
+			row = dict(zip(names, values))
+			lat = row.pop(lat_col)
+			lon = row.pop(lon_col)
+			row[into] = {"lat": lat, "lon": lon} if lat is not None and lon is not None else None
+			return row
+
+		return make_row
+
+	return factory
+
+def point_namedtuple_row(row_type, lat_col: str = "lat", lon_col: str = "lon",
+						 into: str = "current_location") -> RowFactory:
+	"""
+	Row factory building `row_type` namedtuples positionally, with the
+	lat/lon columns (adjacent, lat first) folded into a single Point (None
+	when either is NULL) under the field `into`.
+
+	No per-row dict is built, so rows that are read field by field (the
+	columnar location feed, nearest-vendor ranking) cost a tuple each.
+	Rows that go on to Pydantic models are better off with point_dict_row:
+	validating from attributes is slower than validating dicts.
+
+	The result columns must match row_type._fields once lat/lon are
+	replaced by `into`; this is checked once per query.
+
+	with get_cursor(row_factory=point_namedtuple_row(StoreLocationRow)) as cur:
+		cur.execute("SELECT store_id, ST_Y(...) AS lat, ST_X(...) AS lon, ...")
+		cur.fetchall()  # [StoreLocationRow(store_id=1, current_location=Point(lat=..., lon=...), ...)]
+	"""
+
+	def factory(cursor):
+		description = cursor.description
+		if description is None:
+			return no_result
+
+		names = [column.name for column in description]
+		lat_at = names.index(lat_col) if lat_col in names else -1
+		if lat_at < 0 or names[lat_at + 1:lat_at + 2] != [lon_col]:
+			raise ValueError(f"point_namedtuple_row needs adjacent {lat_col!r} and {lon_col!r} columns")
+		expected = names[:lat_at] + [into] + names[lat_at + 2:]
+		if list(row_type._fields) != expected:
+			raise ValueError(f"{row_type.__name__} fields {row_type._fields} do not match columns {expected}")
+
+		def make_row(values):
+			lat = values[lat_at]
+			lon = values[lat_at + 1]
+			point = Point(lat, lon) if lat is not None and lon is not None else None
+			return row_type(*values[:lat_at], point, *values[lat_at + 2:])
+
+		return make_row
+
+	return factory
+
 def close_database():
 	"""
 	Close the global database pool and release worker threads.
@@ -0,0 +1,151 @@
+"""
+Image derivatives for store and menu images.
+
+After a store or menu item gets a locally uploaded image, a background job in
+a process pool renders smaller WebP copies next to it:
+
+    thumb  160 px   list rows, map markers
+    card   480 px   store cards
+    webp   1600 px  full view, re-encoded as WebP
+
+and stores their URLs in the row's image_variants column, e.g.
+{"thumb": "/app/uploads/vendors/stores/variants/12_store_ab12_thumb.webp", ...}.
+Clients fall back to the original URL while variants are missing.
+
+Resizing is CPU-bound Python/C work that holds the GIL, hence processes
+rather than threads. If Pillow is not installed, nothing is scheduled.
+"""
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Literal, Optional
+
+from .repositories.store_repo import update_menu_item_image_variants, update_store_image_variants
+from .storage import VARIANTS_DIRNAME
+from .worker_pool import BoundedWorkerPool
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency
+    Image = None
+
+UPLOAD_ROOT = Path("app/uploads")
+UPLOAD_URL_PREFIX = "/app/uploads/"
+# The only part of UPLOAD_ROOT served publicly: app/uploads/vendors also holds KTP/selfie images
+STORE_IMAGE_DIR = "vendors/stores"
+
+# name -> longest edge in pixels
+IMAGE_VARIANT_SIZES = {"thumb": 160, "card": 480, "webp": 1600}
+WEBP_QUALITY = 80
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", "100"))
+image_pool = BoundedWorkerPool("image-variants", IMAGE_WORKERS, max_queue=0, use_processes=True)
+# Saving variant URLs is a DB write: done here, not in the process pool's
+# done-callback, which runs on the executor's result-handling thread
+image_save_pool = BoundedWorkerPool("image-variant-save", 1, max_queue=0)
+
+_pending = 0
+_pending_lock = Lock()
+
+
+def render_variants(source: str, out_dir: str, stem: str) -> dict[str, str]:
+    """
+    Write the WebP variants of `source` into out_dir as "{stem}_{name}.webp".
+    Returns {variant name: file name}. Runs in a worker process.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    variants = {}
+    with Image.open(source) as original:
+        # Phone photos are often stored sideways with an EXIF rotation flag
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        for name, max_edge in IMAGE_VARIANT_SIZES.items():
+            variant = image.copy()
+            variant.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            filename = f"{stem}_{name}.webp"
+            variant.save(os.path.join(out_dir, filename), "WEBP", quality=WEBP_QUALITY, method=4)
+            variants[name] = filename
+    return variants
+
+
+def local_upload_path(image_url: Optional[str]) -> Optional[Path]:
+    """Map an /app/uploads/... URL to its file, or None for remote/missing images."""
+    if not image_url or not image_url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    relative = Path(image_url[len(UPLOAD_URL_PREFIX):])
+    if ".." in relative.parts:
+        return None
+    path = UPLOAD_ROOT / relative
+    return path if path.is_file() else None
+
+
+def variant_urls(image_url: str, filenames: dict[str, str]) -> dict[str, str]:
+    """URLs of rendered variants, which live in a variants/ folder beside the original."""
+    base = image_url.rsplit("/", 1)[0]
+    return {name: f"{base}/{VARIANTS_DIRNAME}/{filename}" for name, filename in filenames.items()}
+
+
+def schedule_image_variants(kind: Literal["store", "menu"], row_id: int, image_url: Optional[str]) -> bool:
+    """
+    Queue variant rendering for a store or menu item image, without waiting.
+    Safe to call from sync or async code. Returns False when nothing was
+    queued (no Pillow, not a local upload, or too many jobs pending).
+    """
+    global _pending
+
+    source = local_upload_path(image_url)
+    if Image is None or source is None:
+        return False
+
+    with _pending_lock:
+        if _pending >= IMAGE_MAX_PENDING:
+            print(f"Image variant queue full, skipping {kind} {row_id}")
+            return False
+        _pending += 1
+
+    def _on_done(future):
+        if future.cancelled():  # pool shut down
+            _finish_job()
+            return
+        try:
+            image_save_pool.submit_background(_save_rendered, kind, row_id, image_url, future)
+        except Exception as e:
+            _finish_job()
+            print(f"Could not save image variants for {kind} {row_id}: {e}")
+
+    try:
+        future = image_pool.submit_background(
+            render_variants, str(source), str(source.parent / VARIANTS_DIRNAME), source.stem
+        )
+    except Exception:
+        _finish_job()
+        raise
+    future.add_done_callback(_on_done)
+    return True
+
+
+def _finish_job() -> None:
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _save_rendered(kind: str, row_id: int, image_url: str, future) -> None:
+    """Store a finished render's variant URLs. Runs in image_save_pool."""
+    try:
+        variants = variant_urls(image_url, future.result())
+        _save_variants(kind, row_id, image_url, variants)
+    except Exception as e:
+        print(f"Could not create image variants for {kind} {row_id}: {e}")
+    finally:
+        _finish_job()
+
+
+def _save_variants(kind: str, row_id: int, image_url: str, variants: dict[str, str]) -> None:
+    if kind == "store":
+        update_store_image_variants(row_id, image_url, variants)
+    else:
+        update_menu_item_image_variants(row_id, image_url, variants)
@@ -1,18 +1,64 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
+from .activity import STORE_ACTIVITY_FLUSH_SECONDS, store_activity
+from .background import PeriodicTask
 from .database import close_database, init_db_pool
-from .routers import auth_router, vendor_router, store_router, review_router
+from .compression import BrotliMiddleware
+from .security import calibrate_password_hashing, password_hash_pool, password_rehash_save_pool
+from .images import STORE_IMAGE_DIR, UPLOAD_ROOT, UPLOAD_URL_PREFIX, image_pool, image_save_pool
+from .static_files import BlobStaticFiles, UploadStaticFiles
+from .storage import BLOB_ROOT, BLOB_URL_PREFIX
+from .services.maps_service import start_road_graph_loading
+from .services.search_service import load_suggest_index
+from .services.store_service import (
+    RANKING_REFRESH_SECONDS, STORE_STATUS_SWEEP_SECONDS, refresh_rankings, sweep_store_status
+)
+from .routers import auth_router, vendor_router, store_router, review_router, maps_router, search_router, recommendation_router, admin_router
+
+
+# Marks stores online/offline from heartbeats and opening hours
+store_status_sweeper = PeriodicTask("store-status-sweeper", STORE_STATUS_SWEEP_SECONDS, sweep_store_status)
+# Recomputes /stores/top and /stores/trending
+ranking_refresher = PeriodicTask("store-ranking-refresher", RANKING_REFRESH_SECONDS, refresh_rankings)
+# Writes the in-memory store view/impression counts in bulk
+activity_flusher = PeriodicTask("store-activity-flusher", STORE_ACTIVITY_FLUSH_SECONDS, store_activity.flush)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: initialize the database pool
     init_db_pool()
+
+    # Pick the bcrypt cost for this hardware
+    rounds = calibrate_password_hashing()
+    print(f"Password hashing uses bcrypt cost {rounds}.")
+
+    # Road graph for /route (parsed in the background)
+    start_road_graph_loading()
+
+    # Autocomplete index (kept up to date by store_service afterwards)
+    try:
+        print(f"Autocomplete index loaded with {load_suggest_index()} names.")
+    except Exception as e:
+        print(f"Autocomplete index not loaded: {e}")
+
+    store_status_sweeper.start()
+    ranking_refresher.start()
+    activity_flusher.start()
     
     yield
     
-    # Shutdown: close the database pool
+    # Shutdown: stop background tasks and worker pools, then close the database pool
+    await store_status_sweeper.stop()
+    await ranking_refresher.stop()
+    await activity_flusher.stop()
+    await activity_flusher.run_once()  # don't lose the last few seconds of counts
+    password_hash_pool.shutdown()
+    password_rehash_save_pool.shutdown()
+    image_pool.shutdown()
+    image_save_pool.shutdown()
     close_database()
 
 app = FastAPI(
@@ -31,8 +77,14 @@ app.add_middleware(
     allow_credentials=True, # Allow cookies, authorization headers, etc.
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Poll-Interval"],  # readable by the map's polling code
 )
 
+# Compress bulk JSON (/stores, /vendor/locations); brotli when the client accepts it, gzip otherwise
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+# (uploaded images are already compressed and are streamed straight from disk)
+app.add_middleware(BrotliMiddleware, minimum_size=1024, exclude_paths=(UPLOAD_URL_PREFIX,))
+
 @app.get("/")
 async def read_root():
     return {"Hello": "World"}
@@ -40,9 +92,33 @@ async def read_root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Docker and monitoring"""
-    return {"status": "healthy", "service": "gerobakku-backend"}
+    return {
+        "status": "healthy",
+        "service": "gerobakku-backend",
+        "password_hash_pool": password_hash_pool.stats(),
+        "password_rehash_save_pool": password_rehash_save_pool.stats(),
+        "image_pool": image_pool.stats(),
+        "image_save_pool": image_save_pool.stats(),
+        "store_status_sweeper": store_status_sweeper.stats(),
+        "ranking_refresher": ranking_refresher.stats(),
+        "activity_flusher": activity_flusher.stats(),
+        "store_activity": store_activity.stats()
+    }
+
+# Uploaded images, stored once per content hash
+app.mount(BLOB_URL_PREFIX, BlobStaticFiles(directory=BLOB_ROOT, check_dir=False), name="blobs")
+# Legacy store images and their variants; the rest of app/uploads/vendors (KTP, selfies) is not served
+app.mount(
+    UPLOAD_URL_PREFIX + STORE_IMAGE_DIR,
+    UploadStaticFiles(directory=UPLOAD_ROOT / STORE_IMAGE_DIR, check_dir=False),
+    name="uploads"
+)
 
 app.include_router(auth_router.router)
 app.include_router(vendor_router.router)
 app.include_router(store_router.router)
-app.include_router(review_router.router)
\ No newline at end of file
+app.include_router(review_router.router)
+app.include_router(maps_router.router)
+app.include_router(search_router.router)
+app.include_router(recommendation_router.router)
+app.include_router(admin_router.router)
\ No newline at end of file
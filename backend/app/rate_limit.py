@@ -0,0 +1,177 @@
+"""
+Token-bucket rate limiting for the auth endpoints.
+
+Each key (a client IP, an email) has a bucket holding up to `capacity`
+tokens that refills at capacity/per_seconds tokens per second. A request
+takes one token; an empty bucket means 429 with Retry-After.
+
+The check is a dict lookup and a bit of arithmetic (or one Redis round trip),
+so routers await it before any bcrypt or DB work:
+
+    await enforce_login_rate_limit(client_ip(request), body.email)
+    response = await service_login(email=body.email, password=body.password)
+
+Buckets live in memory by default (per process). Set RATE_LIMIT_REDIS_URL and
+install the optional `redis` package to share them across workers/instances;
+Redis is used through its asyncio client, so the event loop never blocks.
+"""
+import math
+import os
+import time
+from threading import Lock
+from typing import Callable
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, status
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # optional dependency
+    redis_asyncio = None
+
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class MemoryBucketStore:
+    """
+    Buckets in a TTLCache. An entry expires once its bucket would be full
+    again, which is the same as having no entry, so idle keys cost nothing.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl, timer=clock)
+        self._lock = Lock()  # sync routes run in the threadpool
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        """Take `cost` tokens. Returns 0 if allowed, else seconds until they are available."""
+        with self._lock:
+            now = self._clock()
+            state = self._buckets.get(key)
+            if state is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, state[0] + (now - state[1]) * rate)
+
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            return wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Same algorithm as MemoryBucketStore.take, run atomically inside Redis using
+# the server clock so every app instance agrees on time.
+_REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets shared through Redis (or anything speaking its protocol and Lua).
+    If Redis is unreachable the request is let through: a limiter outage
+    should not lock everyone out of login.
+    """
+
+    def __init__(self, client, prefix: str):
+        """`client` is a redis.asyncio client."""
+        self.prefix = prefix
+        self._take = client.register_script(_REDIS_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        try:
+            return float(await self._take(keys=[f"{self.prefix}:{key}"], args=[capacity, rate, cost]))
+        except Exception as e:
+            print(f"Rate limit store unavailable, allowing request: {e}")
+            return 0.0
+
+    def clear(self) -> None:
+        pass
+
+
+def _default_store(name: str, ttl: float):
+    if RATE_LIMIT_REDIS_URL and redis_asyncio is not None:
+        return RedisBucketStore(redis_asyncio.Redis.from_url(RATE_LIMIT_REDIS_URL), prefix=f"ratelimit:{name}")
+    return MemoryBucketStore(ttl=ttl)
+
+
+class RateLimiter:
+    def __init__(self, name: str, capacity: int, per_seconds: float, store=None):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / per_seconds  # tokens per second
+        self.store = store if store is not None else _default_store(name, per_seconds)
+        self.rejected = 0
+
+    async def hit(self, key: str) -> None:
+        """Take one token for key, or raise 429 with Retry-After."""
+        wait = await self.store.take(key, self.capacity, self.rate)
+        if wait > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+
+# Per IP: room for a shared NAT or campus network.
+# Per (email, IP): the strict limit on guessing one account's password. Keyed
+# on both, so someone hammering a victim's email from elsewhere only empties
+# their own bucket, not the victim's.
+# Per email: a much looser ceiling on guesses against one account spread
+# over many IPs.
+login_ip_limiter = RateLimiter("login-ip", capacity=20, per_seconds=60)
+login_account_limiter = RateLimiter("login-email-ip", capacity=5, per_seconds=300)
+login_email_limiter = RateLimiter("login-email", capacity=100, per_seconds=3600)
+# Registration: per IP against account farming, per email against repeated
+# sign-up attempts (and "already registered" probing) for one address.
+register_ip_limiter = RateLimiter("register-ip", capacity=5, per_seconds=3600)
+register_email_limiter = RateLimiter("register-email", capacity=3, per_seconds=3600)
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+async def enforce_login_rate_limit(ip: str, email: str) -> None:
+    email = normalize_email(email)
+    await login_ip_limiter.hit(ip)
+    await login_account_limiter.hit(f"{email}|{ip}")
+    await login_email_limiter.hit(email)
+
+async def enforce_register_rate_limit(ip: str, email: str) -> None:
+    await register_ip_limiter.hit(ip)
+    await register_email_limiter.hit(normalize_email(email))
@@ -0,0 +1,18 @@
+-- Migration: Server-side refresh tokens
+-- Access tokens are short-lived JWTs checked without the database. Only refresh
+-- tokens are stored, as sha256 hex digests of the opaque token sent to the client.
+-- Deleting a user cascades to their tokens, so they can no longer refresh.
+
+CREATE TABLE IF NOT EXISTS gerobakku.refresh_tokens (
+    token_id bigserial PRIMARY KEY,
+    user_id integer NOT NULL REFERENCES gerobakku.users (user_id) ON DELETE CASCADE,
+    token_hash char(64) NOT NULL UNIQUE,
+    created_at timestamptz NOT NULL DEFAULT NOW(),
+    expires_at timestamptz NOT NULL,
+    revoked_at timestamptz
+);
+
+-- Live tokens per user, for "log out everywhere" and reuse detection
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_live
+    ON gerobakku.refresh_tokens (user_id)
+    WHERE revoked_at IS NULL;
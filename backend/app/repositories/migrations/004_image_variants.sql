@@ -0,0 +1,10 @@
+-- Migration: Size variants (thumbnails, WebP) for store and menu images
+-- Filled in the background after an image is uploaded, e.g.
+-- {"thumb": "/app/uploads/.../variants/x_thumb.webp", "card": "...", "webp": "..."}
+-- NULL until rendered, or when the image is not a local upload.
+
+ALTER TABLE gerobakku.stores
+    ADD COLUMN IF NOT EXISTS image_variants jsonb;
+
+ALTER TABLE gerobakku.menu_items
+    ADD COLUMN IF NOT EXISTS image_variants jsonb;
@@ -0,0 +1,13 @@
+-- Migration: Speed and heading per location fix
+-- Filled by vendor_repo.insert_store_location from the store's recent fixes,
+-- so clients can extrapolate a moving cart between polls.
+-- speed_mps: meters per second (0 when parked or for a first fix)
+-- heading_deg: compass bearing of travel, 0 = north, 90 = east (NULL when not moving)
+
+ALTER TABLE gerobakku.transactional_store_location
+    ADD COLUMN IF NOT EXISTS speed_mps real NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS heading_deg real;
+
+-- Latest/recent fixes per store (insert lookback and the /vendor/locations feed)
+CREATE INDEX IF NOT EXISTS idx_store_location_store_created
+    ON gerobakku.transactional_store_location (store_id, created_at DESC);
@@ -0,0 +1,16 @@
+-- Migration: Derived online/offline state for stores
+-- Maintained by the status sweeper (store_repo.sweep_store_online_status):
+-- online = vendor has the store open + recent location heartbeat + within open_time..close_time.
+-- online_changed_at lets clients fetch only the stores that changed since their last poll.
+
+ALTER TABLE gerobakku.stores
+    ADD COLUMN IF NOT EXISTS is_online boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS online_changed_at timestamptz;
+
+-- Map/list reads with ?online_only=true
+CREATE INDEX IF NOT EXISTS idx_stores_online
+    ON gerobakku.stores (store_id) WHERE is_online;
+
+-- GET /stores/status/changes?since=...
+CREATE INDEX IF NOT EXISTS idx_stores_online_changed_at
+    ON gerobakku.stores (online_changed_at);
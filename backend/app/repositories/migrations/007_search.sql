@@ -0,0 +1,57 @@
+-- Migration: Full-text and fuzzy search over stores and menu items (GET /search)
+--
+-- search_vector: weighted Indonesian full-text document (name A, description B, address C)
+-- search_text:   normalized plain text for pg_trgm typo-tolerant matching ("baksoo", "nasgor")
+--
+-- Both are generated columns over gerobakku.search_normalize(), which must stay
+-- in sync with normalize_search_text() in app/services/search_service.py
+-- (the query is normalized in Python with the same rules).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- lower-case, strip accents, map pre-1972 spellings to EYD (oe->u, dj->j, tj->c,
+-- sj->sy, nj->ny, ch->kh) and keep only letters/digits, so "Soto Tjikini" and
+-- "soto cikini" index the same. Declared IMMUTABLE so it can back generated columns.
+CREATE OR REPLACE FUNCTION gerobakku.search_normalize(input text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT btrim(regexp_replace(
+        replace(replace(replace(replace(replace(replace(
+            lower(extensions.unaccent('extensions.unaccent'::regdictionary, coalesce(input, ''))),
+            'oe', 'u'), 'dj', 'j'), 'tj', 'c'), 'sj', 'sy'), 'nj', 'ny'), 'ch', 'kh'),
+        '[^a-z0-9]+', ' ', 'g'))
+$$;
+
+ALTER TABLE gerobakku.stores
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('indonesian', gerobakku.search_normalize(name)), 'A') ||
+        setweight(to_tsvector('indonesian', gerobakku.search_normalize(description)), 'B') ||
+        setweight(to_tsvector('indonesian', gerobakku.search_normalize(address)), 'C')
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS search_text text GENERATED ALWAYS AS (
+        gerobakku.search_normalize(
+            coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(address, '')
+        )
+    ) STORED;
+
+ALTER TABLE gerobakku.menu_items
+    ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('indonesian', gerobakku.search_normalize(name)), 'A') ||
+        setweight(to_tsvector('indonesian', gerobakku.search_normalize(description)), 'B')
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS search_text text GENERATED ALWAYS AS (
+        gerobakku.search_normalize(coalesce(name, '') || ' ' || coalesce(description, ''))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_stores_search_vector
+    ON gerobakku.stores USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_stores_search_trgm
+    ON gerobakku.stores USING gin (search_text extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_menu_items_search_vector
+    ON gerobakku.menu_items USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_menu_items_search_trgm
+    ON gerobakku.menu_items USING gin (search_text extensions.gin_trgm_ops);
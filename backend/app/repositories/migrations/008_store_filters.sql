@@ -0,0 +1,5 @@
+-- Migration: Filtered store lists and facet counts (GET /stores?category_id=&is_halal=&is_open=&min_rating=, GET /stores/facets)
+-- Category is the most selective filter; the remaining flags/rating ride along in the index.
+
+CREATE INDEX IF NOT EXISTS idx_stores_filters
+    ON gerobakku.stores (category_id, is_halal, is_open, rating);
@@ -0,0 +1,39 @@
+-- Migration: Precomputed store rankings (GET /stores/top, GET /stores/trending)
+--
+-- store_activity_hourly: rolling per-store counters, one row per store per hour.
+--   reviews is recounted from transactional_reviews by each refresh;
+--   views is added to by the in-process view counter.
+-- store_rankings: one row per store, rewritten by the periodic refresh
+--   (store_repo.refresh_store_rankings); the endpoints only read its indexes.
+
+CREATE TABLE IF NOT EXISTS gerobakku.store_activity_hourly (
+    store_id int NOT NULL REFERENCES gerobakku.stores (store_id) ON DELETE CASCADE,
+    hour timestamptz NOT NULL,
+    reviews int NOT NULL DEFAULT 0,
+    views int NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, hour)
+);
+
+-- Window sums (hour >= now() - 7 days) and pruning
+CREATE INDEX IF NOT EXISTS idx_store_activity_hourly_hour
+    ON gerobakku.store_activity_hourly (hour);
+
+CREATE TABLE IF NOT EXISTS gerobakku.store_rankings (
+    store_id int PRIMARY KEY REFERENCES gerobakku.stores (store_id) ON DELETE CASCADE,
+    review_count int NOT NULL DEFAULT 0,
+    bayesian_rating real NOT NULL DEFAULT 0,
+    reviews_24h int NOT NULL DEFAULT 0,
+    views_24h int NOT NULL DEFAULT 0,
+    activity_7d int NOT NULL DEFAULT 0,
+    trending_score real NOT NULL DEFAULT 0,
+    refreshed_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_store_rankings_top
+    ON gerobakku.store_rankings (bayesian_rating DESC, review_count DESC, store_id);
+CREATE INDEX IF NOT EXISTS idx_store_rankings_trending
+    ON gerobakku.store_rankings (trending_score DESC, store_id);
+
+-- Reviews per hour, recounted for the recent window
+CREATE INDEX IF NOT EXISTS idx_reviews_created_at
+    ON gerobakku.transactional_reviews (created_at);
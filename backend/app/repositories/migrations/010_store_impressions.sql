@@ -0,0 +1,5 @@
+-- Migration: Impressions (store shown in a list) next to detail views in the hourly activity counters.
+-- Both are added to by the in-process counter (app/activity.py), flushed every few seconds.
+
+ALTER TABLE gerobakku.store_activity_hourly
+    ADD COLUMN IF NOT EXISTS impressions int NOT NULL DEFAULT 0;
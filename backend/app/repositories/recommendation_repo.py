@@ -0,0 +1,91 @@
+from ..database import get_cursor, dict_row, point_dict_row
+from typing import Dict, Any, List
+
+
+def get_recommendation_candidates() -> List[Dict[str, Any]]:
+    """
+    Every store with its latest location and review count: the candidate
+    set scored by recommendation_service. Same store fields as
+    store_repo.get_all_stores, plus review_count.
+    """
+    sql = """
+        SELECT
+            s.store_id,
+            s.vendor_id,
+            s.name,
+            s.description,
+            s.rating,
+            s.category_id,
+            s.address,
+            s.is_open,
+            s.is_online,
+            s.is_halal,
+            s.open_time,
+            s.close_time,
+            s.created_at,
+            s.store_image_url,
+            s.image_variants,
+            ST_Y(l.location::geometry) AS lat,
+            ST_X(l.location::geometry) AS lon,
+            l.created_at AS location_updated_at,
+            COALESCE(r.review_count, 0) AS review_count
+        FROM gerobakku.stores s
+        LEFT JOIN LATERAL (
+            SELECT location, created_at
+            FROM gerobakku.transactional_store_location
+            WHERE store_id = s.store_id
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) l ON true
+        LEFT JOIN (
+            SELECT store_id, count(*) AS review_count
+            FROM gerobakku.transactional_reviews
+            GROUP BY store_id
+        ) r ON r.store_id = s.store_id
+        ORDER BY s.store_id;
+    """
+    try:
+        with get_cursor(row_factory=point_dict_row()) as cur:
+            cur.execute(sql)
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching recommendation candidates: {e}")
+        raise
+
+
+def get_user_category_affinity(user_id: int) -> Dict[int, float]:
+    """
+    How much a user likes each category, as {category_id: weight}.
+
+    A favorite counts 2, a review counts (score - 3) so bad experiences
+    push a category down, and the customer's stated category preference
+    counts 1. Categories the user never touched are absent.
+    """
+    sql = """
+        SELECT category_id, sum(weight)::float8 AS weight
+        FROM (
+            SELECT s.category_id, 2 AS weight
+            FROM gerobakku.transactional_favorites f
+            JOIN gerobakku.customers c ON c.customer_id = f.customer_id
+            JOIN gerobakku.stores s ON s.store_id = f.store_id
+            WHERE c.user_id = %(user_id)s
+            UNION ALL
+            SELECT s.category_id, r.score - 3 AS weight
+            FROM gerobakku.transactional_reviews r
+            JOIN gerobakku.stores s ON s.store_id = r.store_id
+            WHERE r.user_id = %(user_id)s
+            UNION ALL
+            SELECT c.category_preference, 1 AS weight
+            FROM gerobakku.customers c
+            WHERE c.user_id = %(user_id)s AND c.category_preference IS NOT NULL
+        ) signals
+        WHERE category_id IS NOT NULL
+        GROUP BY category_id;
+    """
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(sql, {"user_id": user_id})
+            return {row['category_id']: row['weight'] for row in cur.fetchall()}
+    except Exception as e:
+        print(f"Error fetching category affinity for user {user_id}: {e}")
+        raise
@@ -1,10 +1,10 @@
-from ..database import get_cursor
+from ..database import get_cursor, dict_row
 from typing import List, Dict, Optional
 
 
 def create_review(user_id: int, store_id: int, score: int, comment: str) -> dict:
     """Insert a new review and return the created review"""
-    with get_cursor(commit=True) as cur:
+    with get_cursor(commit=True, row_factory=dict_row) as cur:
         # Insert review (created_at has default value, rating_id auto-generated)
         cur.execute("""
             INSERT INTO gerobakku.transactional_reviews 
@@ -13,8 +13,8 @@ def create_review(user_id: int, store_id: int, score: int, comment: str) -> dict
             RETURNING rating_id, user_id, store_id, score, comment, created_at
         """, (user_id, store_id, score, comment))
         
-        row = cur.fetchone()
-        if not row:
+        review = cur.fetchone()
+        if not review:
             return None
         
         # Get reviewer name
@@ -25,21 +25,13 @@ def create_review(user_id: int, store_id: int, score: int, comment: str) -> dict
         """, (user_id,))
         
         name_row = cur.fetchone()
-        reviewer_name = name_row[0] if name_row else "Anonymous"
+        review['reviewer_name'] = name_row['full_name'] if name_row else "Anonymous"
         
-        return {
-            'rating_id': row[0],
-            'user_id': row[1],
-            'store_id': row[2],
-            'score': row[3],
-            'comment': row[4],
-            'created_at': row[5],
-            'reviewer_name': reviewer_name
-        }
+        return review
 
 def get_store_reviews(store_id: int) -> List[dict]:
     """Get all reviews for a store with reviewer names"""
-    with get_cursor() as cur:
+    with get_cursor(row_factory=dict_row) as cur:
         cur.execute("""
             SELECT 
                 r.rating_id,
@@ -55,16 +47,26 @@ def get_store_reviews(store_id: int) -> List[dict]:
             ORDER BY r.created_at DESC
         """, (store_id,))
         
-        rows = cur.fetchall()
-        return [{
-            'rating_id': row[0],
-            'user_id': row[1],
-            'store_id': row[2],
-            'score': row[3],
-            'comment': row[4],
-            'created_at': row[5],
-            'reviewer_name': row[6]
-        } for row in rows]
+        return cur.fetchall()
+
+def summarize_score_counts(score_counts: Dict[int, int]) -> dict:
+    """Build the review stats dict from a {score: count} mapping"""
+    distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    total = 0
+    weighted_sum = 0
+
+    for score, count in score_counts.items():
+        distribution[score] = count
+        total += count
+        weighted_sum += score * count
+
+    average = weighted_sum / total if total > 0 else 0.0
+
+    return {
+        'average_rating': round(average, 1),
+        'total_reviews': total,
+        'rating_distribution': distribution
+    }
 
 def get_review_stats(store_id: int) -> dict:
     """Get aggregated review statistics for a store"""
@@ -76,35 +78,11 @@ def get_review_stats(store_id: int) -> dict:
             WHERE store_id = %s
             GROUP BY score
         """, (store_id,))
-        
-        distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        total = 0
-        weighted_sum = 0
 
         rows = cur.fetchall()
-        
-        # Check if no reviews, send 0s
-        if not rows:
-            # No reviews yet
-            return {
-                'average_rating': 0.0,
-                'total_reviews': 0,
-                'rating_distribution': distribution
-            }
 
-        for row in rows:
-            score, count = row[0], row[1]
-            distribution[score] = count
-            total += count
-            weighted_sum += score * count
-        
-        average = weighted_sum / total if total > 0 else 0.0
-        
-        return {
-            'average_rating': round(average, 1),
-            'total_reviews': total,
-            'rating_distribution': distribution
-        }
+        # No reviews yet gives all 0s
+        return summarize_score_counts({row[0]: row[1] for row in rows})
 
 def update_store_rating(store_id: int):
     """Update the store's average rating based on reviews"""
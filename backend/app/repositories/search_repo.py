@@ -0,0 +1,135 @@
+from ..database import get_cursor, dict_row, point_dict_row
+from typing import Optional, Dict, Any, List
+
+
+def search_stores(
+    tsquery: str,
+    text: str,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    distance_scale_m: float = 1000.0,
+    limit: int = 20,
+    online_only: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Stores matching a search, directly or through their menu items, best first.
+
+    `tsquery` is a to_tsquery() expression and `text` the normalized query for
+    trigram (typo-tolerant) matching; both come from search_service. Each hit's
+    text score (full-text rank + word similarity, menu hits weighted 0.8) is
+    divided by (1 + distance / distance_scale_m) when a location is given.
+    Uses the GIN indexes from migration 007 for both kinds of match.
+    """
+    if lat is not None and lon is not None:
+        distance = "ST_Distance(l.location, ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography)"
+    else:
+        distance = "NULL::float8"
+
+    sql = """
+        WITH q AS (
+            SELECT to_tsquery('indonesian', %(tsquery)s) AS tsq, %(text)s::text AS text
+        ),
+        store_hits AS (
+            SELECT s.store_id,
+                   ts_rank_cd(s.search_vector, q.tsq, 32) + word_similarity(q.text, s.search_text) AS text_score
+            FROM gerobakku.stores s, q
+            WHERE s.search_vector @@ q.tsq OR q.text <%% s.search_text
+        ),
+        item_hits AS (
+            SELECT mi.store_id, mi.item_id, mi.name, mi.price,
+                   0.8 * (ts_rank_cd(mi.search_vector, q.tsq, 32) + word_similarity(q.text, mi.search_text)) AS text_score
+            FROM gerobakku.menu_items mi, q
+            WHERE mi.search_vector @@ q.tsq OR q.text <%% mi.search_text
+        ),
+        hits AS (
+            SELECT store_id, max(text_score) AS text_score
+            FROM (
+                SELECT store_id, text_score FROM store_hits
+                UNION ALL
+                SELECT store_id, text_score FROM item_hits
+            ) all_hits
+            GROUP BY store_id
+        )
+        SELECT
+            s.store_id,
+            s.vendor_id,
+            s.name,
+            s.description,
+            s.rating,
+            s.category_id,
+            s.address,
+            s.is_open,
+            s.is_online,
+            s.is_halal,
+            s.open_time,
+            s.close_time,
+            s.created_at,
+            s.store_image_url,
+            s.image_variants,
+            ST_Y(l.location::geometry) AS lat,
+            ST_X(l.location::geometry) AS lon,
+            l.created_at AS location_updated_at,
+            d.distance_m,
+            h.text_score,
+            h.text_score / (1 + COALESCE(d.distance_m, 0) / %(scale)s) AS score,
+            COALESCE(items.matched_items, '[]'::json) AS matched_items
+        FROM hits h
+        JOIN gerobakku.stores s ON s.store_id = h.store_id
+        LEFT JOIN LATERAL (
+            SELECT location, created_at
+            FROM gerobakku.transactional_store_location
+            WHERE store_id = s.store_id
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) l ON true
+        CROSS JOIN LATERAL (SELECT {distance} AS distance_m) d
+        LEFT JOIN LATERAL (
+            SELECT json_agg(json_build_object(
+                'item_id', i.item_id,
+                'name', i.name,
+                'price', i.price
+            ) ORDER BY i.text_score DESC) AS matched_items
+            FROM item_hits i
+            WHERE i.store_id = h.store_id
+        ) items ON true
+        {where}
+        ORDER BY score DESC, s.store_id
+        LIMIT %(limit)s;
+    """.format(distance=distance, where="WHERE s.is_online" if online_only else "")
+    params = {
+        "tsquery": tsquery,
+        "text": text,
+        "lat": lat,
+        "lon": lon,
+        "scale": distance_scale_m,
+        "limit": limit,
+    }
+    try:
+        with get_cursor(row_factory=point_dict_row()) as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error searching stores: {e}")
+        raise
+
+
+def get_suggest_names() -> List[Dict[str, Any]]:
+    """
+    Every store and menu item name, for building the autocomplete index.
+    Rows: {kind: 'store' | 'menu_item', id, store_id, name}.
+    """
+    sql = """
+        SELECT 'store' AS kind, store_id AS id, store_id, name
+        FROM gerobakku.stores
+        UNION ALL
+        SELECT 'menu_item' AS kind, item_id AS id, store_id, name
+        FROM gerobakku.menu_items
+        ORDER BY kind DESC, id;
+    """
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(sql)
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching names for autocomplete: {e}")
+        raise
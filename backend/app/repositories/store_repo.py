@@ -1,14 +1,44 @@
-from ..database import get_cursor
+from ..database import get_cursor, dict_row, tuple_row, point_dict_row
+from .review_repo import summarize_score_counts
 from typing import Optional, Dict, Any, List
+from psycopg.types.json import Jsonb
+
+# Frontend asset shown for stores created without an image
+DEFAULT_STORE_IMAGE_URL = "assets/default_store_image.jpg"
 
 
 # ===== STORE CRUD OPERATIONS =====
 
-def get_all_stores() -> List[Dict[str, Any]]:
+def _store_filter_conditions(category_id: Optional[int] = None, is_halal: Optional[bool] = None,
+                             is_open: Optional[bool] = None, min_rating: Optional[float] = None) -> Dict[str, str]:
+    """
+    SQL conditions (on alias s) for the given store filters, keyed by facet.
+    Values are bound by name: %(category_id)s, %(is_halal)s, %(is_open)s, %(min_rating)s.
+    """
+    conditions = {}
+    if category_id is not None:
+        conditions["category"] = "s.category_id = %(category_id)s"
+    if is_halal is not None:
+        conditions["is_halal"] = "COALESCE(s.is_halal, false) = %(is_halal)s"
+    if is_open is not None:
+        conditions["is_open"] = "COALESCE(s.is_open, false) = %(is_open)s"
+    if min_rating is not None:
+        conditions["rating"] = "COALESCE(s.rating, 0) >= %(min_rating)s"
+    return conditions
+
+
+def get_all_stores(online_only: bool = False, category_id: Optional[int] = None,
+                   is_halal: Optional[bool] = None, is_open: Optional[bool] = None,
+                   min_rating: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Fetch all stores with their latest location.
     Returns a list of store dictionaries with current_location as {lat, lon}.
+    With online_only, only stores the status sweeper marked online (indexed).
+    The other arguments filter in SQL; None means "any".
     """
+    conditions = list(_store_filter_conditions(category_id, is_halal, is_open, min_rating).values())
+    if online_only:
+        conditions.append("s.is_online")
     sql = """
         SELECT 
             s.store_id,
@@ -19,11 +49,13 @@ def get_all_stores() -> List[Dict[str, Any]]:
             s.category_id,
             s.address,
             s.is_open,
+            s.is_online,
             s.is_halal,
             s.open_time,
             s.close_time,
             s.created_at,
             s.store_image_url,
+            s.image_variants,
             ST_Y(l.location::geometry) AS lat,
             ST_X(l.location::geometry) AS lon,
             l.created_at AS location_updated_at
@@ -35,31 +67,17 @@ def get_all_stores() -> List[Dict[str, Any]]:
             ORDER BY created_at DESC
             LIMIT 1
         ) l ON true
+        {where}
         ORDER BY s.store_id;
-    """
+    """.format(where="WHERE " + " AND ".join(conditions) if conditions else "")
+    params = {"category_id": category_id, "is_halal": is_halal, "is_open": is_open, "min_rating": min_rating}
     try:
-        with get_cursor() as cur:
-            cur.execute(sql)
-            rows = cur.fetchall()
-            if not rows:
-                return []
-            
-            cols = [d[0] for d in cur.description]
-            stores = []
-            for row in rows:
-                store_dict = dict(zip(cols, row))
-                # Convert location to nested object
-                if store_dict.get('lat') is not None and store_dict.get('lon') is not None:
-                    store_dict['current_location'] = {
-                        'lat': store_dict.pop('lat'),
-                        'lon': store_dict.pop('lon')
-                    }
-                else:
-                    store_dict['current_location'] = None
-                    store_dict.pop('lat', None)
-                    store_dict.pop('lon', None)
-                stores.append(store_dict)
-            return stores
+        # Dict rows: they become StoreResponse models, and Pydantic validates dicts
+        # about twice as fast as namedtuples (benchmarks/bench_row_mapping.py)
+        with get_cursor(row_factory=point_dict_row()) as cur:
+            cur.execute(sql, params)
+            # Rows come back with lat/lon already nested as current_location
+            return cur.fetchall()
     except Exception as e:
         print(f"Error fetching all stores: {e}")
         raise
@@ -79,11 +97,13 @@ def get_store_by_id(store_id: int) -> Optional[Dict[str, Any]]:
             s.category_id,
             s.address,
             s.is_open,
+            s.is_online,
             s.is_halal,
             s.open_time,
             s.close_time,
             s.created_at,
             s.store_image_url,
+            s.image_variants,
             ST_Y(l.location::geometry) AS lat,
             ST_X(l.location::geometry) AS lon,
             l.created_at AS location_updated_at
@@ -98,29 +118,193 @@ def get_store_by_id(store_id: int) -> Optional[Dict[str, Any]]:
         WHERE s.store_id = %s;
     """
     try:
-        with get_cursor() as cur:
+        with get_cursor(row_factory=point_dict_row()) as cur:
             cur.execute(sql, (store_id,))
+            return cur.fetchone()
+    except Exception as e:
+        print(f"Error fetching store {store_id}: {e}")
+        raise
+
+
+# With STORE_DETAIL_DB_JSON on this document goes to the client without
+# passing through StoreWithMenuResponse, so nullable columns the model requires
+# are COALESCEd here (the model path runs the same query). Missing hours become
+# 0..0, which sweep_store_online_status already reads as open all day.
+_STORE_DETAIL_SQL = """
+    SELECT json_build_object(
+        'store_id', s.store_id,
+        'vendor_id', s.vendor_id,
+        'name', s.name,
+        'description', COALESCE(s.description, ''),
+        'rating', COALESCE(s.rating, 0),
+        'category_id', s.category_id,
+        'address', COALESCE(s.address, ''),
+        'is_open', COALESCE(s.is_open, false),
+        'is_online', COALESCE(s.is_online, false),
+        'is_halal', COALESCE(s.is_halal, false),
+        'open_time', COALESCE(s.open_time, 0),
+        'close_time', COALESCE(s.close_time, 0),
+        'created_at', s.created_at,
+        'store_image_url', s.store_image_url,
+        'image_variants', s.image_variants,
+        'current_location', CASE
+            WHEN l.location IS NULL THEN NULL
+            ELSE json_build_object(
+                'lat', ST_Y(l.location::geometry),
+                'lon', ST_X(l.location::geometry)
+            )
+        END,
+        'location_updated_at', l.created_at,
+        'menu', COALESCE(m.menu, '[]'::json)
+    ){cast}
+    FROM gerobakku.stores s
+    LEFT JOIN LATERAL (
+        SELECT location, created_at
+        FROM gerobakku.transactional_store_location
+        WHERE store_id = s.store_id
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) l ON true
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'item_id', mi.item_id,
+            'store_id', mi.store_id,
+            'name', mi.name,
+            'description', COALESCE(mi.description, ''),
+            'price', COALESCE(mi.price, 0),
+            'is_available', COALESCE(mi.is_available, true),
+            'menu_image_url', mi.menu_image_url,
+            'image_variants', mi.image_variants,
+            'created_at', mi.created_at
+        ) ORDER BY mi.item_id) AS menu
+        FROM gerobakku.menu_items mi
+        WHERE mi.store_id = s.store_id
+    ) m ON true
+    WHERE s.store_id = %s;
+"""
+
+
+def get_store_with_menu(store_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a single store with its latest location and menu in one round trip.
+    The menu is aggregated by Postgres (json_agg) into a list of item dicts.
+    """
+    try:
+        with get_cursor() as cur:
+            cur.execute(_STORE_DETAIL_SQL.format(cast=""), (store_id,))
             row = cur.fetchone()
             if not row:
                 return None
-            
-            cols = [d[0] for d in cur.description]
-            store_dict = dict(zip(cols, row))
-            
-            # Convert location to nested object
-            if store_dict.get('lat') is not None and store_dict.get('lon') is not None:
-                store_dict['current_location'] = {
-                    'lat': store_dict.pop('lat'),
-                    'lon': store_dict.pop('lon')
-                }
-            else:
+            return row[0]
+    except Exception as e:
+        print(f"Error fetching store {store_id} with menu: {e}")
+        raise
+
+
+def get_store_with_menu_json(store_id: int) -> Optional[str]:
+    """
+    Same as get_store_with_menu, but returns the JSON document exactly as
+    Postgres rendered it, without parsing it in Python.
+    """
+    try:
+        with get_cursor() as cur:
+            cur.execute(_STORE_DETAIL_SQL.format(cast="::text"), (store_id,))
+            row = cur.fetchone()
+            if not row:
+                return None
+            return row[0]
+    except Exception as e:
+        print(f"Error fetching store {store_id} as JSON: {e}")
+        raise
+
+
+def get_stores_by_ids(store_ids: List[int], include_menu: bool = False,
+                      include_reviews_summary: bool = False,
+                      include_location: bool = False) -> List[Dict[str, Any]]:
+    """
+    Fetch several stores at once, optionally with their menu, review summary
+    and latest location.
+    Uses at most four set-based queries (= ANY) on one pooled connection,
+    no matter how many IDs are requested.
+    """
+    if not store_ids:
+        return []
+
+    store_sql = """
+        SELECT store_id, vendor_id, name, description, rating, category_id,
+               address, is_open, is_online, is_halal, open_time, close_time, created_at, store_image_url,
+               image_variants
+        FROM gerobakku.stores
+        WHERE store_id = ANY(%s)
+        ORDER BY store_id;
+    """
+    location_sql = """
+        SELECT DISTINCT ON (store_id)
+            store_id,
+            ST_Y(location::geometry) AS lat,
+            ST_X(location::geometry) AS lon,
+            created_at AS location_updated_at
+        FROM gerobakku.transactional_store_location
+        WHERE store_id = ANY(%s)
+        ORDER BY store_id, created_at DESC;
+    """
+    menu_sql = """
+        SELECT item_id, store_id, name, description, price,
+               is_available, menu_image_url, image_variants, created_at
+        FROM gerobakku.menu_items
+        WHERE store_id = ANY(%s)
+        ORDER BY store_id, item_id;
+    """
+    review_sql = """
+        SELECT store_id, score, COUNT(*) AS count
+        FROM gerobakku.transactional_reviews
+        WHERE store_id = ANY(%s)
+        GROUP BY store_id, score;
+    """
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(store_sql, (store_ids,))
+            rows = cur.fetchall()
+            if not rows:
+                return []
+
+            stores = {}
+            for store_dict in rows:
                 store_dict['current_location'] = None
-                store_dict.pop('lat', None)
-                store_dict.pop('lon', None)
-            
-            return store_dict
+                store_dict['location_updated_at'] = None
+                stores[store_dict['store_id']] = store_dict
+
+            # Only ask for the children of stores that actually exist
+            found_ids = list(stores.keys())
+
+            if include_location:
+                cur.row_factory = point_dict_row()
+                cur.execute(location_sql, (found_ids,))
+                for location in cur.fetchall():
+                    store_dict = stores[location['store_id']]
+                    store_dict['current_location'] = location['current_location']
+                    store_dict['location_updated_at'] = location['location_updated_at']
+
+            if include_menu:
+                for store_dict in stores.values():
+                    store_dict['menu'] = []
+                cur.row_factory = dict_row
+                cur.execute(menu_sql, (found_ids,))
+                for item in cur.fetchall():
+                    stores[item['store_id']]['menu'].append(item)
+
+            if include_reviews_summary:
+                score_counts = {store_id: {} for store_id in found_ids}
+                cur.row_factory = tuple_row
+                cur.execute(review_sql, (found_ids,))
+                for store_id, score, count in cur.fetchall():
+                    score_counts[store_id][score] = count
+                for store_id, counts in score_counts.items():
+                    stores[store_id]['reviews_summary'] = summarize_score_counts(counts)
+
+            return list(stores.values())
     except Exception as e:
-        print(f"Error fetching store {store_id}: {e}")
+        print(f"Error fetching stores {store_ids}: {e}")
         raise
 
 
@@ -140,18 +324,15 @@ def create_store(vendor_id: int, name: str, description: str, category_id: int,
             %s, %s, %s, 0.0, %s, %s, false, %s, %s, %s, NOW(), %s
         )
         RETURNING store_id, vendor_id, name, description, rating, category_id,
-                  address, is_open, is_halal, open_time, close_time, created_at, store_image_url;
+                  address, is_open, is_online, is_halal, open_time, close_time, created_at, store_image_url,
+                  image_variants;
     """
     try:
-        with get_cursor(commit=True) as cur:
-            # Revert to default image path for demonstration purposes
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
             cur.execute(sql, (vendor_id, name, description, category_id, address,
-                            is_halal, open_time, close_time, "assets/default_store_image.jpg"))
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+                            is_halal, open_time, close_time,
+                            store_image_url or DEFAULT_STORE_IMAGE_URL))
+            return cur.fetchone()
     except Exception as e:
         print(f"Error creating store: {e}")
         raise
@@ -162,6 +343,8 @@ def update_store(store_id: int, **kwargs) -> Optional[Dict[str, Any]]:
     Update store details. Accepts kwargs for fields to update.
     Valid fields: name, description, category_id, address, is_halal, 
                   open_time, close_time, store_image_url
+    When the image changes, the row also carries the replaced URL as
+    previous_image_url, so its blob reference can be released.
     """
     allowed_fields = ['name', 'description', 'category_id', 'address', 
                      'is_halal', 'open_time', 'close_time', 'store_image_url']
@@ -176,29 +359,59 @@ def update_store(store_id: int, **kwargs) -> Optional[Dict[str, Any]]:
     # Build SET clause
     set_clause = ', '.join([f'"{k}" = %s' for k in updates.keys()])
     values = list(updates.values())
+    previous_cte = previous_from = previous_column = ""
+    if 'store_image_url' in updates:
+        # Variants belong to the old image; new ones are rendered in the background
+        set_clause += ', image_variants = NULL'
+        # Old image read under the row lock, in the same statement
+        previous_cte = """
+        WITH previous AS (
+            SELECT store_image_url AS previous_image_url
+            FROM gerobakku.stores WHERE store_id = %s FOR UPDATE
+        )"""
+        previous_from = "FROM previous"
+        previous_column = ", previous.previous_image_url"
+        values.insert(0, store_id)
     values.append(store_id)  # For WHERE clause
     
-    sql = f"""
+    sql = f"""{previous_cte}
         UPDATE gerobakku.stores
         SET {set_clause}
+        {previous_from}
         WHERE store_id = %s
         RETURNING store_id, vendor_id, name, description, rating, category_id,
-                  address, is_open, is_halal, open_time, close_time, created_at, store_image_url;
+                  address, is_open, is_online, is_halal, open_time, close_time, created_at, store_image_url,
+                  image_variants{previous_column};
     """
     
     try:
-        with get_cursor(commit=True) as cur:
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
             cur.execute(sql, values)
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+            return cur.fetchone()
     except Exception as e:
         print(f"Error updating store {store_id}: {e}")
         raise
 
 
+def update_store_image_variants(store_id: int, store_image_url: str, variants: Dict[str, str]) -> bool:
+    """
+    Store the rendered size variants of a store image.
+    Skipped if the store's image changed while the variants were being made.
+    """
+    sql = """
+        UPDATE gerobakku.stores
+        SET image_variants = %s
+        WHERE store_id = %s AND store_image_url = %s;
+    """
+    try:
+        with get_cursor(commit=True) as cur:
+            cur.execute(sql, (Jsonb(variants), store_id, store_image_url))
+            return cur.rowcount > 0
+    except Exception as e:
+        print(f"Error saving image variants for store {store_id}: {e}")
+        raise
+
+
 def update_store_hours(store_id: int, open_time: int, close_time: int) -> Optional[Dict[str, Any]]:
     """
     Update store operating hours.
@@ -209,22 +422,24 @@ def update_store_hours(store_id: int, open_time: int, close_time: int) -> Option
 def set_store_open_status(store_id: int, is_open: bool) -> Optional[Dict[str, Any]]:
     """
     Explicitly set store open/close status.
+    Closing also takes the store offline right away; opening waits for the
+    status sweeper to see a heartbeat within opening hours.
     """
     sql = """
         UPDATE gerobakku.stores
-        SET is_open = %s
-        WHERE store_id = %s
+        SET is_open = %(is_open)s,
+            is_online = is_online AND %(is_open)s,
+            online_changed_at = CASE WHEN is_online AND NOT %(is_open)s
+                                     THEN now() ELSE online_changed_at END
+        WHERE store_id = %(store_id)s
         RETURNING store_id, vendor_id, name, description, rating, category_id,
-                  address, is_open, is_halal, open_time, close_time, created_at, store_image_url;
+                  address, is_open, is_online, is_halal, open_time, close_time, created_at, store_image_url,
+                  image_variants;
     """
     try:
-        with get_cursor(commit=True) as cur:
-            cur.execute(sql, (is_open, store_id))
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
+            cur.execute(sql, {"is_open": is_open, "store_id": store_id})
+            return cur.fetchone()
     except Exception as e:
         print(f"Error setting store {store_id} open status: {e}")
         raise
@@ -237,7 +452,7 @@ def set_store_halal_status(store_id: int, is_halal: bool) -> Optional[Dict[str,
     return update_store(store_id, is_halal=is_halal)
 
 
-def delete_store(store_id: int) -> bool:
+def delete_store(store_id: int) -> Optional[Dict[str, Any]]:
     """
     Hard delete a store from the database.
     Due to foreign key constraints, this will cascade delete:
@@ -245,12 +460,25 @@ def delete_store(store_id: int) -> bool:
     - All location history for this store
     - All reviews for this store
     - All favorites for this store
+    Returns the image URLs the store and its menu items used
+    ({store_image_url, menu_image_urls}), or None if there was no such store.
+    """
+    # CTEs see the rows as they were before the cascade
+    sql = """
+        WITH menu AS (
+            SELECT menu_image_url FROM gerobakku.menu_items WHERE store_id = %(store_id)s
+        ), deleted AS (
+            DELETE FROM gerobakku.stores WHERE store_id = %(store_id)s
+            RETURNING store_image_url
+        )
+        SELECT store_image_url,
+               ARRAY(SELECT menu_image_url FROM menu WHERE menu_image_url IS NOT NULL) AS menu_image_urls
+        FROM deleted;
     """
-    sql = "DELETE FROM gerobakku.stores WHERE store_id = %s;"
     try:
-        with get_cursor(commit=True) as cur:
-            cur.execute(sql, (store_id,))
-            return cur.rowcount > 0
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
+            cur.execute(sql, {"store_id": store_id})
+            return cur.fetchone()
     except Exception as e:
         print(f"Error deleting store {store_id}: {e}")
         raise
@@ -264,19 +492,15 @@ def get_store_menu(store_id: int) -> List[Dict[str, Any]]:
     """
     sql = """
         SELECT item_id, store_id, name, description, price, 
-               is_available, menu_image_url, created_at
+               is_available, menu_image_url, image_variants, created_at
         FROM gerobakku.menu_items
         WHERE store_id = %s
         ORDER BY item_id;
     """
     try:
-        with get_cursor() as cur:
+        with get_cursor(row_factory=dict_row) as cur:
             cur.execute(sql, (store_id,))
-            rows = cur.fetchall()
-            if not rows:
-                return []
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, row)) for row in rows]
+            return cur.fetchall()
     except Exception as e:
         print(f"Error fetching menu for store {store_id}: {e}")
         raise
@@ -294,16 +518,13 @@ def create_menu_item(store_id: int, name: str, description: str, price: float,
             (SELECT COALESCE(MAX(item_id), 1000) + 1 FROM gerobakku.menu_items),
             %s, %s, %s, %s, %s, %s, NOW()
         )
-        RETURNING item_id, store_id, name, description, price, is_available, menu_image_url, created_at;
+        RETURNING item_id, store_id, name, description, price, is_available, menu_image_url,
+                  image_variants, created_at;
     """
     try:
-        with get_cursor(commit=True) as cur:
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
             cur.execute(sql, (store_id, name, description, price, is_available, menu_image_url))
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+            return cur.fetchone()
     except Exception as e:
         print(f"Error creating menu item: {e}")
         raise
@@ -313,6 +534,8 @@ def update_menu_item(item_id: int, **kwargs) -> Optional[Dict[str, Any]]:
     """
     Update menu item details.
     Valid fields: name, description, price, is_available, menu_image_url
+    When the image changes, the row also carries the replaced URL as
+    previous_image_url.
     """
     allowed_fields = ['name', 'description', 'price', 'is_available', 'menu_image_url']
     
@@ -321,38 +544,62 @@ def update_menu_item(item_id: int, **kwargs) -> Optional[Dict[str, Any]]:
     if not updates:
         # Return current item if no updates
         sql = "SELECT * FROM gerobakku.menu_items WHERE item_id = %s;"
-        with get_cursor() as cur:
+        with get_cursor(row_factory=dict_row) as cur:
             cur.execute(sql, (item_id,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+            return cur.fetchone()
     
     set_clause = ', '.join([f'"{k}" = %s' for k in updates.keys()])
     values = list(updates.values())
+    previous_cte = previous_from = previous_column = ""
+    if 'menu_image_url' in updates:
+        set_clause += ', image_variants = NULL'
+        previous_cte = """
+        WITH previous AS (
+            SELECT menu_image_url AS previous_image_url
+            FROM gerobakku.menu_items WHERE item_id = %s FOR UPDATE
+        )"""
+        previous_from = "FROM previous"
+        previous_column = ", previous.previous_image_url"
+        values.insert(0, item_id)
     values.append(item_id)
     
-    sql = f"""
+    sql = f"""{previous_cte}
         UPDATE gerobakku.menu_items
         SET {set_clause}
+        {previous_from}
         WHERE item_id = %s
-        RETURNING item_id, store_id, name, description, price, is_available, menu_image_url, created_at;
+        RETURNING item_id, store_id, name, description, price, is_available, menu_image_url,
+                  image_variants, created_at{previous_column};
     """
     
     try:
-        with get_cursor(commit=True) as cur:
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
             cur.execute(sql, values)
-            row = cur.fetchone()
-            if not row:
-                return None
-            cols = [d[0] for d in cur.description]
-            return dict(zip(cols, row))
+            return cur.fetchone()
     except Exception as e:
         print(f"Error updating menu item {item_id}: {e}")
         raise
 
 
+def update_menu_item_image_variants(item_id: int, menu_image_url: str, variants: Dict[str, str]) -> bool:
+    """
+    Store the rendered size variants of a menu item image.
+    Skipped if the item's image changed while the variants were being made.
+    """
+    sql = """
+        UPDATE gerobakku.menu_items
+        SET image_variants = %s
+        WHERE item_id = %s AND menu_image_url = %s;
+    """
+    try:
+        with get_cursor(commit=True) as cur:
+            cur.execute(sql, (Jsonb(variants), item_id, menu_image_url))
+            return cur.rowcount > 0
+    except Exception as e:
+        print(f"Error saving image variants for menu item {item_id}: {e}")
+        raise
+
+
 def update_menu_item_availability(item_id: int, is_available: bool) -> Optional[Dict[str, Any]]:
     """
     Toggle menu item availability.
@@ -360,15 +607,16 @@ def update_menu_item_availability(item_id: int, is_available: bool) -> Optional[
     return update_menu_item(item_id, is_available=is_available)
 
 
-def delete_menu_item(item_id: int) -> bool:
+def delete_menu_item(item_id: int) -> Optional[Dict[str, Any]]:
     """
     Delete a menu item.
+    Returns {item_id, menu_image_url} of the deleted item, or None if there was none.
     """
-    sql = "DELETE FROM gerobakku.menu_items WHERE item_id = %s;"
+    sql = "DELETE FROM gerobakku.menu_items WHERE item_id = %s RETURNING item_id, menu_image_url;"
     try:
-        with get_cursor(commit=True) as cur:
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
             cur.execute(sql, (item_id,))
-            return cur.rowcount > 0
+            return cur.fetchone()
     except Exception as e:
         print(f"Error deleting menu item {item_id}: {e}")
         raise
@@ -376,7 +624,7 @@ def delete_menu_item(item_id: int) -> bool:
 
 def get_store_by_vendor_id(vendor_id: int) -> dict:
     """Get store by vendor_id"""
-    with get_cursor() as cur:
+    with get_cursor(row_factory=dict_row) as cur:
         cur.execute("""
             SELECT store_id, name
             FROM gerobakku.stores
@@ -384,11 +632,406 @@ def get_store_by_vendor_id(vendor_id: int) -> dict:
             LIMIT 1
         """, (vendor_id,))
         
-        row = cur.fetchone()
-        if not row:
-            return None
-        
-        return {
-            'store_id': row[0],
-            'name': row[1]
-        }
\ No newline at end of file
+        return cur.fetchone()
+
+# ===== FACETS =====
+
+def get_store_facets(online_only: bool = False, category_id: Optional[int] = None,
+                     is_halal: Optional[bool] = None, is_open: Optional[bool] = None,
+                     min_rating: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Facet counts for the store filters in one scan, using GROUPING SETS.
+
+    Each facet is counted with every filter applied except its own, so a
+    filter UI can show how many stores each alternative choice would give.
+    Returns one row per group: {facet, value, name, count}, where facet is
+    'category' (value = category_id, name from master_categories),
+    'is_halal', 'is_open', 'rating' (value = whole stars, floor(rating)) or
+    'total' (every filter applied).
+    """
+    conditions = _store_filter_conditions(category_id, is_halal, is_open, min_rating)
+
+    def matches_except(facet: Optional[str]) -> str:
+        others = [sql for name, sql in conditions.items() if name != facet]
+        return " AND ".join(others) if others else "true"
+
+    sql = """
+        WITH f AS (
+            SELECT
+                s.category_id,
+                COALESCE(s.is_halal, false) AS is_halal,
+                COALESCE(s.is_open, false) AS is_open,
+                floor(COALESCE(s.rating, 0))::int AS stars,
+                {m_category} AS m_category,
+                {m_halal} AS m_halal,
+                {m_open} AS m_open,
+                {m_rating} AS m_rating,
+                {m_all} AS m_all
+            FROM gerobakku.stores s
+            {where}
+        ),
+        counts AS (
+            SELECT
+                GROUPING(category_id) AS g_category,
+                GROUPING(is_halal) AS g_halal,
+                GROUPING(is_open) AS g_open,
+                GROUPING(stars) AS g_stars,
+                category_id, is_halal, is_open, stars,
+                count(*) FILTER (WHERE m_category) AS n_category,
+                count(*) FILTER (WHERE m_halal) AS n_halal,
+                count(*) FILTER (WHERE m_open) AS n_open,
+                count(*) FILTER (WHERE m_rating) AS n_rating,
+                count(*) FILTER (WHERE m_all) AS n_all
+            FROM f
+            GROUP BY GROUPING SETS ((category_id), (is_halal), (is_open), (stars), ())
+        )
+        SELECT
+            CASE
+                WHEN g_category = 0 THEN 'category'
+                WHEN g_halal = 0 THEN 'is_halal'
+                WHEN g_open = 0 THEN 'is_open'
+                WHEN g_stars = 0 THEN 'rating'
+                ELSE 'total'
+            END AS facet,
+            CASE
+                WHEN g_category = 0 THEN category_id
+                WHEN g_halal = 0 THEN is_halal::int
+                WHEN g_open = 0 THEN is_open::int
+                WHEN g_stars = 0 THEN stars
+            END AS value,
+            mc.name,
+            CASE
+                WHEN g_category = 0 THEN n_category
+                WHEN g_halal = 0 THEN n_halal
+                WHEN g_open = 0 THEN n_open
+                WHEN g_stars = 0 THEN n_rating
+                ELSE n_all
+            END AS count
+        FROM counts
+        LEFT JOIN gerobakku.master_categories mc
+               ON g_category = 0 AND mc.category_id = counts.category_id
+        ORDER BY facet, value;
+    """.format(
+        m_category=matches_except("category"),
+        m_halal=matches_except("is_halal"),
+        m_open=matches_except("is_open"),
+        m_rating=matches_except("rating"),
+        m_all=matches_except(None),
+        where="WHERE s.is_online" if online_only else "",
+    )
+    params = {"category_id": category_id, "is_halal": is_halal, "is_open": is_open, "min_rating": min_rating}
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching store facets: {e}")
+        raise
+
+
+# ===== RANKINGS =====
+
+def refresh_store_rankings(prior_reviews: int, review_weight: int, keep_days: int = 8) -> int:
+    """
+    Recompute gerobakku.store_rankings for every store in one transaction.
+
+    1. Recount the last keep_days of reviews into store_activity_hourly
+       (idempotent, so a review needs no extra write when it is posted).
+       Hours in the window whose reviews were all deleted are zeroed
+       first, since the recount only produces rows for hours that still
+       have reviews.
+    2. bayesian_rating = (prior_reviews * global mean + sum of scores)
+                         / (prior_reviews + review count)
+    3. trending_score compares the last 24h of activity (views + review_weight
+       * reviews) with the daily average of the 7 days before, as
+       (recent - baseline) / sqrt(baseline + 1), so a jump from 0 to 3 views
+       does not outrank a jump from 100 to 300.
+    4. Drop activity rows older than keep_days.
+
+    Returns the number of stores ranked.
+    """
+    params = {"prior_reviews": prior_reviews, "review_weight": review_weight, "keep_days": keep_days}
+    try:
+        with get_cursor(commit=True) as cur:
+            cur.execute("""
+                UPDATE gerobakku.store_activity_hourly a
+                SET reviews = 0
+                WHERE a.hour >= date_trunc('hour', now()) - make_interval(days => %(keep_days)s)
+                  AND a.reviews <> 0
+                  AND NOT EXISTS (
+                      SELECT 1 FROM gerobakku.transactional_reviews r
+                      WHERE r.store_id = a.store_id
+                        AND r.created_at >= a.hour
+                        AND r.created_at < a.hour + interval '1 hour'
+                  );
+            """, params)
+            cur.execute("""
+                INSERT INTO gerobakku.store_activity_hourly (store_id, hour, reviews)
+                SELECT store_id, date_trunc('hour', created_at), count(*)
+                FROM gerobakku.transactional_reviews
+                WHERE created_at >= date_trunc('hour', now()) - make_interval(days => %(keep_days)s)
+                GROUP BY 1, 2
+                ON CONFLICT (store_id, hour) DO UPDATE SET reviews = EXCLUDED.reviews;
+            """, params)
+            cur.execute("""
+                WITH prior AS (
+                    SELECT COALESCE(avg(score), 0) AS mean FROM gerobakku.transactional_reviews
+                ),
+                reviews AS (
+                    SELECT store_id, count(*) AS n, sum(score) AS total
+                    FROM gerobakku.transactional_reviews
+                    GROUP BY store_id
+                ),
+                activity AS (
+                    SELECT
+                        store_id,
+                        sum(reviews) FILTER (WHERE hour >= now() - interval '24 hours') AS reviews_24h,
+                        sum(views) FILTER (WHERE hour >= now() - interval '24 hours') AS views_24h,
+                        sum(views + %(review_weight)s * reviews)
+                            FILTER (WHERE hour < now() - interval '24 hours') AS baseline_7d
+                    FROM gerobakku.store_activity_hourly
+                    WHERE hour >= now() - interval '8 days'
+                    GROUP BY store_id
+                ),
+                ranked AS (
+                    SELECT
+                        s.store_id,
+                        COALESCE(r.n, 0) AS review_count,
+                        (%(prior_reviews)s * p.mean + COALESCE(r.total, 0))
+                            / NULLIF(%(prior_reviews)s + COALESCE(r.n, 0), 0) AS bayesian_rating,
+                        COALESCE(a.reviews_24h, 0) AS reviews_24h,
+                        COALESCE(a.views_24h, 0) AS views_24h,
+                        COALESCE(a.baseline_7d, 0) AS activity_7d
+                    FROM gerobakku.stores s
+                    CROSS JOIN prior p
+                    LEFT JOIN reviews r ON r.store_id = s.store_id
+                    LEFT JOIN activity a ON a.store_id = s.store_id
+                )
+                INSERT INTO gerobakku.store_rankings (
+                    store_id, review_count, bayesian_rating, reviews_24h, views_24h,
+                    activity_7d, trending_score, refreshed_at
+                )
+                SELECT
+                    store_id, review_count, COALESCE(bayesian_rating, 0), reviews_24h, views_24h, activity_7d,
+                    ((views_24h + %(review_weight)s * reviews_24h) - activity_7d / 7.0)
+                        / sqrt(activity_7d / 7.0 + 1),
+                    now()
+                FROM ranked
+                ON CONFLICT (store_id) DO UPDATE SET
+                    review_count = EXCLUDED.review_count,
+                    bayesian_rating = EXCLUDED.bayesian_rating,
+                    reviews_24h = EXCLUDED.reviews_24h,
+                    views_24h = EXCLUDED.views_24h,
+                    activity_7d = EXCLUDED.activity_7d,
+                    trending_score = EXCLUDED.trending_score,
+                    refreshed_at = EXCLUDED.refreshed_at;
+            """, params)
+            ranked = cur.rowcount
+            cur.execute("""
+                DELETE FROM gerobakku.store_activity_hourly
+                WHERE hour < now() - make_interval(days => %(keep_days)s);
+            """, params)
+            return ranked
+    except Exception as e:
+        print(f"Error refreshing store rankings: {e}")
+        raise
+
+
+def add_store_activity(store_ids: List[int], views: List[int], impressions: List[int]) -> int:
+    """
+    Add view/impression deltas to the current hour's counters of many stores
+    in one statement (parallel arrays, one entry per store).
+    IDs of stores deleted meanwhile are skipped. Returns the rows written.
+    """
+    sql = """
+        INSERT INTO gerobakku.store_activity_hourly (store_id, hour, views, impressions)
+        SELECT d.store_id, date_trunc('hour', now()), d.views, d.impressions
+        FROM unnest(%s::int[], %s::int[], %s::int[]) AS d(store_id, views, impressions)
+        JOIN gerobakku.stores s ON s.store_id = d.store_id
+        ON CONFLICT (store_id, hour) DO UPDATE SET
+            views = store_activity_hourly.views + EXCLUDED.views,
+            impressions = store_activity_hourly.impressions + EXCLUDED.impressions;
+    """
+    try:
+        with get_cursor(commit=True) as cur:
+            cur.execute(sql, (store_ids, views, impressions))
+            return cur.rowcount
+    except Exception as e:
+        print(f"Error adding activity for {len(store_ids)} stores: {e}")
+        raise
+
+
+def get_store_activity(store_id: int, days: int, tz: str) -> List[Dict[str, Any]]:
+    """
+    A store's views, impressions and reviews per day for the last `days`
+    days, where days are calendar days in time zone `tz` rather than the
+    session's (in day order, days without activity are missing).
+    """
+    sql = """
+        SELECT
+            date_trunc('day', hour AT TIME ZONE %(tz)s)::date AS day,
+            sum(views)::int AS views,
+            sum(impressions)::int AS impressions,
+            sum(reviews)::int AS reviews
+        FROM gerobakku.store_activity_hourly
+        WHERE store_id = %(store_id)s
+          AND hour >= (date_trunc('day', now() AT TIME ZONE %(tz)s)
+                       - make_interval(days => %(days)s - 1)) AT TIME ZONE %(tz)s
+        GROUP BY 1
+        ORDER BY 1;
+    """
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(sql, {"store_id": store_id, "days": days, "tz": tz})
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching activity for store {store_id}: {e}")
+        raise
+
+
+def get_ranked_stores(order_by: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Stores from the precomputed ranking table, best first.
+    order_by is 'top' (Bayesian rating) or 'trending'; both read an index.
+    """
+    order = {
+        "top": "rk.bayesian_rating DESC, rk.review_count DESC, rk.store_id",
+        "trending": "rk.trending_score DESC, rk.store_id",
+    }[order_by]
+    sql = """
+        SELECT
+            s.store_id,
+            s.vendor_id,
+            s.name,
+            s.description,
+            s.rating,
+            s.category_id,
+            s.address,
+            s.is_open,
+            s.is_online,
+            s.is_halal,
+            s.open_time,
+            s.close_time,
+            s.created_at,
+            s.store_image_url,
+            s.image_variants,
+            ST_Y(l.location::geometry) AS lat,
+            ST_X(l.location::geometry) AS lon,
+            l.created_at AS location_updated_at,
+            rk.review_count,
+            rk.bayesian_rating,
+            rk.reviews_24h,
+            rk.views_24h,
+            rk.trending_score,
+            rk.refreshed_at
+        FROM (
+            SELECT * FROM gerobakku.store_rankings rk
+            ORDER BY {order}
+            LIMIT %s
+        ) rk
+        JOIN gerobakku.stores s ON s.store_id = rk.store_id
+        LEFT JOIN LATERAL (
+            SELECT location, created_at
+            FROM gerobakku.transactional_store_location
+            WHERE store_id = s.store_id
+            ORDER BY created_at DESC
+            LIMIT 1
+        ) l ON true
+        ORDER BY {order};
+    """.format(order=order)
+    try:
+        with get_cursor(row_factory=point_dict_row()) as cur:
+            cur.execute(sql, (limit,))
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching {order_by} stores: {e}")
+        raise
+
+
+# ===== ONLINE STATUS =====
+
+def sweep_store_online_status(heartbeat_seconds: int, timezone: str) -> List[Dict[str, Any]]:
+    """
+    Recompute is_online for every store in one set-based UPDATE and return
+    only the stores whose status changed, as [{store_id, is_online}].
+
+    A store is online when the vendor has it open (is_open), it sent a
+    location within `heartbeat_seconds`, and the local hour in `timezone` is
+    within open_time..close_time. Ranges that wrap midnight (18 -> 2) are
+    open from open_time to midnight and from midnight to close_time; equal
+    or missing times mean open all day.
+    """
+    sql = """
+        WITH clock AS (
+            SELECT EXTRACT(HOUR FROM now() AT TIME ZONE %(timezone)s)::int AS hour
+        ),
+        status AS (
+            SELECT
+                s.store_id,
+                COALESCE(
+                    s.is_open
+                    AND hb.last_seen > now() - make_interval(secs => %(heartbeat_seconds)s)
+                    AND CASE
+                        WHEN s.open_time IS NULL OR s.close_time IS NULL
+                             OR s.open_time = s.close_time THEN true
+                        WHEN s.open_time < s.close_time
+                             THEN c.hour >= s.open_time AND c.hour < s.close_time
+                        ELSE c.hour >= s.open_time OR c.hour < s.close_time
+                    END,
+                    false
+                ) AS online
+            FROM gerobakku.stores s
+            CROSS JOIN clock c
+            LEFT JOIN LATERAL (
+                SELECT created_at AS last_seen
+                FROM gerobakku.transactional_store_location
+                WHERE store_id = s.store_id
+                ORDER BY created_at DESC
+                LIMIT 1
+            ) hb ON true
+        )
+        UPDATE gerobakku.stores s
+        SET is_online = st.online,
+            online_changed_at = now()
+        FROM status st
+        WHERE s.store_id = st.store_id
+          AND s.is_online IS DISTINCT FROM st.online
+        RETURNING s.store_id, s.is_online;
+    """
+    try:
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
+            cur.execute(sql, {"heartbeat_seconds": heartbeat_seconds, "timezone": timezone})
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error sweeping store online status: {e}")
+        raise
+
+
+def get_store_status_changes(since, lag_seconds: int) -> Dict[str, Any]:
+    """
+    Stores whose online status changed after `since`, oldest change first,
+    plus the `until` cursor that the next poll should pass as `since`.
+
+    online_changed_at is the writing transaction's start time, so a change
+    committed late can carry a timestamp below a cursor that was already
+    handed out. `until` is therefore this statement's clock minus
+    `lag_seconds`, and only changes up to it are returned. Anything newer
+    comes back on the next poll.
+    """
+    try:
+        with get_cursor(row_factory=dict_row) as cur:
+            cur.execute(
+                "SELECT GREATEST(%s, clock_timestamp() - make_interval(secs => %s)) AS until;",
+                (since, lag_seconds),
+            )
+            until = cur.fetchone()['until']
+            cur.execute("""
+                SELECT store_id, is_online, online_changed_at
+                FROM gerobakku.stores
+                WHERE online_changed_at > %s AND online_changed_at <= %s
+                ORDER BY online_changed_at, store_id;
+            """, (since, until))
+            return {"changes": cur.fetchall(), "until": until}
+    except Exception as e:
+        print(f"Error fetching store status changes: {e}")
+        raise
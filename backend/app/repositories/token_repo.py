@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+from ..database import get_cursor, dict_row
+
+
+def insert_refresh_token(user_id: int | str, token_hash: str, expires_at: datetime) -> None:
+    """Store the digest of a newly issued refresh token"""
+    with get_cursor(commit=True) as cur:
+        cur.execute("""
+            INSERT INTO gerobakku.refresh_tokens (user_id, token_hash, expires_at)
+            VALUES (%s, %s, %s)
+        """, (user_id, token_hash, expires_at))
+
+def rotate_refresh_token(old_hash: str, new_hash: str, expires_at: datetime) -> Optional[dict]:
+    """
+    Spend a refresh token and store its replacement in one transaction.
+    Returns the owner's user row (user_id, email, full_name, created_at,
+    is_verified) or None if the token is unknown, expired or already used.
+
+    Presenting an already-rotated token means it leaked, so every live token
+    of that user is revoked and they must log in again.
+    """
+    with get_cursor(commit=True, row_factory=dict_row) as cur:
+        cur.execute("""
+            UPDATE gerobakku.refresh_tokens rt
+            SET revoked_at = NOW()
+            FROM gerobakku.users u
+            WHERE rt.token_hash = %s
+              AND rt.revoked_at IS NULL
+              AND rt.expires_at > NOW()
+              AND u.user_id = rt.user_id
+            RETURNING u.user_id, u.email, u.full_name, u.created_at, u.is_verified
+        """, (old_hash,))
+        user = cur.fetchone()
+
+        if not user:
+            cur.execute("""
+                UPDATE gerobakku.refresh_tokens
+                SET revoked_at = NOW()
+                WHERE revoked_at IS NULL
+                  AND user_id = (
+                      SELECT user_id FROM gerobakku.refresh_tokens
+                      WHERE token_hash = %s AND revoked_at IS NOT NULL
+                  )
+            """, (old_hash,))
+            return None
+
+        cur.execute("""
+            INSERT INTO gerobakku.refresh_tokens (user_id, token_hash, expires_at)
+            VALUES (%s, %s, %s)
+        """, (user['user_id'], new_hash, expires_at))
+
+        return user
+
+def revoke_refresh_token(token_hash: str) -> bool:
+    """Revoke one refresh token (logout). Returns True if it was live."""
+    with get_cursor(commit=True) as cur:
+        cur.execute("""
+            UPDATE gerobakku.refresh_tokens
+            SET revoked_at = NOW()
+            WHERE token_hash = %s AND revoked_at IS NULL
+        """, (token_hash,))
+        return cur.rowcount > 0
+
+def revoke_user_refresh_tokens(user_id: int | str) -> int:
+    """Revoke every live refresh token of a user. Returns how many were revoked."""
+    with get_cursor(commit=True) as cur:
+        cur.execute("""
+            UPDATE gerobakku.refresh_tokens
+            SET revoked_at = NOW()
+            WHERE user_id = %s AND revoked_at IS NULL
+        """, (user_id,))
+        return cur.rowcount
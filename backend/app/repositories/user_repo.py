@@ -76,4 +76,15 @@ def get_user_by_email(email: str) -> Optional[tuple]:
 
 	except Exception as e:
 		print(f"Error fetching user by email {email}: {e}")
-		return None
\ No newline at end of file
+		return None
+
+def update_password_hash(user_id: int | str, password_hash: str) -> bool:
+	"""
+	Replace a user's stored password hash (used to upgrade the bcrypt cost).
+	Returns True if a row was updated.
+	"""
+	sql = "UPDATE gerobakku.users SET password_hash = %s WHERE user_id = %s;"
+
+	with get_cursor(commit=True) as cur:
+		cur.execute(sql, (password_hash, user_id))
+		return cur.rowcount > 0
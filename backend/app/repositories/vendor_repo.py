@@ -1,5 +1,17 @@
+from collections import namedtuple
 from typing import List, Optional, Dict, Any
-from app.database import get_cursor
+from app.database import get_cursor, dict_row, point_dict_row, point_namedtuple_row
+
+# Motion model: speed/heading come from the oldest of the last MOTION_FIXES
+# fixes within MOTION_WINDOW_SECONDS; moves under MOTION_MIN_METERS get no heading
+MOTION_WINDOW_SECONDS = 60
+MOTION_FIXES = 3
+MOTION_MIN_METERS = 3
+
+# One cart in the location feed, for callers that read fields directly
+StoreLocationRow = namedtuple(
+    "StoreLocationRow", ["store_id", "current_location", "location_updated_at", "speed_mps", "heading_deg"]
+)
 
 
 def post_new_vendor(user_id, ktp_image_url: str = '', selfie_image_url: str = '', is_verified: bool = False):
@@ -20,69 +32,115 @@ def post_new_vendor(user_id, ktp_image_url: str = '', selfie_image_url: str = ''
         raise
 
 
-def get_all_stores_with_locations() -> List[Dict[str, Any]]:
+_STORE_LOCATIONS_SQL = """
+    SELECT 
+        s.store_id,
+        ST_Y(tsl.location::geometry) AS lat,
+        ST_X(tsl.location::geometry) AS lon,
+        tsl.created_at AS location_updated_at,
+        -- a cart that stopped reporting is not moving any more
+        CASE WHEN tsl.created_at > now() - make_interval(secs => %s)
+             THEN tsl.speed_mps ELSE 0 END AS speed_mps,
+        tsl.heading_deg
+    FROM gerobakku.stores s
+    LEFT JOIN LATERAL (
+        SELECT location, created_at, speed_mps, heading_deg
+        FROM gerobakku.transactional_store_location
+        WHERE store_id = s.store_id
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) tsl ON true
+    WHERE tsl.location IS NOT NULL {online}
+    ORDER BY s.store_id;
+"""
+
+
+def get_all_stores_with_locations(online_only: bool = False) -> List[Dict[str, Any]]:
     """
     Lightweight function to get only store IDs and current locations.
     Used for polling to reduce data transfer.
+    With online_only, stale/closed carts (is_online = false) are left out.
+    Rows are dicts, ready to validate into StoreLocationUpdate.
     """
-    sql = """
-        SELECT 
-            s.store_id,
-            ST_Y(tsl.location::geometry) AS lat,
-            ST_X(tsl.location::geometry) AS lon,
-            tsl.created_at AS location_updated_at
-        FROM gerobakku.stores s
-        LEFT JOIN LATERAL (
-            SELECT location, created_at
-            FROM gerobakku.transactional_store_location
-            WHERE store_id = s.store_id
-            ORDER BY created_at DESC
-            LIMIT 1
-        ) tsl ON true
-        WHERE tsl.location IS NOT NULL
-        ORDER BY s.store_id;
-    """
+    sql = _STORE_LOCATIONS_SQL.format(online="AND s.is_online" if online_only else "")
     try:
-        with get_cursor() as cur:
-            cur.execute(sql)
-            rows = cur.fetchall()
-            locations = []
-            for row in rows:
-                locations.append({
-                    'store_id': row[0],
-                    'current_location': {
-                        'lat': row[1],
-                        'lon': row[2]
-                    },
-                    'location_updated_at': row[3]
-                })
-            return locations
+        with get_cursor(row_factory=point_dict_row()) as cur:
+            cur.execute(sql, (MOTION_WINDOW_SECONDS,))
+            return cur.fetchall()
     except Exception as e:
         print(f"Error fetching store locations: {e}")
         raise
 
 
+def get_store_location_rows(online_only: bool = False) -> List[StoreLocationRow]:
+    """
+    Same rows as get_all_stores_with_locations, as StoreLocationRow tuples
+    (current_location is a Point). For callers that read the fields
+    themselves instead of building models: no dict per cart.
+    """
+    sql = _STORE_LOCATIONS_SQL.format(online="AND s.is_online" if online_only else "")
+    try:
+        with get_cursor(row_factory=point_namedtuple_row(StoreLocationRow)) as cur:
+            cur.execute(sql, (MOTION_WINDOW_SECONDS,))
+            return cur.fetchall()
+    except Exception as e:
+        print(f"Error fetching store location rows: {e}")
+        raise
+
+
 def insert_store_location(store_id, location):
-    """Insert a new location entry for a store."""
+    """
+    Insert a new location entry for a store.
+    Speed and heading are derived here, from the oldest of the store's last
+    few fixes within MOTION_WINDOW_SECONDS (smooths out GPS jitter).
+    """
     sql = """
+        WITH new_fix AS (
+            SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography AS location,
+                   now() AS created_at
+        ),
+        recent AS (
+            SELECT location, created_at
+            FROM gerobakku.transactional_store_location
+            WHERE store_id = %(store_id)s
+              AND created_at > now() - make_interval(secs => %(window)s)
+              AND created_at < now()
+            ORDER BY created_at DESC
+            LIMIT %(fixes)s
+        ),
+        anchor AS (
+            SELECT location, created_at FROM recent ORDER BY created_at LIMIT 1
+        )
         INSERT INTO gerobakku.transactional_store_location
-        (store_id, location)
-        VALUES (%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography)
-        RETURNING location_id, store_id, created_at, ST_AsText(location) AS location_point;
+        (store_id, location, created_at, speed_mps, heading_deg)
+        SELECT
+            %(store_id)s,
+            n.location,
+            n.created_at,
+            COALESCE(
+                ST_Distance(a.location, n.location)
+                    / NULLIF(EXTRACT(EPOCH FROM n.created_at - a.created_at), 0),
+                0
+            ),
+            CASE WHEN ST_Distance(a.location, n.location) >= %(min_move)s
+                 THEN degrees(ST_Azimuth(a.location, n.location)) END
+        FROM new_fix n
+        LEFT JOIN anchor a ON true
+        RETURNING location_id, store_id, created_at, ST_AsText(location) AS location_point,
+                  speed_mps, heading_deg;
     """
-    lon, lat = location['lon'], location['lat']
+    params = {
+        "store_id": store_id,
+        "lon": location['lon'],
+        "lat": location['lat'],
+        "window": MOTION_WINDOW_SECONDS,
+        "fixes": MOTION_FIXES,
+        "min_move": MOTION_MIN_METERS,
+    }
     try:
-        with get_cursor(commit=True) as cur:
-            cur.execute(sql, (store_id, lon, lat), prepare=False)
-            row = cur.fetchone()
-            if not row:
-                return None
-            return {
-                "location_id": row[0],
-                "store_id": row[1],
-                "created_at": row[2],
-                "location_point": row[3]
-            }
+        with get_cursor(commit=True, row_factory=dict_row) as cur:
+            cur.execute(sql, params, prepare=False)
+            return cur.fetchone()
     except Exception as e:
         print(f"Error inserting store location: {e}")
         raise
@@ -98,36 +156,20 @@ def get_store_locations(store_id):
     LIMIT 1;
     """
     try:
-        with get_cursor() as cur:
+        with get_cursor(row_factory=dict_row) as cur:
             cur.execute(sql, (store_id,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            return {
-                "location_id": row[0],
-                "store_id": row[1],
-                "created_at": row[2],
-                "location_point": row[3]
-            }
+            return cur.fetchone()
     except Exception as e:
         print(f"Error fetching store location: {e}")
         raise
 
 def get_vendor_by_user_id(user_id: int) -> dict:
     """Get vendor by user_id"""
-    with get_cursor() as cur:
+    with get_cursor(row_factory=dict_row) as cur:
         cur.execute("""
             SELECT vendor_id, user_id, is_verified
             FROM gerobakku.vendors
             WHERE user_id = %s
         """, (user_id,))
         
-        row = cur.fetchone()
-        if not row:
-            return None
-        
-        return {
-            'vendor_id': row[0],
-            'user_id': row[1],
-            'is_verified': row[2]
-        }
+        return cur.fetchone()
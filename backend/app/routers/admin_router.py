@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from app.security import get_current_admin
+from app.schemas.user_schema import User
+from app.storage import private_blob_store
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+# Served at VENDOR_DOCUMENT_URL_PREFIX, the URL prefix of private_blob_store
+@router.get("/vendor-documents/{key:path}", response_class=FileResponse)
+async def get_vendor_document(
+    key: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Download a vendor's KTP or selfie image for verification.
+    Admin only; the response must not be cached by browsers or proxies.
+    """
+    try:
+        path = private_blob_store.local_path(key)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    if not path.is_file() or path.suffix == ".refs":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    return FileResponse(path, headers={"Cache-Control": "private, no-store"})
@@ -1,24 +1,35 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
+from starlette.concurrency import run_in_threadpool
 from ..services.auth_service import (
     service_register,
     service_verify_email,
-    service_login
+    service_login,
+    service_refresh,
+    service_logout
 )
 from ..schemas.auth_schema import (
     RegisterRequest,
     VerifyEmailRequest,
     LoginRequest,
-    LoginResponse
+    LoginResponse,
+    RefreshTokenRequest
 )
 from ..schemas.user_schema import User
 from ..security import get_current_user
+from ..rate_limit import client_ip, enforce_login_rate_limit, enforce_register_rate_limit
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Register and login send their bcrypt calls to the bounded password pool
+# (see auth_service) instead of blocking the event loop. Rate limits are
+# checked first, so rejected attempts cost no hashing or DB work.
+
 # User registration, /auth/register
 @router.post("/register", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
-async def register(body: RegisterRequest):
-    response = service_register(
+async def register(body: RegisterRequest, request: Request):
+    await enforce_register_rate_limit(client_ip(request), body.email)
+
+    response = await service_register(
         email=body.email,
         password=body.password,
         full_name=body.full_name
@@ -34,14 +45,28 @@ async def verify_email(body: VerifyEmailRequest):
 
 # User login, /auth/login
 @router.post("/login", response_model=LoginResponse, status_code=status.HTTP_200_OK)
-async def login(body: LoginRequest):
-    response = service_login(
+async def login(body: LoginRequest, request: Request):
+    await enforce_login_rate_limit(client_ip(request), body.email)
+
+    response = await service_login(
         email=body.email,
         password=body.password
     )
 
     return response
 
+# Exchange a refresh token for new tokens, /auth/refresh
+@router.post("/refresh", response_model=LoginResponse, status_code=status.HTTP_200_OK)
+async def refresh(body: RefreshTokenRequest):
+    # Token rotation is a DB round trip; keep it off the event loop
+    return await run_in_threadpool(service_refresh, refresh_token=body.refresh_token)
+
+# Revoke a refresh token, /auth/logout
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(body: RefreshTokenRequest):
+    await run_in_threadpool(service_logout, refresh_token=body.refresh_token)
+    return {"detail": "Logged out successfully."}
+
 # Get current authenticated user, /auth/me
 @router.get("/me", response_model=User, status_code=status.HTTP_200_OK)
 async def get_me(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal
+from app.services import maps_service
+from app.schemas.maps_schema import NearestVendorResponse, RouteResponse
+
+router = APIRouter(tags=["maps"])
+
+
+@router.get("/route", response_model=RouteResponse, status_code=status.HTTP_200_OK)
+async def get_route(
+    from_point: str = Query(..., alias="from", description="Start as 'lat,lon'"),
+    to_point: str = Query(..., alias="to", description="Destination as 'lat,lon'"),
+    mode: Literal["driving", "walking"] = "driving",
+):
+    """
+    Fastest route between two points, from the local road graph.
+    Repeated routes between the same road nodes are served from cache.
+    Public endpoint - no authentication required.
+    """
+    try:
+        from_lat, from_lon = maps_service.parse_lat_lon(from_point)
+        to_lat, to_lon = maps_service.parse_lat_lon(to_point)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # A* is CPU work; keep it off the event loop
+    route = await run_in_threadpool(maps_service.get_route, from_lat, from_lon, to_lat, to_lon, mode)
+    if route is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No route found between these points"
+        )
+    return route
+
+
+@router.get("/nearest-vendors", response_model=List[NearestVendorResponse], status_code=status.HTTP_200_OK)
+async def get_nearest_vendors(
+    from_point: str = Query(..., alias="from", description="User location as 'lat,lon'"),
+    k: int = Query(10, ge=1, le=50),
+    mode: Literal["walking", "driving"] = "walking",
+):
+    """
+    The k carts with the shortest real ETA from the user, nearest first.
+    One graph search per request; results are cached briefly per ~110 m cell.
+    Public endpoint - no authentication required.
+    """
+    try:
+        lat, lon = maps_service.parse_lat_lon(from_point)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    try:
+        return await run_in_threadpool(maps_service.get_nearest_vendors, lat, lon, k, mode)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to rank vendors: {str(e)}"
+        )
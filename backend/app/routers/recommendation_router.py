@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from app.services import recommendation_service
+from app.activity import store_activity
+from app.security import get_optional_user
+from app.schemas.recommendation_schema import RecommendedStore
+from app.schemas.user_schema import User
+
+router = APIRouter(tags=["recommendations"])
+
+
+@router.get("/recommendations", response_model=List[RecommendedStore], status_code=status.HTTP_200_OK)
+async def get_recommendations(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    k: int = Query(10, ge=1, le=50),
+    exclude: List[int] = Query([], description="Store IDs already shown elsewhere"),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Top-k stores for "Stalls You May Like", ranked by distance, rating,
+    review volume, category affinity and open status.
+    Public endpoint - with a bearer token, results are personalized by the
+    user's favorite and reviewed categories.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lat and lon must be given together"
+        )
+
+    try:
+        user_id = current_user.user_id if current_user else None
+        stores = recommendation_service.get_recommendations(lat, lon, user_id, k, exclude)
+        store_activity.record_impressions(s.store_id for s in stores)
+        return stores
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch recommendations: {str(e)}"
+        )
@@ -7,6 +7,7 @@ from app.schemas.review_schema import (
 )
 from app.services import review_service
 from app.security import get_current_user
+from app.serialization import validate_rows, render_models
 from app.schemas.user_schema import User
 
 
@@ -58,7 +59,7 @@ async def get_store_reviews(store_id: int):
     """
     try:
         reviews = review_service.get_store_reviews(store_id)
-        return [ReviewResponse(**review) for review in reviews]
+        return render_models(ReviewResponse, validate_rows(ReviewResponse, reviews))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
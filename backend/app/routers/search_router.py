@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+from app.services import search_service
+from app.activity import store_activity
+from app.schemas.search_schema import SearchResult, Suggestion
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search", response_model=List[SearchResult], status_code=status.HTTP_200_OK)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100, description="Store or dish, e.g. 'bakso urat'"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    limit: int = Query(20, ge=1, le=50),
+    online_only: bool = Query(False, description="Only stores currently online"),
+):
+    """
+    Search stores by name, description, address and menu items.
+    Tolerates typos and old spellings; pass lat/lon to rank nearer stores higher.
+    Public endpoint - no authentication required.
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lat and lon must be given together"
+        )
+
+    try:
+        results = search_service.search_stores(q, lat, lon, limit, online_only)
+        store_activity.record_impressions(r.store_id for r in results)
+        return results
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search stores: {str(e)}"
+        )
+
+
+@router.get("/search/suggest", response_model=List[Suggestion], status_code=status.HTTP_200_OK)
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=20),
+):
+    """
+    Store and dish name completions, served from memory (no database query).
+    Public endpoint - no authentication required.
+    """
+    return search_service.suggest(prefix, limit)
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Response, Query
+from datetime import datetime
+from typing import Annotated, List
 from app.services import store_service
 from app.schemas.store_schema import (
     StoreResponse, StoreWithMenuResponse, MenuItemResponse,
     StoreCreate, StoreUpdate, StoreHoursUpdate,
     StoreOpenStatusUpdate, StoreHalalStatusUpdate,
-    MenuItemCreate, MenuItemUpdate
+    MenuItemCreate, MenuItemUpdate,
+    StoreBatchGetRequest, StoreBatchGetResponse, StoreStatusChangesResponse,
+    StoreFilters, StoreFacetsResponse, RankedStore
 )
 from app.security import get_current_user
+from app.activity import store_activity
+from app.serialization import render_models
 from app.schemas.user_schema import User
 
 router = APIRouter(prefix="/stores", tags=["stores"])
@@ -16,14 +21,98 @@ router = APIRouter(prefix="/stores", tags=["stores"])
 # ===== PUBLIC ENDPOINTS =====
 
 @router.get("", response_model=List[StoreResponse], status_code=status.HTTP_200_OK)
-async def get_all_stores():
+async def get_all_stores(filters: Annotated[StoreFilters, Query()]):
     """
     Get all stores with their current locations (for map display).
+    Filter with ?online_only=, ?category_id=, ?is_halal=, ?is_open= and ?min_rating=.
     Public endpoint - no authentication required.
     """
     try:
-        stores = store_service.get_all_stores_with_locations()
-        return stores
+        stores = store_service.get_all_stores_with_locations(filters)
+        # Models are already validated; skip FastAPI's second pass
+        return render_models(StoreResponse, stores)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch stores: {str(e)}"
+        )
+
+
+@router.get("/facets", response_model=StoreFacetsResponse, status_code=status.HTTP_200_OK)
+async def get_store_facets(filters: Annotated[StoreFilters, Query()]):
+    """
+    Store counts per category, halal, open and minimum rating for the given filters.
+    Each facet's counts leave out its own filter, so the UI can show every option.
+    Public endpoint - no authentication required.
+    """
+    try:
+        return store_service.get_store_facets(filters)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch store facets: {str(e)}"
+        )
+
+
+@router.get("/top", response_model=List[RankedStore], status_code=status.HTTP_200_OK)
+async def get_top_stores(limit: int = Query(20, ge=1, le=100)):
+    """
+    Top-rated stores by Bayesian-adjusted rating, from the precomputed rankings.
+    Public endpoint - no authentication required.
+    """
+    try:
+        stores = store_service.get_top_stores(limit)
+        store_activity.record_impressions(s.store_id for s in stores)
+        return render_models(RankedStore, stores)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch top stores: {str(e)}"
+        )
+
+
+@router.get("/trending", response_model=List[RankedStore], status_code=status.HTTP_200_OK)
+async def get_trending_stores(limit: int = Query(20, ge=1, le=100)):
+    """
+    Stores trending over the last 24 hours, from the precomputed rankings.
+    Public endpoint - no authentication required.
+    """
+    try:
+        stores = store_service.get_trending_stores(limit)
+        store_activity.record_impressions(s.store_id for s in stores)
+        return render_models(RankedStore, stores)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch trending stores: {str(e)}"
+        )
+
+
+@router.get("/status/changes", response_model=StoreStatusChangesResponse, status_code=status.HTTP_200_OK)
+async def get_store_status_changes(since: datetime):
+    """
+    Stores that went online or offline after `since` (ISO timestamp).
+    Poll with the returned `until` to get only new changes.
+    Public endpoint - no authentication required.
+    """
+    try:
+        return store_service.get_status_changes(since)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch status changes: {str(e)}"
+        )
+
+
+@router.post(":batchGet", response_model=StoreBatchGetResponse, status_code=status.HTTP_200_OK)
+async def batch_get_stores(body: StoreBatchGetRequest):
+    """
+    Get several stores in one request, optionally with menu, review summary and location.
+    Replaces one /stores/{id}, /menu, /reviews/stats call per store.
+    Public endpoint - no authentication required.
+    """
+    try:
+        return store_service.get_stores_batch(body)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -38,12 +127,23 @@ async def get_store_details(store_id: int):
     Public endpoint - no authentication required.
     """
     try:
+        if store_service.STORE_DETAIL_DB_JSON:
+            body = store_service.get_store_details_json(store_id)
+            if body is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Store {store_id} not found"
+                )
+            store_activity.record_view(store_id)
+            return Response(content=body, media_type="application/json")
+
         store = store_service.get_store_details(store_id)
         if not store:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Store {store_id} not found"
             )
+        store_activity.record_view(store_id)
         return store
     except HTTPException:
         raise
@@ -62,7 +162,7 @@ async def get_store_menu(store_id: int):
     """
     try:
         menu = store_service.get_store_menu_items(store_id)
-        return menu
+        return render_models(MenuItemResponse, menu)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,24 +1,76 @@
-from fastapi import APIRouter, status, HTTPException, UploadFile, File, Depends
-from typing import List, Optional
+from fastapi import APIRouter, status, HTTPException, UploadFile, File, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
+from typing import List, Literal, Optional, Union
 import asyncio
-from app.services.vendor_service import simulate_movement
+import msgpack
+from app.services.vendor_service import simulate_movement, build_location_columns, suggest_poll_interval
 from app.repositories import vendor_repo
 from app.security import get_current_user
+from app.serialization import validate_rows, render_models, preferred_media_type
 from app.schemas.user_schema import User
-from app.schemas.vendor_schema import StoreLocationUpdate, VendorStoreRegistrationForm, VendorStoreRegistrationResponse
+from app.schemas.vendor_schema import (
+    StoreLocationColumns, StoreLocationUpdate, VendorStoreRegistrationForm, VendorStoreRegistrationResponse
+)
+from app.schemas.store_schema import StoreActivityStats
+from app.services.store_service import get_store_activity_stats
 
 router = APIRouter(prefix="/vendor", tags=["vendor"])
 
 
-@router.get("/locations", response_model=List[StoreLocationUpdate], status_code=status.HTTP_200_OK)
-async def get_all_vendor_locations():
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+POLL_INTERVAL_HEADER = "X-Poll-Interval"
+
+
+@router.get(
+    "/locations",
+    # JSON is one object per store, or StoreLocationColumns with ?format=columnar
+    response_model=Union[List[StoreLocationUpdate], StoreLocationColumns],
+    responses={
+        200: {
+            "description": "Store locations; StoreLocationColumns as MessagePack for ?format=msgpack",
+            "content": {
+                MSGPACK_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/StoreLocationColumns"}}
+            },
+        }
+    },
+    status_code=status.HTTP_200_OK
+)
+async def get_all_vendor_locations(
+    request: Request,
+    encoding: Literal["json", "columnar", "msgpack"] = Query("json", alias="format"),
+    online_only: bool = Query(False, description="Leave out stale and closed carts"),
+):
     """
     Lightweight endpoint that returns only store IDs and current locations.
     Used for efficient polling without fetching full store data.
+
+    `?format=columnar` returns {store_ids, lats, lons, ts, speeds, headings}
+    (see StoreLocationColumns) instead of one object per store. `?format=msgpack`,
+    or an `Accept: application/msgpack` header, returns the same columns as MessagePack.
+
+    The X-Poll-Interval header suggests when to poll next (3-30 s, depending
+    on how many carts are moving).
     """
+    accept = request.headers.get("accept")
+    if encoding == "json" and preferred_media_type(accept, ("application/json", MSGPACK_MEDIA_TYPE)) == MSGPACK_MEDIA_TYPE:
+        encoding = "msgpack"
+
     try:
-        locations = vendor_repo.get_all_stores_with_locations()
-        return locations
+        if encoding == "json":
+            locations = validate_rows(
+                StoreLocationUpdate, vendor_repo.get_all_stores_with_locations(online_only=online_only)
+            )
+            response = render_models(StoreLocationUpdate, locations)
+        else:
+            # Columns are read straight off the rows; no dict or model per cart
+            locations = vendor_repo.get_store_location_rows(online_only=online_only)
+            columns = build_location_columns(locations)
+            if encoding == "msgpack":
+                response = Response(content=msgpack.packb(columns), media_type=MSGPACK_MEDIA_TYPE)
+            else:
+                response = JSONResponse(content=columns)
+        response.headers[POLL_INTERVAL_HEADER] = str(suggest_poll_interval(locations))
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -104,3 +156,31 @@ async def get_my_store(current_user: User = Depends(get_current_user)):
         return {"store_id": store['store_id']}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/my-store/stats", response_model=StoreActivityStats, status_code=status.HTTP_200_OK)
+async def get_my_store_stats(
+    days: int = Query(7, ge=1, le=8),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Daily detail views, impressions and reviews of the current vendor's store.
+    Counts are flushed from memory every few seconds, so the latest may lag slightly.
+    """
+    from app.repositories.vendor_repo import get_vendor_by_user_id
+    from app.repositories.store_repo import get_store_by_vendor_id
+
+    try:
+        vendor = get_vendor_by_user_id(int(current_user.user_id))
+        if not vendor:
+            raise HTTPException(status_code=404, detail="Vendor not found")
+
+        store = get_store_by_vendor_id(vendor['vendor_id'])
+        if not store:
+            raise HTTPException(status_code=404, detail="Store not found")
+
+        return get_store_activity_stats(store['store_id'], days)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -13,7 +13,12 @@ class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
-    user: User
\ No newline at end of file
+    expires_in: int  # access token lifetime in seconds
+    user: User
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class RouteResponse(BaseModel):
+    """Driving route between two points (same shape as the frontend's RouteResponse)"""
+    coordinates: List[List[float]]  # [lon, lat] pairs
+    distance: float  # meters
+    duration: float  # seconds
+
+
+class NearestVendorResponse(BaseModel):
+    """A cart ranked by travel time from the user"""
+    store_id: int
+    distance: float  # meters along the road network
+    duration: float  # seconds
@@ -0,0 +1,9 @@
+from typing import Optional
+from app.schemas.store_schema import StoreResponse
+
+
+class RecommendedStore(StoreResponse):
+    """A store picked for the user, with its ranking score"""
+    score: float
+    review_count: int = 0
+    distance_m: Optional[float] = None  # straight line from ?lat=&lon=, when given
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from app.schemas.store_schema import StoreResponse
+
+
+class MenuItemMatch(BaseModel):
+    """A menu item that matched the search query"""
+    item_id: int
+    name: str
+    price: float
+
+
+class SearchResult(StoreResponse):
+    """A store matching the search, with why and how well it matched"""
+    distance_m: Optional[float] = None  # straight line from ?lat=&lon=, when given
+    text_score: float
+    score: float  # text_score discounted by distance
+    matched_items: List[MenuItemMatch] = []
+
+
+class Suggestion(BaseModel):
+    """An autocomplete entry: a store, or a dish (with one store selling it)"""
+    kind: Literal["store", "menu_item"]
+    id: int
+    store_id: int
+    name: str
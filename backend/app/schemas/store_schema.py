@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List, Set, Literal
+from datetime import date, datetime
+from app.schemas.review_schema import ReviewStatsResponse
 
 
 # ----- Location Schemas -----
@@ -49,6 +50,8 @@ class MenuItemResponse(MenuItemBase):
     item_id: int
     store_id: int
     created_at: datetime
+    # Smaller WebP copies of menu_image_url ("thumb", "card", "webp"), once rendered
+    image_variants: Optional[Dict[str, str]] = None
 
     class Config:
         from_attributes = True
@@ -107,9 +110,13 @@ class StoreResponse(StoreBase):
     vendor_id: int
     rating: float
     is_open: bool
+    # Open, recently reporting its location and within opening hours (kept by the status sweeper)
+    is_online: bool = False
     created_at: datetime
     current_location: Optional[LocationPoint] = None
     location_updated_at: Optional[datetime] = None
+    # Smaller WebP copies of store_image_url ("thumb", "card", "webp"), once rendered
+    image_variants: Optional[Dict[str, str]] = None
 
     class Config:
         from_attributes = True
@@ -117,4 +124,112 @@ class StoreResponse(StoreBase):
 
 class StoreWithMenuResponse(StoreResponse):
     """Store response including menu items"""
-    menu: list[MenuItemResponse] = []
\ No newline at end of file
+    menu: list[MenuItemResponse] = []
+
+
+# ----- Filter & Facet Schemas -----
+
+class StoreFilters(BaseModel):
+    """Query filters for GET /stores and GET /stores/facets (unset = any)"""
+    online_only: bool = False
+    category_id: Optional[int] = None
+    is_halal: Optional[bool] = None
+    is_open: Optional[bool] = None
+    min_rating: Optional[float] = Field(None, ge=0, le=5)
+
+
+class CategoryFacetCount(BaseModel):
+    """Stores in one category (with the other filters applied)"""
+    category_id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+
+class BooleanFacetCount(BaseModel):
+    """Stores with a yes/no field set to `value` (with the other filters applied)"""
+    value: bool
+    count: int
+
+
+class RatingFacetCount(BaseModel):
+    """Stores rated at least `min_rating` stars (with the other filters applied)"""
+    min_rating: int
+    count: int
+
+
+class StoreFacetsResponse(BaseModel):
+    """Counts for a filter UI; `total` is the number of stores matching every filter"""
+    total: int
+    categories: List[CategoryFacetCount]
+    is_halal: List[BooleanFacetCount]
+    is_open: List[BooleanFacetCount]
+    min_rating: List[RatingFacetCount]
+
+
+# ----- Ranking Schemas -----
+
+class RankedStore(StoreResponse):
+    """A store from the precomputed rankings (GET /stores/top, /stores/trending)"""
+    review_count: int
+    bayesian_rating: float  # rating pulled towards the global mean when reviews are few
+    reviews_24h: int
+    views_24h: int
+    trending_score: float
+    refreshed_at: datetime
+
+
+# ----- Activity Schemas -----
+
+class StoreActivityDay(BaseModel):
+    """One day of a store's traffic"""
+    day: date
+    views: int  # detail page opens (GET /stores/{id})
+    impressions: int  # times shown in search, recommendations or rankings
+    reviews: int
+
+
+class StoreActivityStats(BaseModel):
+    """Vendor dashboard traffic; counts may lag by a few seconds (flushed in bulk)"""
+    store_id: int
+    views: int
+    impressions: int
+    reviews: int
+    days: List[StoreActivityDay]  # oldest first, one entry per day
+
+
+# ----- Batch Schemas -----
+
+StoreBatchInclude = Literal["menu", "reviews_summary", "location"]
+
+
+class StoreBatchGetRequest(BaseModel):
+    """Request body for fetching several stores in one call"""
+    store_ids: List[int] = Field(..., min_length=1, max_length=100)
+    include: Set[StoreBatchInclude] = set()
+
+
+class StoreBatchItem(StoreResponse):
+    """Store entry of a batch response; optional parts are only set when included"""
+    menu: Optional[list[MenuItemResponse]] = None
+    reviews_summary: Optional[ReviewStatsResponse] = None
+
+
+class StoreBatchGetResponse(BaseModel):
+    """Batch response, in the same order as the requested IDs"""
+    stores: list[StoreBatchItem]
+    not_found: list[int] = []
+
+
+# ----- Online Status Schemas -----
+
+class StoreStatusChange(BaseModel):
+    """A store that went online or offline"""
+    store_id: int
+    is_online: bool
+    changed_at: datetime
+
+
+class StoreStatusChangesResponse(BaseModel):
+    """Status changes after `since`; pass `until` as the next `since`"""
+    changes: List[StoreStatusChange]
+    until: datetime
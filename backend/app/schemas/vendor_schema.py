@@ -13,6 +13,17 @@ class StoreLocationUpdate(BaseModel):
     store_id: int
     current_location: LocationPoint
     location_updated_at: datetime
+    speed_mps: float = 0.0  # 0 when parked or no recent fix
+    heading_deg: Optional[float] = None  # bearing of travel, 0 = north, 90 = east
+
+class StoreLocationColumns(BaseModel):
+    """Compact column-oriented location feed (one list per field, same order)"""
+    store_ids: List[int]
+    lats: List[float]
+    lons: List[float]
+    ts: List[int]  # location_updated_at as Unix seconds
+    speeds: List[float]  # speed_mps
+    headings: List[Optional[float]]  # heading_deg
 
 class VendorBase(BaseModel):
     """Base vendor/seller fields"""
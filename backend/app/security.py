@@ -1,20 +1,61 @@
+import hashlib
+import math
 import os
-from datetime import datetime, timedelta
+import secrets
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from cachetools import TLRUCache
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from .repositories.user_repo import get_user_by_id
+from .repositories.user_repo import get_user_by_id, update_password_hash
 from .schemas.user_schema import User
+from .worker_pool import BoundedWorkerPool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt cost is picked at startup to hit a target verify time on this machine,
+# unless BCRYPT_ROUNDS pins it. Each extra round doubles the cost.
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS", "250"))
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 15
+
 JWT_SECRET = os.getenv("JWT_SECRET", "DEFAULT JWT KEY")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 2 # 2 hours
+# Access tokens are checked without the DB, so keep them short: a deleted or
+# changed user is picked up at the next refresh, within this window.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 EMAIL_TOKEN_EXPIRE_MINUTES = 60 * 24 # 1 day
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# Same scheme for public routes that personalize when a token is sent
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+# bcrypt takes ~250 ms per call, so hashing/verifying runs in its own bounded
+# pool instead of on the event loop. bcrypt releases the GIL, so threads suffice.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+password_hash_pool = BoundedWorkerPool("password-hash", PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+# Stores upgraded hashes, so the DB write never occupies a bcrypt worker
+password_rehash_save_pool = BoundedWorkerPool("password-rehash-save", 1, max_queue=0)
+
+# Decoded-token cache: verified claims keyed by token digest, each kept until its own exp
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+def _claims_expiry(_key, claims: dict, _now: float) -> float:
+    return float(claims.get("exp", 0))
+
+def _epoch_now() -> float:
+    # time.time is looked up on each call (keeps it patchable in tests)
+    return time.time()
+
+_token_cache: TLRUCache = TLRUCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttu=_claims_expiry, timer=_epoch_now)
+_token_cache_lock = Lock()
 
 # Password helpers
 def hash_password(plaintxt: str) -> str:
@@ -23,6 +64,66 @@ def hash_password(plaintxt: str) -> str:
 def verify_password(plaintxt: str, hashed: str) -> bool:
     return pwd_context.verify(plaintxt, hashed)
 
+def needs_rehash(hashed: str) -> bool:
+    """True if the stored hash uses a weaker cost (or scheme) than the current policy."""
+    try:
+        return pwd_context.needs_update(hashed)
+    except (ValueError, TypeError):
+        # Malformed or unknown hash; leave it alone
+        return False
+
+def _store_rehash(user_id: int | str, future: Future) -> None:
+    """Save a finished background hash. Runs in password_rehash_save_pool."""
+    try:
+        update_password_hash(user_id, future.result())
+    except Exception as e:
+        print(f"Password rehash failed for user {user_id}: {e}")
+
+def schedule_password_rehash(user_id: int | str, plaintxt: str) -> None:
+    """
+    Upgrade a user's stored hash in the background after a successful login:
+    bcrypt in password_hash_pool, then the DB write in password_rehash_save_pool.
+    """
+    def _on_done(future: Future) -> None:
+        if future.cancelled():
+            return
+        try:
+            password_rehash_save_pool.submit_background(_store_rehash, user_id, future)
+        except Exception as e:
+            print(f"Password rehash failed for user {user_id}: {e}")
+
+    password_hash_pool.submit_background(hash_password, plaintxt).add_done_callback(_on_done)
+
+def rounds_for_target(measured_ms: float, measured_rounds: int, target_ms: float,
+                      min_rounds: int = BCRYPT_MIN_ROUNDS, max_rounds: int = BCRYPT_MAX_ROUNDS) -> int:
+    """
+    Highest bcrypt cost whose predicted verify time stays within target_ms,
+    given one measurement at measured_rounds. Clamped to [min_rounds, max_rounds].
+    """
+    if measured_ms <= 0 or target_ms <= 0:
+        return min_rounds
+    rounds = measured_rounds + math.floor(math.log2(target_ms / measured_ms))
+    return max(min_rounds, min(max_rounds, rounds))
+
+def calibrate_password_hashing(target_ms: float = PASSWORD_HASH_TARGET_MS) -> int:
+    """
+    Set the bcrypt cost used for new hashes (call once at startup).
+    Stored hashes below that cost are flagged by needs_rehash() and upgraded on login.
+    """
+    if BCRYPT_ROUNDS:
+        rounds = int(BCRYPT_ROUNDS)
+    else:
+        probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_MIN_ROUNDS)
+        sample = probe.hash("calibration")
+        start = time.perf_counter()
+        probe.verify("calibration", sample)
+        measured_ms = (time.perf_counter() - start) * 1000
+        rounds = rounds_for_target(measured_ms, BCRYPT_MIN_ROUNDS, target_ms)
+
+    # min_rounds only: weaker hashes get upgraded, stronger ones are never downgraded
+    pwd_context.update(bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+    return rounds
+
 # JWT helpers
 def _make_token(data: dict, minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
     to_encode = data.copy()
@@ -42,6 +143,23 @@ def create_access_token(user_id: int | str, email: str) -> str:
         ACCESS_TOKEN_EXPIRE_MINUTES
     )
 
+def create_user_access_token(user: User) -> str:
+    """
+    Access token carrying everything User needs, so get_current_user can
+    rebuild the user from the claims without touching the DB
+    """
+    return _make_token(
+        {
+            "sub": str(user.user_id),
+            "email": user.email,
+            "name": user.full_name,
+            "created_at": user.created_at.isoformat(),
+            "verified": user.is_verified,
+            "type": "access",
+        },
+        ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+
 def create_email_token(user_id: int | str, email: str) -> str:
     """
     Token sent in email verification link
@@ -56,16 +174,73 @@ def create_email_token(user_id: int | str, email: str) -> str:
     )
 
 def decode_token(token: str) -> dict:
+    """
+    Verify a token and return its claims.
+    Verified claims are cached until the token's exp, so repeat requests with
+    the same token skip the signature check. Only valid tokens are cached.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    with _token_cache_lock:
+        claims = _token_cache.get(key)
+    if claims is not None:
+        return dict(claims)
+
     try:
-        print("token recieved:", token)
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-    except JWTError as e:
-        print("JWT Error:", e)
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token, please login again."
         )
 
+    if "exp" in claims:
+        with _token_cache_lock:
+            _token_cache[key] = claims
+    return dict(claims)
+
+def clear_token_cache() -> None:
+    with _token_cache_lock:
+        _token_cache.clear()
+
+# Refresh tokens are opaque random strings; only their sha256 digest is stored
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def generate_refresh_token() -> tuple[str, str, datetime]:
+    """Return (token for the client, digest to store, expiry)"""
+    token = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    return token, hash_refresh_token(token), expires_at
+
+# User helpers
+def _user_from_claims(payload: dict) -> User | None:
+    """Build the User from a create_user_access_token payload, None for older tokens"""
+    if "name" not in payload or "created_at" not in payload:
+        return None
+
+    uid = payload["sub"]
+    return User(
+        user_id=int(uid) if uid.isdigit() else uid,  # DB ids are ints, JWT sub is a string
+        email=payload["email"],
+        full_name=payload["name"],
+        created_at=datetime.fromisoformat(payload["created_at"]),
+        is_verified=payload.get("verified", False)
+    )
+
+def _load_user(user_id: str) -> User | None:
+    """Read the User for this id from the DB (tokens without user claims only)."""
+    row = get_user_by_id(user_id)
+    if not row:
+        return None
+
+    return User(
+        user_id=row[0],
+        email=row[1],
+        full_name=row[3],
+        created_at=row[4],
+        is_verified=row[5]
+    )
+
 # FastAPI dependency for authenticated routes
 def get_current_user(token: str = Depends(oauth2_scheme)) -> User: 
     payload = decode_token(token)
@@ -83,17 +258,33 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             detail="Invalid token payload."
         )
     
-    row = get_user_by_id(uid)
-    if not row:
+    # Current tokens carry the user; tokens issued before that still need a lookup
+    user = _user_from_claims(payload) or _load_user(str(uid))
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found."
         )
 
-    return User(
-        user_id=row[0],
-        email=row[1],
-        full_name=row[3],
-        created_at=row[4],
-        is_verified=row[5]
-    )
\ No newline at end of file
+    return user
+def get_optional_user(token: str | None = Depends(optional_oauth2_scheme)) -> User | None:
+    """
+    The signed-in user on a public route, or None without an Authorization header.
+    A token that is sent but invalid still gets a 401, so clients refresh it.
+    """
+    if not token:
+        return None
+    return get_current_user(token)
+
+# Staff accounts: comma-separated emails allowed on the /admin routes
+ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+)
+
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required."
+        )
+    return current_user
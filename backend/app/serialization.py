@@ -0,0 +1,87 @@
+"""
+Fast-path JSON responses.
+
+FastAPI validates and serializes a route's return value against its
+`response_model`, even when the service already built those models. Routes
+that return large lists can instead validate the rows once through a
+TypeAdapter and hand back the bytes pydantic-core rendered, which FastAPI
+passes through untouched. `response_model` stays on the route for the docs.
+
+Also holds the Accept-header negotiation for routes offering more than one
+encoding (JSON or MessagePack).
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class PrerenderedJSONResponse(Response):
+    """JSON response whose body has already been rendered to bytes."""
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: type) -> TypeAdapter:
+    """Shared TypeAdapter for List[model] (building one is not free)."""
+    return TypeAdapter(List[model])
+
+
+def validate_rows(model: type, rows: List[dict]) -> list:
+    """
+    Validate trusted DB rows into models with a single pydantic-core call,
+    instead of one Model(**row) call per row.
+    """
+    return list_adapter(model).validate_python(rows)
+
+
+def render_models(model: type, items: List[Any], status_code: int = 200) -> PrerenderedJSONResponse:
+    """Serialize a list of already-built models straight to JSON bytes."""
+    return PrerenderedJSONResponse(
+        content=list_adapter(model).dump_json(items),
+        status_code=status_code
+    )
+
+
+def _media_range_quality(media_type: str, accept: Optional[str]) -> float:
+    """q-value the Accept header gives media_type; the most specific range wins."""
+    best_specificity, best_q = -1, 0.0
+    main_type = media_type.split("/", 1)[0]
+    for entry in accept.split(","):
+        media_range, *params = (part.strip() for part in entry.split(";"))
+        media_range = media_range.lower()
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{main_type}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if specificity > best_specificity:
+            best_specificity, best_q = specificity, q
+    return best_q
+
+
+def preferred_media_type(accept: Optional[str], offered: Sequence[str]) -> str:
+    """
+    The offered media type the client's Accept header ranks highest.
+    Ties, and headers accepting none of them, go to the first one offered.
+    """
+    if not accept:
+        return offered[0]
+    best, best_q = offered[0], 0.0
+    for media_type in offered:
+        q = _media_range_quality(media_type, accept)
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
@@ -1,27 +1,53 @@
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from ..schemas.auth_schema import LoginResponse
 from ..schemas.user_schema import User
 from ..repositories.user_repo import get_user_by_id, insert_user, get_user_by_email
+from ..repositories.token_repo import insert_refresh_token, rotate_refresh_token, revoke_refresh_token
 from ..security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
     hash_password,
     verify_password,
-    create_access_token,
+    create_user_access_token,
     create_email_token,
+    generate_refresh_token,
+    hash_refresh_token,
     decode_token,
+    needs_rehash,
+    schedule_password_rehash,
+    password_hash_pool,
 )
 
-def service_register(email: str, password: str, full_name: str):
+def _token_response(user: User, refresh_token: str) -> LoginResponse:
+    return LoginResponse(
+        access_token=create_user_access_token(user),
+        refresh_token=refresh_token,
+        token_type="bearer",
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        user=user
+    )
+
+def _issue_tokens(user: User) -> LoginResponse:
+    """Short-lived access token plus a stored refresh token for this user"""
+    refresh_token, refresh_hash, expires_at = generate_refresh_token()
+    insert_refresh_token(user.user_id, refresh_hash, expires_at)
+    return _token_response(user, refresh_token)
+
+# Register and login are async: only bcrypt goes to password_hash_pool, the DB
+# calls run on the normal threadpool, so a hash worker never waits on a connection.
+
+async def service_register(email: str, password: str, full_name: str):
     # Block duplicates
-    user_exists = get_user_by_email(email)
+    user_exists = await run_in_threadpool(get_user_by_email, email)
     if user_exists:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email is already registered")
     
     # If user does not exist yet, continue to registration process
     # Hash password
-    hashed_pwd = hash_password(password)
+    hashed_pwd = await password_hash_pool.run(hash_password, password)
 
     # Insert to DB
-    output = insert_user(email, hashed_pwd, full_name)
+    output = await run_in_threadpool(insert_user, email, hashed_pwd, full_name)
     if not output["success"]:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Could not create user: {output["error"]}")
 
@@ -41,14 +67,8 @@ def service_register(email: str, password: str, full_name: str):
         is_verified=is_verified
     )
 
-    # Auto-login after registration, so create access token
-    access_token = create_access_token(user_id, email)
-
-    return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        user=registered_user
-    )
+    # Auto-login after registration, so issue tokens
+    return await run_in_threadpool(_issue_tokens, registered_user)
 
 def service_verify_email(token: str):
     payload = decode_token(token)
@@ -66,18 +86,19 @@ def service_verify_email(token: str):
     
     return None
 
-def service_login(email: str, password: str) -> LoginResponse:
-    user = get_user_by_email(email)
+async def service_login(email: str, password: str) -> LoginResponse:
+    user = await run_in_threadpool(get_user_by_email, email)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
     (user_id, email, password_hash, full_name, created_at, is_verified) = user
-    if not verify_password(password, password_hash):
+    if not await password_hash_pool.run(verify_password, password, password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
-    
-    # Renew token
-    access_token = create_access_token(user_id, email)
 
+    # Upgrade hashes made with an older/weaker cost, without delaying the login
+    if needs_rehash(password_hash):
+        schedule_password_rehash(user_id, password)
+    
     logged_in_user = User(
         user_id=user_id,
         email=email,
@@ -86,8 +107,23 @@ def service_login(email: str, password: str) -> LoginResponse:
         is_verified=is_verified
     )
 
-    return LoginResponse(
-        access_token=access_token,
-        token_type="bearer",
-        user=logged_in_user
-    )
+    # Renew tokens
+    return await run_in_threadpool(_issue_tokens, logged_in_user)
+
+def service_refresh(refresh_token: str) -> LoginResponse:
+    """
+    Trade a refresh token for a new access token and a new refresh token.
+    The old refresh token is spent; the user row is re-read so profile and
+    verification changes (or a deleted account) take effect here.
+    """
+    new_token, new_hash, expires_at = generate_refresh_token()
+    row = rotate_refresh_token(hash_refresh_token(refresh_token), new_hash, expires_at)
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token, please login again.")
+
+    return _token_response(User(**row), new_token)
+
+def service_logout(refresh_token: str) -> None:
+    # Access tokens stay valid until they expire (minutes); the refresh token is what we revoke
+    revoke_refresh_token(hash_refresh_token(refresh_token))
+    return None
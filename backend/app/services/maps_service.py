@@ -0,0 +1,450 @@
+"""
+Self-hosted routing over a local OpenStreetMap extract.
+
+The road network in ROUTING_OSM_PATH (.osm XML, optionally .gz/.bz2) is
+parsed once at startup into an in-memory RoadGraph. For each route:
+- both endpoints are snapped to the nearest road node via a grid index
+- the fastest path is found with A* (straight-line distance at top speed
+  as the heuristic, so it never overestimates)
+- the result is cached by the snapped node pair, so every customer near the
+  same corner asking for the same stall shares one cache entry
+
+"Near You" ranking uses the same graph: one Dijkstra from the user's node
+settles carts in ETA order and stops after the K nearest, instead of K
+separate route calls. Those lists are cached briefly per ~110 m user cell.
+
+Each mode in ROUTING_PROFILES (driving, walking) gets its own graph.
+
+Until a graph is loaded (no extract configured, or still parsing) routes
+raise 503 and the frontend can fall back to another router.
+"""
+import bz2
+import gzip
+import heapq
+import math
+import os
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+from fastapi import HTTPException, status
+
+from app.repositories import vendor_repo
+
+ROUTING_OSM_PATH = os.getenv("ROUTING_OSM_PATH", "app/data/roads.osm.bz2")
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "4096"))
+ROUTING_MAX_SNAP_METERS = float(os.getenv("ROUTING_MAX_SNAP_METERS", "500"))
+NEAREST_VENDORS_CACHE_SECONDS = int(os.getenv("NEAREST_VENDORS_CACHE_SECONDS", "30"))
+NEAREST_VENDORS_MAX_SECONDS = 45 * 60  # carts further away than this are not "near"
+NEAREST_CELL_DEGREES = 0.001  # about 110 m
+
+EARTH_RADIUS_METERS = 6371008.8
+GRID_CELL_DEGREES = 0.002  # about 220 m at Jakarta's latitude
+METERS_PER_DEGREE = 111320.0
+
+# Typical urban driving speeds in km/h; ways with other highway values are skipped
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 80, "motorway_link": 50,
+    "trunk": 60, "trunk_link": 40,
+    "primary": 45, "primary_link": 35,
+    "secondary": 35, "secondary_link": 30,
+    "tertiary": 30, "tertiary_link": 25,
+    "unclassified": 25,
+    "residential": 20,
+    "living_street": 10,
+    "service": 15,
+}
+
+WALKING_SPEED_KMH = 5
+WALKABLE_HIGHWAYS = (
+    "trunk", "trunk_link", "primary", "primary_link", "secondary", "secondary_link",
+    "tertiary", "tertiary_link", "unclassified", "residential", "living_street", "service",
+    "pedestrian", "footway", "path", "steps", "track",
+)
+
+
+@dataclass
+class RoutingProfile:
+    speeds_kmh: Dict[str, float]  # highway tag -> speed; other ways are skipped
+    follows_oneway: bool
+    access_tag: str  # mode-specific access tag, checked before the generic "access"
+
+
+ROUTING_PROFILES = {
+    "driving": RoutingProfile(HIGHWAY_SPEEDS_KMH, follows_oneway=True, access_tag="motor_vehicle"),
+    "walking": RoutingProfile(
+        {highway: WALKING_SPEED_KMH for highway in WALKABLE_HIGHWAYS},
+        follows_oneway=False,
+        access_tag="foot"
+    ),
+}
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def parse_lat_lon(text: str) -> Tuple[float, float]:
+    """Parse "lat,lon" (as used by ?from= and ?to=). Raises ValueError."""
+    parts = text.split(",")
+    if len(parts) != 2:
+        raise ValueError(f"Expected 'lat,lon', got '{text}'")
+    lat, lon = float(parts[0]), float(parts[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or math.isnan(lat) or math.isnan(lon):
+        raise ValueError(f"Coordinates out of range: '{text}'")
+    return lat, lon
+
+
+class RoadGraph:
+    """
+    Directed road graph with nodes numbered 0..n-1.
+    adjacency[node] lists (neighbor, meters, seconds) edges.
+    """
+
+    def __init__(self, lats: List[float], lons: List[float], adjacency: List[List[Tuple[int, float, float]]]):
+        self.lats = array("d", lats)
+        self.lons = array("d", lons)
+        self.adjacency = adjacency
+        self.edge_count = sum(len(edges) for edges in adjacency)
+        fastest = max((meters / seconds for edges in adjacency for _, meters, seconds in edges if seconds), default=1.0)
+        self.max_speed_mps = fastest
+
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for node in range(len(self.lats)):
+            self._grid.setdefault(self._cell(self.lats[node], self.lons[node]), []).append(node)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / GRID_CELL_DEGREES), math.floor(lon / GRID_CELL_DEGREES)
+
+    def nearest_node(self, lat: float, lon: float, max_meters: float = ROUTING_MAX_SNAP_METERS) -> Optional[int]:
+        """Closest road node within max_meters, searching grid rings outwards."""
+        cell_lat, cell_lon = self._cell(lat, lon)
+        # Smallest distance spanned by one cell (longitude shrinks with latitude)
+        cell_meters = GRID_CELL_DEGREES * METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        max_ring = int(max_meters // cell_meters) + 1
+
+        best_node, best_meters = None, max_meters
+        for ring in range(max_ring + 1):
+            # Nodes in this ring or beyond are at least (ring - 1) cells away
+            if best_node is not None and (ring - 1) * cell_meters > best_meters:
+                break
+            for d_lat in range(-ring, ring + 1):
+                for d_lon in range(-ring, ring + 1):
+                    if max(abs(d_lat), abs(d_lon)) != ring:
+                        continue
+                    for node in self._grid.get((cell_lat + d_lat, cell_lon + d_lon), ()):
+                        meters = haversine_meters(lat, lon, self.lats[node], self.lons[node])
+                        if meters <= best_meters:
+                            best_node, best_meters = node, meters
+        return best_node
+
+    def shortest_path(self, source: int, target: int) -> Optional[Tuple[List[int], float, float]]:
+        """A* on travel time. Returns (nodes, meters, seconds), or None when unreachable."""
+        target_lat, target_lon = self.lats[target], self.lons[target]
+
+        def estimate(node: int) -> float:
+            return haversine_meters(self.lats[node], self.lons[node], target_lat, target_lon) / self.max_speed_mps
+
+        seconds_to = {source: 0.0}
+        meters_to = {source: 0.0}
+        previous: Dict[int, int] = {}
+        heap = [(estimate(source), 0.0, source)]
+        while heap:
+            _, seconds, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while node in previous:
+                    node = previous[node]
+                    path.append(node)
+                path.reverse()
+                return path, meters_to[target], seconds
+            if seconds > seconds_to[node]:
+                continue  # stale heap entry
+            for neighbor, edge_meters, edge_seconds in self.adjacency[node]:
+                candidate = seconds + edge_seconds
+                if candidate < seconds_to.get(neighbor, math.inf):
+                    seconds_to[neighbor] = candidate
+                    meters_to[neighbor] = meters_to[node] + edge_meters
+                    previous[neighbor] = node
+                    heapq.heappush(heap, (candidate + estimate(neighbor), candidate, neighbor))
+        return None
+
+    def nearest_targets(
+        self,
+        source: int,
+        targets: Dict[int, List[int]],
+        k: int,
+        max_seconds: float = math.inf,
+    ) -> List[Tuple[int, float, float]]:
+        """
+        One-to-many Dijkstra: the k items (e.g. store IDs) in `targets`
+        {node: [items]} reachable fastest from source, as (item, meters, seconds)
+        in ETA order. Stops as soon as k items are settled or max_seconds is passed.
+        """
+        found: List[Tuple[int, float, float]] = []
+        seconds_to = {source: 0.0}
+        meters_to = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap and len(found) < k:
+            seconds, node = heapq.heappop(heap)
+            if seconds > seconds_to[node]:
+                continue  # stale heap entry
+            if seconds > max_seconds:
+                break
+            for item in targets.get(node, ()):
+                found.append((item, meters_to[node], seconds))
+            for neighbor, edge_meters, edge_seconds in self.adjacency[node]:
+                candidate = seconds + edge_seconds
+                if candidate < seconds_to.get(neighbor, math.inf):
+                    seconds_to[neighbor] = candidate
+                    meters_to[neighbor] = meters_to[node] + edge_meters
+                    heapq.heappush(heap, (candidate, neighbor))
+        return found[:k]
+
+
+def build_road_graph(
+    node_coords: Dict[int, Tuple[float, float]],
+    ways: List[Tuple[List[int], float, int]],
+) -> RoadGraph:
+    """
+    Build a RoadGraph from OSM nodes {osm_id: (lat, lon)} and ways
+    (osm node ids, speed in m/s, direction) where direction is 1 for oneway,
+    -1 for reversed oneway and 0 for two-way.
+    """
+    index: Dict[int, int] = {}
+    lats: List[float] = []
+    lons: List[float] = []
+    adjacency: List[List[Tuple[int, float, float]]] = []
+
+    def node_index(osm_id: int) -> int:
+        if osm_id not in index:
+            index[osm_id] = len(lats)
+            lat, lon = node_coords[osm_id]
+            lats.append(lat)
+            lons.append(lon)
+            adjacency.append([])
+        return index[osm_id]
+
+    for osm_ids, speed_mps, direction in ways:
+        osm_ids = [osm_id for osm_id in osm_ids if osm_id in node_coords]
+        for a_id, b_id in zip(osm_ids, osm_ids[1:]):
+            a, b = node_index(a_id), node_index(b_id)
+            meters = haversine_meters(lats[a], lons[a], lats[b], lons[b])
+            seconds = meters / speed_mps
+            if direction >= 0:
+                adjacency[a].append((b, meters, seconds))
+            if direction <= 0:
+                adjacency[b].append((a, meters, seconds))
+
+    return RoadGraph(lats, lons, adjacency)
+
+
+def _open_osm(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _way_allowed(tags: Dict[str, str], profile: RoutingProfile) -> bool:
+    if tags.get("highway") not in profile.speeds_kmh:
+        return False
+    return tags.get(profile.access_tag, tags.get("access")) not in ("no", "private")
+
+
+def _way_direction(tags: Dict[str, str], profile: RoutingProfile) -> int:
+    if not profile.follows_oneway:
+        return 0
+    oneway = tags.get("oneway", "")
+    if oneway in ("yes", "true", "1") or tags.get("junction") == "roundabout":
+        return 1
+    if oneway == "-1":
+        return -1
+    return 0
+
+
+def _iter_osm_elements(source):
+    """
+    Yield each top-level element (node, way, relation, ...) once it is fully
+    parsed. iterparse still attaches every finished element to the <osm>
+    root, so the root is cleared after each one to keep memory flat.
+    """
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    depth = 0
+    for event, element in context:
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            yield element
+            root.clear()
+
+
+def parse_osm(path: str, profiles: Dict[str, RoutingProfile] = ROUTING_PROFILES) -> Dict[str, RoadGraph]:
+    """
+    Parse an OSM XML extract into one graph per profile, in two streaming
+    passes: first the usable ways, then only the nodes those ways use.
+    Only one top-level element is held at a time while parsing; what stays
+    in memory is the usable ways' node lists and their nodes' coordinates.
+    """
+    ways: Dict[str, List[Tuple[List[int], float, int]]] = {name: [] for name in profiles}
+    with _open_osm(path) as source:
+        for element in _iter_osm_elements(source):
+            if element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                refs = None
+                for name, profile in profiles.items():
+                    if _way_allowed(tags, profile):
+                        refs = refs or [int(nd.get("ref")) for nd in element.iter("nd")]
+                        speed_mps = profile.speeds_kmh[tags["highway"]] / 3.6
+                        ways[name].append((refs, speed_mps, _way_direction(tags, profile)))
+
+    wanted = {osm_id for profile_ways in ways.values() for refs, _, _ in profile_ways for osm_id in refs}
+    node_coords: Dict[int, Tuple[float, float]] = {}
+    with _open_osm(path) as source:
+        for element in _iter_osm_elements(source):
+            if element.tag == "node":
+                osm_id = int(element.get("id"))
+                if osm_id in wanted:
+                    node_coords[osm_id] = (float(element.get("lat")), float(element.get("lon")))
+
+    return {name: build_road_graph(node_coords, profile_ways) for name, profile_ways in ways.items()}
+
+
+# ===== LOADED GRAPHS AND CACHES =====
+
+_graphs: Dict[str, RoadGraph] = {}
+_route_cache: LRUCache = LRUCache(maxsize=ROUTE_CACHE_SIZE)
+_nearest_cache: TTLCache = TTLCache(maxsize=2048, ttl=NEAREST_VENDORS_CACHE_SECONDS)
+_route_cache_lock = threading.Lock()
+
+
+def set_road_graph(graph: Optional[RoadGraph], profile: str = "driving") -> None:
+    """Swap in a profile's graph (or None) and drop results computed on the old one."""
+    with _route_cache_lock:
+        if graph is None:
+            _graphs.pop(profile, None)
+        else:
+            _graphs[profile] = graph
+        _route_cache.clear()
+        _nearest_cache.clear()
+
+
+def load_road_graph(path: str = ROUTING_OSM_PATH) -> Dict[str, RoadGraph]:
+    if not os.path.exists(path):
+        print(f"Routing disabled: no OSM extract at {path}")
+        return {}
+    try:
+        graphs = parse_osm(path)
+    except Exception as e:
+        print(f"Routing disabled: failed to load {path}: {e}")
+        return {}
+    for profile, graph in graphs.items():
+        set_road_graph(graph, profile)
+        print(f"Road graph ({profile}) loaded from {path}: {len(graph)} nodes, {graph.edge_count} edges")
+    return graphs
+
+
+def start_road_graph_loading() -> threading.Thread:
+    """Parse the extract in the background so startup is not held up by it."""
+    thread = threading.Thread(target=load_road_graph, name="road-graph-loader", daemon=True)
+    thread.start()
+    return thread
+
+
+def _graph_for(profile: str) -> RoadGraph:
+    graph = _graphs.get(profile)
+    if graph is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Routing is not available"
+        )
+    return graph
+
+
+def get_route(
+    from_lat: float,
+    from_lon: float,
+    to_lat: float,
+    to_lon: float,
+    profile: str = "driving",
+) -> Optional[dict]:
+    """
+    Fastest route as {coordinates: [[lon, lat], ...], distance (m),
+    duration (s)}, the shape the frontend's RouteResponse expects.
+    Returns None when an endpoint is off the road network or unreachable.
+    """
+    graph = _graph_for(profile)
+
+    source = graph.nearest_node(from_lat, from_lon)
+    target = graph.nearest_node(to_lat, to_lon)
+    if source is None or target is None:
+        return None
+
+    key = (profile, source, target)
+    with _route_cache_lock:
+        if key in _route_cache:
+            return _route_cache[key]
+
+    found = graph.shortest_path(source, target)
+    route = None
+    if found is not None:
+        nodes, meters, seconds = found
+        route = {
+            "coordinates": [[graph.lons[node], graph.lats[node]] for node in nodes],
+            "distance": round(meters, 1),
+            "duration": round(seconds, 1),
+        }
+
+    with _route_cache_lock:
+        if _graphs.get(profile) is graph:
+            _route_cache[key] = route
+    return route
+
+
+def get_nearest_vendors(lat: float, lon: float, k: int = 10, profile: str = "walking") -> List[dict]:
+    """
+    The k carts with the shortest ETA from (lat, lon) over the road graph, as
+    [{store_id, distance (m), duration (s)}] sorted by duration. Only carts the
+    status sweeper marks online count (open, in hours, with a recent fix);
+    carts off the network or over NEAREST_VENDORS_MAX_SECONDS away are left out.
+    """
+    graph = _graph_for(profile)
+
+    key = (profile, k, math.floor(lat / NEAREST_CELL_DEGREES), math.floor(lon / NEAREST_CELL_DEGREES))
+    with _route_cache_lock:
+        cached = _nearest_cache.get(key)
+    if cached is not None:
+        return cached
+
+    nearest = []
+    source = graph.nearest_node(lat, lon)
+    if source is not None:
+        # Several carts can share a road node
+        targets: Dict[int, List[int]] = {}
+        for store in vendor_repo.get_store_location_rows(online_only=True):
+            node = graph.nearest_node(store.current_location.lat, store.current_location.lon)
+            if node is not None:
+                targets.setdefault(node, []).append(store.store_id)
+
+        for store_id, meters, seconds in graph.nearest_targets(source, targets, k, NEAREST_VENDORS_MAX_SECONDS):
+            nearest.append({"store_id": store_id, "distance": round(meters, 1), "duration": round(seconds, 1)})
+
+    with _route_cache_lock:
+        if _graphs.get(profile) is graph:
+            _nearest_cache[key] = nearest
+    return nearest
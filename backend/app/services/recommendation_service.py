@@ -0,0 +1,175 @@
+"""
+"Stalls you may like": stores ranked for one user at one place.
+
+All stores are loaded into a column matrix (NumPy arrays) that is cached
+for RECOMMENDATION_CANDIDATES_SECONDS; a request scores every candidate in
+a handful of vectorized operations and returns the top k.
+
+Each store's score is a weighted sum of signals in 0..1:
+- distance:  1 / (1 + d / RECOMMENDATION_DISTANCE_SCALE_METERS)
+- rating:    rating shrunk towards the average for stores with few reviews
+- volume:    log(1 + reviews), relative to the most reviewed store
+- affinity:  how much the user likes the store's category (favorites, reviews)
+- open:      1 when online, 0.5 when open but not reporting, else 0
+"""
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.repositories import recommendation_repo
+from app.services.maps_service import EARTH_RADIUS_METERS
+from app.serialization import validate_rows
+from app.schemas.recommendation_schema import RecommendedStore
+
+RECOMMENDATION_CANDIDATES_SECONDS = int(os.getenv("RECOMMENDATION_CANDIDATES_SECONDS", "60"))
+RECOMMENDATION_DISTANCE_SCALE_METERS = 1000.0
+# Reviews a store needs before its own rating counts as much as the average
+RATING_PRIOR_REVIEWS = 5
+
+RECOMMENDATION_WEIGHTS = {
+    "distance": 0.35,
+    "rating": 0.25,
+    "volume": 0.10,
+    "affinity": 0.20,
+    "open": 0.10,
+}
+
+
+@dataclass
+class CandidateMatrix:
+    """Every store as columns, row i being rows[i]"""
+    rows: List[Dict[str, Any]]
+    store_id: np.ndarray
+    lat: np.ndarray  # radians; NaN without a location
+    lon: np.ndarray
+    category_id: np.ndarray  # -1 when unset
+    rating_score: np.ndarray  # precomputed, they do not depend on the user
+    volume_score: np.ndarray
+    open_score: np.ndarray
+    loaded_at: float
+
+
+def build_candidate_matrix(rows: List[Dict[str, Any]]) -> CandidateMatrix:
+    """Turn candidate rows into arrays and precompute the user-independent scores."""
+    n = len(rows)
+    lat = np.full(n, np.nan)
+    lon = np.full(n, np.nan)
+    for i, row in enumerate(rows):
+        location = row.get('current_location')
+        if location:
+            lat[i], lon[i] = location['lat'], location['lon']
+
+    rating = np.array([row.get('rating') or 0.0 for row in rows], dtype=float)
+    reviews = np.array([row.get('review_count') or 0 for row in rows], dtype=float)
+    prior = float(rating[reviews > 0].mean()) if (reviews > 0).any() else 0.0
+    # Bayesian average: a 5.0 from one review is not better than 4.6 from fifty
+    shrunk = (rating * reviews + prior * RATING_PRIOR_REVIEWS) / (reviews + RATING_PRIOR_REVIEWS)
+
+    volume = np.log1p(reviews)
+    if n and volume.max() > 0:
+        volume /= volume.max()
+
+    open_score = np.array(
+        [1.0 if row.get('is_online') else 0.5 if row.get('is_open') else 0.0 for row in rows]
+    )
+    return CandidateMatrix(
+        rows=rows,
+        store_id=np.array([row['store_id'] for row in rows], dtype=np.int64),
+        lat=np.radians(lat),
+        lon=np.radians(lon),
+        category_id=np.array([row.get('category_id') or -1 for row in rows], dtype=np.int64),
+        rating_score=shrunk / 5.0,
+        volume_score=volume,
+        open_score=open_score,
+        loaded_at=time.monotonic(),
+    )
+
+
+_candidates: Optional[CandidateMatrix] = None
+_candidates_lock = threading.Lock()
+
+
+def get_candidate_matrix() -> CandidateMatrix:
+    """The cached candidate matrix, reloaded from the database when older than the TTL."""
+    global _candidates
+    with _candidates_lock:
+        if _candidates is None or time.monotonic() - _candidates.loaded_at > RECOMMENDATION_CANDIDATES_SECONDS:
+            _candidates = build_candidate_matrix(recommendation_repo.get_recommendation_candidates())
+        return _candidates
+
+
+def clear_candidate_matrix() -> None:
+    global _candidates
+    with _candidates_lock:
+        _candidates = None
+
+
+def score_candidates(matrix: CandidateMatrix, lat: Optional[float], lon: Optional[float],
+                     affinity: Dict[int, float]) -> tuple:
+    """Score every candidate; returns (scores, distances in meters or NaN)."""
+    n = len(matrix.rows)
+    if lat is not None and lon is not None:
+        phi = math.radians(lat)
+        dphi = matrix.lat - phi
+        dlambda = matrix.lon - math.radians(lon)
+        a = np.sin(dphi / 2) ** 2 + math.cos(phi) * np.cos(matrix.lat) * np.sin(dlambda / 2) ** 2
+        distance = 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+        # Stores without a location rank as if far away
+        distance_score = np.nan_to_num(1 / (1 + distance / RECOMMENDATION_DISTANCE_SCALE_METERS), nan=0.0)
+    else:
+        distance = np.full(n, np.nan)
+        distance_score = np.zeros(n)
+
+    affinity_score = np.zeros(n)
+    liked = {category: weight for category, weight in affinity.items() if weight > 0}
+    if liked:
+        top = max(liked.values())
+        for category, weight in liked.items():
+            affinity_score[matrix.category_id == category] = weight / top
+
+    scores = (
+        RECOMMENDATION_WEIGHTS["distance"] * distance_score
+        + RECOMMENDATION_WEIGHTS["rating"] * matrix.rating_score
+        + RECOMMENDATION_WEIGHTS["volume"] * matrix.volume_score
+        + RECOMMENDATION_WEIGHTS["affinity"] * affinity_score
+        + RECOMMENDATION_WEIGHTS["open"] * matrix.open_score
+    )
+    return scores, distance
+
+
+def get_recommendations(lat: Optional[float] = None, lon: Optional[float] = None,
+                        user_id: Optional[int] = None, k: int = 10,
+                        exclude: Optional[List[int]] = None) -> List[RecommendedStore]:
+    """
+    The k best stores for this user and location, best first.
+    Anonymous users (no user_id) get no category affinity.
+    """
+    matrix = get_candidate_matrix()
+    if not matrix.rows:
+        return []
+
+    affinity = recommendation_repo.get_user_category_affinity(user_id) if user_id is not None else {}
+    scores, distance = score_candidates(matrix, lat, lon, affinity)
+
+    if exclude:
+        scores[np.isin(matrix.store_id, exclude)] = -np.inf
+
+    k = min(k, len(scores))
+    # Partial sort: only the top k are ordered
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    results = []
+    for i in top:
+        if scores[i] == -np.inf:
+            continue
+        row = dict(matrix.rows[i])
+        row['score'] = round(float(scores[i]), 4)
+        row['distance_m'] = None if np.isnan(distance[i]) else round(float(distance[i]), 1)
+        results.append(row)
+    return validate_rows(RecommendedStore, results)
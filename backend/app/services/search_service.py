@@ -0,0 +1,247 @@
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.repositories import search_repo
+from app.serialization import validate_rows
+from app.schemas.search_schema import SearchResult, Suggestion
+
+# A result this far away scores half of an identical match right next to the user
+SEARCH_DISTANCE_SCALE_METERS = 1000.0
+
+# Autocomplete index bounds: names beyond the entry cap are not suggested,
+# and only the first few words of a long name are indexed
+SUGGEST_MAX_ENTRIES = int(os.getenv("SUGGEST_MAX_ENTRIES", "50000"))
+SUGGEST_MAX_WORDS = 8
+# Index keys looked at per lookup; keeps a one-letter prefix as cheap as a long one
+SUGGEST_SCAN_LIMIT = 500
+
+# Pre-1972 spellings still common on menus and signs -> EYD.
+# Order matters and must match gerobakku.search_normalize() (migration 007).
+OLD_SPELLINGS = (
+    ("oe", "u"),
+    ("dj", "j"),
+    ("tj", "c"),
+    ("sj", "sy"),
+    ("nj", "ny"),
+    ("ch", "kh"),
+)
+
+# Street-food abbreviations and variant spellings, searched as alternatives
+SEARCH_ALIASES = {
+    "nasgor": "nasi goreng",
+    "migor": "mie goreng",
+    "mie": "mi",
+    "bakmie": "bakmi",
+    "sate": "satai",
+    "satai": "sate",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_search_text(text: str) -> str:
+    """
+    Lower-case, strip accents, map old spellings and keep only letters/digits.
+    The Python twin of gerobakku.search_normalize(): "Soto Tjikini!" -> "soto cikini".
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    for old, new in OLD_SPELLINGS:
+        text = text.replace(old, new)
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def build_prefix_tsquery(normalized: str) -> str:
+    """
+    to_tsquery() text matching every word as a prefix, so results show up while
+    the user is still typing: "bakso ura" -> "bakso:* & ura:*".
+    Aliases are OR'ed in: "nasgor" -> "(nasgor:* | nasi:* <-> goreng:*)".
+    """
+    terms = []
+    for word in normalized.split():
+        term = f"{word}:*"
+        alias = SEARCH_ALIASES.get(word)
+        if alias:
+            term = "(" + term + " | " + " <-> ".join(f"{w}:*" for w in alias.split()) + ")"
+        terms.append(term)
+    return " & ".join(terms)
+
+
+def search_stores(
+    q: str,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    limit: int = 20,
+    online_only: bool = False,
+) -> List[SearchResult]:
+    """
+    Stores whose name, description, address or menu match `q`, best first.
+    Matches on Indonesian word stems, word prefixes and (for typos) trigrams;
+    with a location, nearer stores rank higher.
+    """
+    normalized = normalize_search_text(q)
+    if not normalized:
+        return []
+
+    rows = search_repo.search_stores(
+        tsquery=build_prefix_tsquery(normalized),
+        text=normalized,
+        lat=lat,
+        lon=lon,
+        distance_scale_m=SEARCH_DISTANCE_SCALE_METERS,
+        limit=limit,
+        online_only=online_only,
+    )
+    return validate_rows(SearchResult, rows)
+
+
+# ===== AUTOCOMPLETE =====
+
+class SuggestIndex:
+    """
+    In-process word-prefix index over store and menu item names.
+
+    Every word of a normalized name is a key in one sorted list of
+    (word, kind, id) tuples, so a prefix lookup is a bisect plus a short
+    scan and an add/remove is a bisect plus a list insert/delete. The list
+    holds at most max_entries * SUGGEST_MAX_WORDS keys.
+    """
+
+    def __init__(self, max_entries: int = SUGGEST_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._keys: List[Tuple[str, str, int]] = []
+        # (kind, id) -> (name, normalized words, store_id)
+        self._entries: Dict[Tuple[str, int], Tuple[str, Tuple[str, ...], int]] = {}
+        self._store_items: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, kind: str, entry_id: int, name: str, store_id: int) -> bool:
+        """Index (or re-index) a name. False if the index is full."""
+        words = tuple(dict.fromkeys(normalize_search_text(name).split()[:SUGGEST_MAX_WORDS]))
+        with self._lock:
+            self._remove((kind, entry_id))
+            if not words:
+                return True
+            if len(self._entries) >= self.max_entries:
+                return False
+            self._entries[(kind, entry_id)] = (name, words, store_id)
+            for word in words:
+                insort(self._keys, (word, kind, entry_id))
+            if kind == "menu_item":
+                self._store_items.setdefault(store_id, set()).add(entry_id)
+            return True
+
+    def remove(self, kind: str, entry_id: int) -> None:
+        with self._lock:
+            self._remove((kind, entry_id))
+
+    def remove_store(self, store_id: int) -> None:
+        """Drop a store and its menu items (they are deleted with it)."""
+        with self._lock:
+            self._remove(("store", store_id))
+            for item_id in list(self._store_items.get(store_id, ())):
+                self._remove(("menu_item", item_id))
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        kind, entry_id = key
+        _, words, store_id = entry
+        for word in words:
+            i = bisect_left(self._keys, (word, kind, entry_id))
+            if i < len(self._keys) and self._keys[i] == (word, kind, entry_id):
+                del self._keys[i]
+        if kind == "menu_item":
+            items = self._store_items.get(store_id)
+            if items is not None:
+                items.discard(entry_id)
+                if not items:
+                    del self._store_items[store_id]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Names with a word starting with the last typed word and containing
+        the earlier ones: "nasi gor" -> "Nasi Goreng Gila". Names starting
+        with the query come first, then stores before dishes, then shorter
+        names. A dish sold by several carts is suggested once.
+        """
+        terms = normalize_search_text(prefix).split()
+        if not terms:
+            return []
+        query = " ".join(terms)
+        *whole, last = terms
+
+        with self._lock:
+            start = bisect_left(self._keys, (last,))
+            candidates = {}
+            for word, kind, entry_id in self._keys[start:start + SUGGEST_SCAN_LIMIT]:
+                if not word.startswith(last):
+                    break
+                name, words, store_id = self._entries[(kind, entry_id)]
+                if all(any(w.startswith(t) for w in words) for t in whole):
+                    candidates[(kind, entry_id)] = (name, words, store_id)
+
+        ranked = sorted(
+            candidates.items(),
+            key=lambda c: (not " ".join(c[1][1]).startswith(query), c[0][0] != "store", len(c[1][0]), c[0][1]),
+        )
+        results = []
+        seen_dishes = set()
+        for (kind, entry_id), (name, words, store_id) in ranked:
+            if kind == "menu_item":
+                if words in seen_dishes:
+                    continue
+                seen_dishes.add(words)
+            results.append({"kind": kind, "id": entry_id, "store_id": store_id, "name": name})
+            if len(results) >= limit:
+                break
+        return results
+
+
+suggest_index = SuggestIndex()
+
+
+def load_suggest_index() -> int:
+    """
+    (Re)build the autocomplete index from every store and menu item name.
+    Called once at startup; later changes are applied by store_service.
+    """
+    index = SuggestIndex(suggest_index.max_entries)
+    for row in search_repo.get_suggest_names():
+        if not index.add(row["kind"], row["id"], row["name"], row["store_id"]):
+            print(f"Autocomplete index full at {index.max_entries} names; the rest are not suggested.")
+            break
+    # Swap the new contents in at once so lookups never see a half-built index
+    with suggest_index._lock:
+        suggest_index._keys = index._keys
+        suggest_index._entries = index._entries
+        suggest_index._store_items = index._store_items
+    return len(index)
+
+
+def index_store(store: Dict[str, Any]) -> None:
+    suggest_index.add("store", store["store_id"], store.get("name") or "", store["store_id"])
+
+
+def index_menu_item(item: Dict[str, Any]) -> None:
+    suggest_index.add("menu_item", item["item_id"], item.get("name") or "", item["store_id"])
+
+
+def unindex_store(store_id: int) -> None:
+    suggest_index.remove_store(store_id)
+
+
+def unindex_menu_item(item_id: int) -> None:
+    suggest_index.remove("menu_item", item_id)
+
+
+def suggest(prefix: str, limit: int = 10) -> List[Suggestion]:
+    """Autocomplete store and dish names from the in-memory index."""
+    return [Suggestion(**row) for row in suggest_index.suggest(prefix, limit)]
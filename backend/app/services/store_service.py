@@ -1,33 +1,144 @@
+import os
+from datetime import datetime, timedelta
 from typing import List, Optional
+from zoneinfo import ZoneInfo
 from app.repositories import store_repo
+from app.services import search_service
+from app.images import schedule_image_variants
+from app.storage import blob_store
+from app.serialization import validate_rows
 from app.schemas.store_schema import (
     StoreResponse, StoreWithMenuResponse, MenuItemResponse,
     StoreCreate, StoreUpdate, StoreHoursUpdate,
     StoreOpenStatusUpdate, StoreHalalStatusUpdate,
-    MenuItemCreate, MenuItemUpdate
+    MenuItemCreate, MenuItemUpdate,
+    StoreBatchGetRequest, StoreBatchGetResponse, StoreBatchItem,
+    StoreStatusChange, StoreStatusChangesResponse,
+    StoreFilters, StoreFacetsResponse, CategoryFacetCount, BooleanFacetCount, RatingFacetCount,
+    RankedStore, StoreActivityDay, StoreActivityStats
 )
 
+# When enabled, GET /stores/{id} returns the JSON rendered by Postgres as-is
+STORE_DETAIL_DB_JSON = os.getenv("STORE_DETAIL_DB_JSON", "false").lower() in ("1", "true", "yes")
 
-def get_all_stores_with_locations() -> List[StoreResponse]:
+# Online status sweeper: a store without a location update for this long goes offline
+STORE_HEARTBEAT_SECONDS = int(os.getenv("STORE_HEARTBEAT_SECONDS", "300"))
+STORE_STATUS_SWEEP_SECONDS = int(os.getenv("STORE_STATUS_SWEEP_SECONDS", "30"))
+# /stores/status/changes hands out cursors this far behind the database clock,
+# so status writes still in flight when a client polls are not skipped
+STORE_STATUS_CURSOR_LAG_SECONDS = int(os.getenv("STORE_STATUS_CURSOR_LAG_SECONDS", "10"))
+# open_time/close_time are local hours
+STORE_TIMEZONE = os.getenv("STORE_TIMEZONE", "Asia/Jakarta")
+
+
+# Rankings (GET /stores/top, /stores/trending) are recomputed this often
+RANKING_REFRESH_SECONDS = int(os.getenv("RANKING_REFRESH_SECONDS", "300"))
+# Reviews' worth of the global mean every store starts with
+RANKING_PRIOR_REVIEWS = int(os.getenv("RANKING_PRIOR_REVIEWS", "10"))
+# One review counts as much as this many detail views towards trending
+RANKING_REVIEW_WEIGHT = 5
+
+# Star thresholds offered by the rating facet ("4+ stars", ...)
+RATING_FACET_THRESHOLDS = (4, 3, 2, 1)
+
+
+def _release_key(image_key: Optional[str]) -> None:
+    """Undo a retain_url when the row that would have used the image wasn't written."""
+    if image_key is not None:
+        blob_store.release(image_key)
+
+
+def get_all_stores_with_locations(filters: Optional[StoreFilters] = None) -> List[StoreResponse]:
     """
-    Get all stores with their current locations.
+    Get all stores with their current locations, optionally filtered.
     """
-    stores = store_repo.get_all_stores()
-    return [StoreResponse(**store) for store in stores]
+    filters = filters or StoreFilters()
+    stores = store_repo.get_all_stores(**filters.model_dump())
+    return validate_rows(StoreResponse, stores)
+
+
+def get_store_facets(filters: Optional[StoreFilters] = None) -> StoreFacetsResponse:
+    """
+    Facet counts for a store filter UI, from one GROUPING SETS query.
+    Each facet ignores its own filter, so every alternative shows its count.
+    """
+    filters = filters or StoreFilters()
+    rows = store_repo.get_store_facets(**filters.model_dump())
+
+    total = 0
+    categories = []
+    booleans = {"is_halal": {False: 0, True: 0}, "is_open": {False: 0, True: 0}}
+    stars = {}
+    for row in rows:
+        facet = row['facet']
+        if facet == 'total':
+            total = row['count']
+        elif facet == 'category':
+            categories.append(CategoryFacetCount(category_id=row['value'], name=row['name'], count=row['count']))
+        elif facet == 'rating':
+            stars[row['value']] = row['count']
+        else:
+            booleans[facet][bool(row['value'])] = row['count']
+
+    # Whole-star groups -> "at least N stars" counts
+    min_rating = [
+        RatingFacetCount(min_rating=threshold, count=sum(n for star, n in stars.items() if star >= threshold))
+        for threshold in RATING_FACET_THRESHOLDS
+    ]
+    return StoreFacetsResponse(
+        total=total,
+        categories=[c for c in categories if c.count > 0],
+        is_halal=[BooleanFacetCount(value=v, count=n) for v, n in booleans["is_halal"].items()],
+        is_open=[BooleanFacetCount(value=v, count=n) for v, n in booleans["is_open"].items()],
+        min_rating=min_rating,
+    )
 
 
 def get_store_details(store_id: int) -> Optional[StoreWithMenuResponse]:
     """
-    Get store details including menu items.
+    Get store details including menu items (single query).
     """
-    store = store_repo.get_store_by_id(store_id)
+    store = store_repo.get_store_with_menu(store_id)
     if not store:
         return None
-    
-    menu_items = store_repo.get_store_menu(store_id)
-    menu = [MenuItemResponse(**item) for item in menu_items]
-    
-    return StoreWithMenuResponse(**store, menu=menu)
+
+    return StoreWithMenuResponse(**store)
+
+
+def get_store_details_json(store_id: int) -> Optional[str]:
+    """
+    Get store details as a JSON string rendered by Postgres.
+    Skips the dict -> Pydantic -> JSON round trip entirely.
+    """
+    return store_repo.get_store_with_menu_json(store_id)
+
+
+def get_stores_batch(request: StoreBatchGetRequest) -> StoreBatchGetResponse:
+    """
+    Get several stores in one call, with the optional parts listed in `include`.
+    Results keep the order of the requested IDs; unknown IDs go to `not_found`.
+    """
+    # Drop duplicate IDs but keep the caller's order
+    store_ids = list(dict.fromkeys(request.store_ids))
+
+    rows = store_repo.get_stores_by_ids(
+        store_ids,
+        include_menu="menu" in request.include,
+        include_reviews_summary="reviews_summary" in request.include,
+        include_location="location" in request.include
+    )
+    by_id = {row['store_id']: row for row in rows}
+
+    stores = []
+    not_found = []
+    for store_id in store_ids:
+        row = by_id.get(store_id)
+        if row is None:
+            not_found.append(store_id)
+        else:
+            stores.append(StoreBatchItem(**row))
+
+    return StoreBatchGetResponse(stores=stores, not_found=not_found)
 
 
 def get_store_menu_items(store_id: int) -> List[MenuItemResponse]:
@@ -35,26 +146,34 @@ def get_store_menu_items(store_id: int) -> List[MenuItemResponse]:
     Get menu items for a store.
     """
     items = store_repo.get_store_menu(store_id)
-    return [MenuItemResponse(**item) for item in items]
+    return validate_rows(MenuItemResponse, items)
 
 
 def create_new_store(store_data: StoreCreate) -> StoreResponse:
     """
     Create a new store.
     """
-    store = store_repo.create_store(
-        vendor_id=store_data.vendor_id,
-        name=store_data.name,
-        description=store_data.description,
-        category_id=store_data.category_id,
-        address=store_data.address,
-        is_halal=store_data.is_halal,
-        open_time=store_data.open_time,
-        close_time=store_data.close_time,
-        store_image_url=store_data.store_image_url
-    )
-    if not store:
-        raise Exception("Failed to create store")
+    # Every row using an uploaded image holds one reference on its blob
+    image_key = blob_store.retain_url(store_data.store_image_url)
+    try:
+        store = store_repo.create_store(
+            vendor_id=store_data.vendor_id,
+            name=store_data.name,
+            description=store_data.description,
+            category_id=store_data.category_id,
+            address=store_data.address,
+            is_halal=store_data.is_halal,
+            open_time=store_data.open_time,
+            close_time=store_data.close_time,
+            store_image_url=store_data.store_image_url
+        )
+        if not store:
+            raise Exception("Failed to create store")
+    except Exception:
+        _release_key(image_key)
+        raise
+    schedule_image_variants("store", store['store_id'], store['store_image_url'])
+    search_service.index_store(store)
     return StoreResponse(**store)
 
 
@@ -65,9 +184,20 @@ def update_store_details(store_id: int, update_data: StoreUpdate) -> Optional[St
     # Convert Pydantic model to dict, excluding None values
     update_dict = update_data.model_dump(exclude_none=True)
     
-    store = store_repo.update_store(store_id, **update_dict)
+    image_key = blob_store.retain_url(update_dict.get('store_image_url'))
+    try:
+        store = store_repo.update_store(store_id, **update_dict)
+    except Exception:
+        _release_key(image_key)
+        raise
     if not store:
+        _release_key(image_key)
         return None
+    if 'store_image_url' in update_dict:
+        blob_store.release_url(store.pop('previous_image_url', None))
+        schedule_image_variants("store", store_id, store['store_image_url'])
+    if 'name' in update_dict:
+        search_service.index_store(store)
     return StoreResponse(**store)
 
 
@@ -105,23 +235,37 @@ def remove_store(store_id: int) -> bool:
     """
     Delete a store (hard delete).
     """
-    return store_repo.delete_store(store_id)
+    deleted = store_repo.delete_store(store_id)
+    if deleted is None:
+        return False
+    search_service.unindex_store(store_id)
+    # Menu items went with the store (ON DELETE CASCADE)
+    for image_url in [deleted['store_image_url'], *deleted['menu_image_urls']]:
+        blob_store.release_url(image_url)
+    return True
 
 
 def add_menu_item(item_data: MenuItemCreate) -> MenuItemResponse:
     """
     Add a new menu item to a store.
     """
-    item = store_repo.create_menu_item(
-        store_id=item_data.store_id,
-        name=item_data.name,
-        description=item_data.description,
-        price=item_data.price,
-        is_available=item_data.is_available,
-        menu_image_url=item_data.menu_image_url
-    )
-    if not item:
-        raise Exception("Failed to create menu item")
+    image_key = blob_store.retain_url(item_data.menu_image_url)
+    try:
+        item = store_repo.create_menu_item(
+            store_id=item_data.store_id,
+            name=item_data.name,
+            description=item_data.description,
+            price=item_data.price,
+            is_available=item_data.is_available,
+            menu_image_url=item_data.menu_image_url
+        )
+        if not item:
+            raise Exception("Failed to create menu item")
+    except Exception:
+        _release_key(image_key)
+        raise
+    schedule_image_variants("menu", item['item_id'], item['menu_image_url'])
+    search_service.index_menu_item(item)
     return MenuItemResponse(**item)
 
 
@@ -131,9 +275,20 @@ def update_existing_menu_item(item_id: int, update_data: MenuItemUpdate) -> Opti
     """
     update_dict = update_data.model_dump(exclude_none=True)
     
-    item = store_repo.update_menu_item(item_id, **update_dict)
+    image_key = blob_store.retain_url(update_dict.get('menu_image_url'))
+    try:
+        item = store_repo.update_menu_item(item_id, **update_dict)
+    except Exception:
+        _release_key(image_key)
+        raise
     if not item:
+        _release_key(image_key)
         return None
+    if 'menu_image_url' in update_dict:
+        blob_store.release_url(item.pop('previous_image_url', None))
+        schedule_image_variants("menu", item_id, item['menu_image_url'])
+    if 'name' in update_dict:
+        search_service.index_menu_item(item)
     return MenuItemResponse(**item)
 
 
@@ -151,4 +306,86 @@ def remove_menu_item(item_id: int) -> bool:
     """
     Delete a menu item.
     """
-    return store_repo.delete_menu_item(item_id)
+    deleted = store_repo.delete_menu_item(item_id)
+    if deleted is None:
+        return False
+    search_service.unindex_menu_item(item_id)
+    blob_store.release_url(deleted['menu_image_url'])
+    return True
+
+
+def sweep_store_status() -> List[int]:
+    """
+    Refresh every store's is_online flag (one UPDATE) and return the IDs
+    that changed. Run periodically by the status sweeper in main.py.
+    """
+    changed = store_repo.sweep_store_online_status(STORE_HEARTBEAT_SECONDS, STORE_TIMEZONE)
+    if changed:
+        online = [row['store_id'] for row in changed if row['is_online']]
+        offline = [row['store_id'] for row in changed if not row['is_online']]
+        print(f"Store status sweep: online {online}, offline {offline}")
+    return [row['store_id'] for row in changed]
+
+
+def get_status_changes(since: datetime) -> StoreStatusChangesResponse:
+    """
+    Stores that went online/offline after `since`, so map clients can patch
+    their list instead of refetching every store.
+    """
+    result = store_repo.get_store_status_changes(since, STORE_STATUS_CURSOR_LAG_SECONDS)
+    changes = [
+        StoreStatusChange(store_id=row['store_id'], is_online=row['is_online'], changed_at=row['online_changed_at'])
+        for row in result['changes']
+    ]
+    return StoreStatusChangesResponse(changes=changes, until=result['until'])
+
+
+def refresh_rankings() -> int:
+    """
+    Recompute the top-rated and trending rankings for every store.
+    Run periodically by the ranking refresher in main.py.
+    """
+    return store_repo.refresh_store_rankings(RANKING_PRIOR_REVIEWS, RANKING_REVIEW_WEIGHT)
+
+
+def get_top_stores(limit: int = 20) -> List[RankedStore]:
+    """
+    Highest Bayesian-adjusted ratings: a single 5-star review does not
+    outrank hundreds of 4.8s.
+    """
+    return validate_rows(RankedStore, store_repo.get_ranked_stores("top", limit))
+
+
+def get_trending_stores(limit: int = 20) -> List[RankedStore]:
+    """Stores with the biggest jump in views and reviews over their usual day."""
+    return validate_rows(RankedStore, store_repo.get_ranked_stores("trending", limit))
+
+
+def get_store_activity_stats(store_id: int, days: int = 7) -> StoreActivityStats:
+    """
+    Daily views, impressions and reviews for a store's dashboard, with
+    zero-filled days so charts get one point per day. Days are calendar
+    days in STORE_TIMEZONE, both in the SQL buckets and in this series.
+    """
+    rows = store_repo.get_store_activity(store_id, days, STORE_TIMEZONE)
+    by_day = {row['day']: row for row in rows}
+
+    today = datetime.now(ZoneInfo(STORE_TIMEZONE)).date()
+    series = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        row = by_day.get(day, {})
+        series.append(StoreActivityDay(
+            day=day,
+            views=row.get('views', 0),
+            impressions=row.get('impressions', 0),
+            reviews=row.get('reviews', 0),
+        ))
+
+    return StoreActivityStats(
+        store_id=store_id,
+        views=sum(d.views for d in series),
+        impressions=sum(d.impressions for d in series),
+        reviews=sum(d.reviews for d in series),
+        days=series,
+    )
@@ -1,13 +1,31 @@
+import asyncio
 import time
-import aiofiles
 from pathlib import Path
 from typing import Optional
 from fastapi import UploadFile
-from uuid import uuid4
-import shutil
 from app.repositories.vendor_repo import post_new_vendor, insert_store_location
 from app.repositories.store_repo import create_store
 from app.schemas.vendor_schema import VendorRegistrationData, VendorStoreRegistrationForm, VendorStoreRegistrationResponse
+from app.uploads import SavedUpload, discard_uploads, save_image_upload
+from app.images import schedule_image_variants
+from app.services import search_service
+from app.storage import blob_store, private_blob_store
+
+# Default images used when a vendor skips an upload
+PLACEHOLDER_ASSETS = {
+    "ktp": Path(__file__).parent.parent / "uploads" / "vendors" / "ktp_placeholder.JPG",
+    "selfie": Path(__file__).parent.parent / "uploads" / "vendors" / "selfie_placeholder.jpg",
+    "store": Path(__file__).parent.parent / "uploads" / "vendors" / "stores" / "default_store_image.jpg",
+}
+_placeholder_keys = {}
+# National ID card and selfie: private store, never served publicly
+IDENTITY_DOCUMENTS = ("ktp", "selfie")
+
+# Suggested /vendor/locations poll interval: slowest when every cart is parked,
+# shrinking as more of them move
+POLL_INTERVAL_MIN_SECONDS = 3
+POLL_INTERVAL_MAX_SECONDS = 30
+MOVING_SPEED_MPS = 0.3  # below this is GPS jitter of a parked cart
 
 # Define realistic walking paths around Sampoerna University for 3 vendors
 # Sampoerna University coordinates: -6.2443, 106.8385
@@ -49,6 +67,37 @@ VENDOR_PATHS = {
 }
 
 
+def build_location_columns(locations):
+    """
+    Turn the rows of vendor_repo.get_store_location_rows() into the
+    compact columnar feed: one list per field instead of one object per store,
+    with timestamps as Unix seconds.
+    """
+    columns = {'store_ids': [], 'lats': [], 'lons': [], 'ts': [], 'speeds': [], 'headings': []}
+    for location in locations:
+        columns['store_ids'].append(location.store_id)
+        columns['lats'].append(location.current_location.lat)
+        columns['lons'].append(location.current_location.lon)
+        columns['ts'].append(int(location.location_updated_at.timestamp()))
+        columns['speeds'].append(location.speed_mps or 0.0)
+        columns['headings'].append(location.heading_deg)
+    return columns
+
+
+def suggest_poll_interval(locations) -> int:
+    """
+    Seconds until the client should poll /vendor/locations again, based on
+    how many of the returned carts are moving: 30 s when all are parked,
+    30 / (1 + moving) otherwise, never below 3 s. Between polls clients
+    extrapolate moving carts from speed_mps and heading_deg.
+
+    `locations` are StoreLocationRow tuples or StoreLocationUpdate models.
+    """
+    moving = sum(1 for location in locations if (location.speed_mps or 0) >= MOVING_SPEED_MPS)
+    interval = POLL_INTERVAL_MAX_SECONDS // (1 + moving)
+    return max(POLL_INTERVAL_MIN_SECONDS, interval)
+
+
 def interpolate_points(start, end, steps):
     """
     Interpolate between two points with the given number of steps.
@@ -154,6 +203,29 @@ def simulate_three_vendors():
 
 
 
+def _store_for(purpose: str):
+    """Blob store for an upload: identity documents stay out of the public one."""
+    return private_blob_store if purpose in IDENTITY_DOCUMENTS else blob_store
+
+
+def _placeholder_url(purpose: str) -> str:
+    """
+    Blob URL of the default image for `purpose`, taking one reference.
+    Every vendor without an upload shares the same stored copy.
+    """
+    store = _store_for(purpose)
+    key = _placeholder_keys.get(purpose)
+    if key is not None and store.exists(key):
+        store.incref(key)
+    else:
+        asset = PLACEHOLDER_ASSETS[purpose]
+        # fallback: empty placeholder when the asset is missing
+        data = asset.read_bytes() if asset.is_file() else b""
+        key = store.put_bytes(data, asset.suffix.lstrip(".") or "jpg")
+        _placeholder_keys[purpose] = key
+    return store.url_for(key)
+
+
 async def register_vendor_and_store_service(
     form_data: VendorStoreRegistrationForm,
     ktp: Optional[UploadFile],
@@ -161,101 +233,42 @@ async def register_vendor_and_store_service(
     store_img: Optional[UploadFile],
 ) -> dict:
     """Handle vendor and store registration with file uploads."""
-    
-    upload_base = Path("app/uploads/vendors")
-    stores_dir = upload_base / "stores"
-    
-    upload_base.mkdir(parents=True, exist_ok=True)
-    stores_dir.mkdir(parents=True, exist_ok=True)
-
-    def _make_local_url_for_vendor(filename: str) -> str:
-        return f"/app/uploads/vendors/{filename}"
-
-    def _make_local_url_for_store(filename: str) -> str:
-        return f"/app/uploads/vendors/stores/{filename}"
-
-    # ===== KTP =====
-    def _unique_filename(user_id: int, purpose: str, upload: Optional[UploadFile]) -> str:
-        if upload and getattr(upload, 'filename', None):
-            suffix = Path(upload.filename).suffix or ""
-            return f"{user_id}_{purpose}_{uuid4().hex}{suffix}"
-        return f"{user_id}_{purpose}"
-
-    if ktp is not None:
-        ktp_filename = _unique_filename(form_data.user_id, "ktp", ktp)
-        ktp_path = upload_base / ktp_filename
-        async with aiofiles.open(str(ktp_path), "wb") as out_file:
-            content = await ktp.read()
-            await out_file.write(content)
-        ktp_local_url = _make_local_url_for_vendor(ktp_filename)
-    else:
-        # refer to the default ktp image
-        ktp_placeholder_name = "ktp_placeholder.JPG"
-        ktp_path = upload_base / ktp_placeholder_name
-        if not ktp_path.exists():
-            # Try copying canonical placeholder from repo assets
-            repo_candidate = Path(__file__).parent.parent / "uploads" / "vendors" / "stores" / ktp_placeholder_name
-            try:
-                if repo_candidate.exists():
-                    shutil.copyfile(repo_candidate, ktp_path)
-                else:
-                    # fallback: create empty placeholder file
-                    async with aiofiles.open(str(ktp_path), "wb") as out_file:
-                        await out_file.write(b"")
-            except Exception:
-                async with aiofiles.open(str(ktp_path), "wb") as out_file:
-                    await out_file.write(b"")
-        ktp_local_url = _make_local_url_for_vendor(ktp_placeholder_name)
-
-    # ===== Selfie =====
-    if selfie is not None:
-        selfie_filename = _unique_filename(form_data.user_id, "selfie", selfie)
-        selfie_path = upload_base / selfie_filename
-        async with aiofiles.open(str(selfie_path), "wb") as out_file:
-            content = await selfie.read()
-            await out_file.write(content)
-        selfie_local_url = _make_local_url_for_vendor(selfie_filename)
-    else:
-        # refer to the default selfie image
-        selfie_placeholder_name = "selfie_placeholder.jpg"
-        selfie_path = upload_base / selfie_placeholder_name
-        if not selfie_path.exists():
-            repo_candidate = Path(__file__).parent.parent / "uploads" / "vendors" / "stores" / selfie_placeholder_name
-            try:
-                if repo_candidate.exists():
-                    shutil.copyfile(repo_candidate, selfie_path)
-                else:
-                    async with aiofiles.open(str(selfie_path), "wb") as out_file:
-                        await out_file.write(b"")
-            except Exception:
-                async with aiofiles.open(str(selfie_path), "wb") as out_file:
-                    await out_file.write(b"")
-        selfie_local_url = _make_local_url_for_vendor(selfie_placeholder_name)
-
-    # ===== Store image =====
-    if store_img is not None:
-        store_img_filename = _unique_filename(form_data.user_id, "store", store_img)
-        store_img_path = stores_dir / store_img_filename
-        async with aiofiles.open(str(store_img_path), "wb") as out_file:
-            content = await store_img.read()
-            await out_file.write(content)
-        store_img_local_url = _make_local_url_for_store(store_img_filename)
-    else:
-        # refer to the default store image
-        default_store_filename = "default_store_image.jpg"
-        default_store_path = stores_dir / default_store_filename
-        if not default_store_path.exists():
-            repo_candidate = Path(__file__).parent.parent / "uploads" / "vendors" / "stores" / default_store_filename
-            try:
-                if repo_candidate.exists():
-                    shutil.copyfile(repo_candidate, default_store_path)
-                else:
-                    async with aiofiles.open(str(default_store_path), "wb") as out_file:
-                        await out_file.write(b"")
-            except Exception:
-                async with aiofiles.open(str(default_store_path), "wb") as out_file:
-                    await out_file.write(b"")
-        store_img_local_url = _make_local_url_for_store(default_store_filename)
+
+    # ===== KTP, selfie, store image =====
+    # Streamed into the blob stores concurrently; missing images use the shared placeholders
+    uploads = [(ktp, "ktp"), (selfie, "selfie"), (store_img, "store")]
+    results = await asyncio.gather(
+        *(
+            save_image_upload(upload, _store_for(purpose))
+            if upload is not None else asyncio.to_thread(_placeholder_url, purpose)
+            for upload, purpose in uploads
+        ),
+        return_exceptions=True
+    )
+
+    # One blob reference per image this registration holds, per store
+    saved_keys = {}
+    for (_, purpose), result in zip(uploads, results):
+        if isinstance(result, BaseException):
+            continue
+        store = _store_for(purpose)
+        key = result.key if isinstance(result, SavedUpload) else store.key_for_url(result)
+        saved_keys.setdefault(store, []).append(key)
+
+    def discard_saved():
+        for store, keys in saved_keys.items():
+            discard_uploads(store, keys)
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # Don't keep the images of a registration that failed
+        discard_saved()
+        raise errors[0]
+
+    ktp_local_url, selfie_local_url, store_img_local_url = (
+        result.url if isinstance(result, SavedUpload) else result
+        for result in results
+    )
 
     # Create vendor using schema
     vendor_data = VendorRegistrationData(
@@ -264,30 +277,38 @@ async def register_vendor_and_store_service(
         selfie_image_url=selfie_local_url
     )
 
-    result = post_new_vendor(
-        vendor_data.user_id,
-        vendor_data.ktp_image_url,
-        vendor_data.selfie_image_url
-    )
+    try:
+        result = post_new_vendor(
+            vendor_data.user_id,
+            vendor_data.ktp_image_url,
+            vendor_data.selfie_image_url
+        )
 
-    vendor_id = result.get("vendor_id") if isinstance(result, dict) else None
-
-    # Create store using store_repo.create_store and capture returned store_id
-    store_result = create_store(
-        vendor_id=vendor_id,
-        name=form_data.store_name,
-        description=form_data.store_description,
-        category_id=form_data.category_id,
-        address=form_data.address,
-        is_halal=form_data.is_halal,
-        open_time=form_data.open_time,
-        close_time=form_data.close_time,
-        store_image_url=store_img_local_url
-    )
+        vendor_id = result.get("vendor_id") if isinstance(result, dict) else None
+
+        # Create store using store_repo.create_store and capture returned store_id
+        store_result = create_store(
+            vendor_id=vendor_id,
+            name=form_data.store_name,
+            description=form_data.store_description,
+            category_id=form_data.category_id,
+            address=form_data.address,
+            is_halal=form_data.is_halal,
+            open_time=form_data.open_time,
+            close_time=form_data.close_time,
+            store_image_url=store_img_local_url
+        )
+    except Exception:
+        discard_saved()
+        raise
 
     store_id = None
     if isinstance(store_result, dict):
         store_id = store_result.get("store_id")
+
+        # Thumbnails/WebP copies are rendered in the background
+        schedule_image_variants("store", store_id, store_result.get("store_image_url"))
+        search_service.index_store(store_result)
         
         # Insert initial location for the store
         if form_data.latitude and form_data.longitude:
@@ -0,0 +1,60 @@
+"""
+Static serving for stored uploads.
+
+Files are sent with Starlette's FileResponse, which already gives us:
+- `Range` requests (206 / multipart ranges), so image viewers can resume
+- `ETag` and `Last-Modified`, answered with 304 on If-None-Match / If-Modified-Since
+- zero-copy `http.response.pathsend` when the ASGI server supports it;
+  otherwise the file is read in UPLOAD_STATIC_CHUNK_SIZE pieces
+
+Names that carry a hash or uuid (blobs, "7_store_<uuid>.jpg", their variants)
+never change content, so browsers/CDNs may cache them for a year without
+revalidating. Anything else (the placeholders) is revalidated via its ETag.
+"""
+import re
+
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+UPLOAD_STATIC_CHUNK_SIZE = 256 * 1024
+
+# 16+ hex digits in a file name: sha256 blob keys, uuid4().hex upload names
+_HASHED_NAME = re.compile(r"[0-9a-f]{16,}", re.IGNORECASE)
+
+
+def is_content_hashed(path: str) -> bool:
+    """True when the file name identifies one fixed content."""
+    return bool(_HASHED_NAME.search(path.rsplit("/", 1)[-1]))
+
+
+def is_hidden_upload_path(path: str) -> bool:
+    """Blob store bookkeeping (.refs counters, .tmp partial uploads) is never served."""
+    return path.endswith(".refs") or any(part.startswith(".") for part in path.split("/"))
+
+
+class UploadStaticFiles(StaticFiles):
+    """Serves an uploads directory with cache headers chosen per file name."""
+
+    async def get_response(self, path: str, scope):
+        if is_hidden_upload_path(path):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def cache_control_for(self, path: str) -> str:
+        return IMMUTABLE_CACHE_CONTROL if is_content_hashed(path) else REVALIDATE_CACHE_CONTROL
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = self.cache_control_for(str(full_path))
+        if hasattr(response, "chunk_size"):
+            response.chunk_size = UPLOAD_STATIC_CHUNK_SIZE
+        return response
+
+
+class BlobStaticFiles(UploadStaticFiles):
+    """Serves the blob store directory; every blob name is a content hash."""
+
+    def cache_control_for(self, path: str) -> str:
+        return IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,202 @@
+"""
+Content-addressed blob storage for uploaded images.
+
+A blob's key is the sha256 of its content plus an extension, stored under a
+two-level fan-out ("3f/1c/3f1c...e2.jpg"). Identical files, such as the same
+photo uploaded twice or the default placeholders, are stored once. Each
+blob has a reference count, one per database row (store, menu item, vendor)
+pointing at it; release() removes it, and the size variants rendered beside
+it, when nobody uses it any more.
+
+Because a key never changes content, blob URLs can be cached forever
+(Cache-Control: immutable).
+
+Vendor identity documents (KTP, selfie) go to `private_blob_store`, whose
+root is outside the public upload tree; they are only served to admins by
+GET /admin/vendor-documents/{key}.
+
+Usage:
+
+    key = blob_store.put_file(temp_path, sha256, "jpg")   # moves temp_path in
+    url = blob_store.url_for(key)                          # "/app/uploads/blobs/3f/1c/3f1c...jpg"
+    blob_store.release(key)                                # drop one reference
+"""
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+BLOB_ROOT = Path(os.getenv("BLOB_ROOT", "app/uploads/blobs"))
+BLOB_URL_PREFIX = "/app/uploads/blobs"
+# Not under app/uploads: nothing here is reachable through the static mounts
+PRIVATE_BLOB_ROOT = Path(os.getenv("PRIVATE_BLOB_ROOT", "app/private/blobs"))
+VENDOR_DOCUMENT_URL_PREFIX = "/admin/vendor-documents"
+# Rendered size variants live in this folder beside their original
+VARIANTS_DIRNAME = "variants"
+
+
+def blob_key(sha256: str, extension: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension.lower()}"
+
+
+class BlobStore(ABC):
+    """Storage interface; LocalBlobStore is the filesystem implementation."""
+
+    @abstractmethod
+    def put_file(self, source: Path, sha256: str, extension: str) -> str:
+        """Move a fully written file into the store and add a reference. Returns its key."""
+
+    @abstractmethod
+    def put_bytes(self, data: bytes, extension: str) -> str:
+        """Store small in-memory content and add a reference. Returns its key."""
+
+    @abstractmethod
+    def incref(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> int:
+        """Drop a reference, deleting the blob and its variants at zero. Returns the remaining count."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def temp_dir(self) -> Path:
+        """Where uploads are streamed before put_file, on the same filesystem."""
+
+    def retain_url(self, url: Optional[str]) -> Optional[str]:
+        """
+        Add a reference to the blob behind `url` when a row starts using it.
+        Returns its key, or None for URLs that aren't (existing) blobs.
+        """
+        key = self.key_for_url(url)
+        if key is None or not self.exists(key):
+            return None
+        self.incref(key)
+        return key
+
+    def release_url(self, url: Optional[str]) -> None:
+        """Drop the reference a row held on the blob behind `url`, if any."""
+        key = self.key_for_url(url)
+        if key is not None:
+            self.release(key)
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs as files under `root`, each with a "<blob>.refs" file holding its
+    reference count. Counts are updated under an exclusive flock on the refs
+    file, so several worker processes can share one directory.
+    """
+
+    def __init__(self, root: Path, url_prefix: str = BLOB_URL_PREFIX):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        self._lock = Lock()  # used instead of flock where fcntl is missing
+
+    def _path(self, key: str) -> Path:
+        path = self.root / key
+        if ".." in Path(key).parts or Path(key).is_absolute():
+            raise ValueError(f"Invalid blob key: {key}")
+        return path
+
+    def local_path(self, key: str) -> Path:
+        """File holding the blob (for serving it through an authenticated route)."""
+        return self._path(key)
+
+    @contextmanager
+    def _locked_refs(self, key: str):
+        refs_path = self._path(key).with_name(Path(key).name + ".refs")
+        refs_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(refs_path, "a+") as refs_file:
+            if fcntl is not None:
+                fcntl.flock(refs_file, fcntl.LOCK_EX)
+            try:
+                refs_file.seek(0)
+                count = int(refs_file.read().strip() or 0)
+                state = {"count": count}
+                yield state
+                refs_file.seek(0)
+                refs_file.truncate()
+                refs_file.write(str(state["count"]))
+                refs_file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(refs_file, fcntl.LOCK_UN)
+        # The refs file stays behind at 0: unlinking it could race with
+        # another process already waiting for its lock.
+
+    def put_file(self, source: Path, sha256: str, extension: str) -> str:
+        key = blob_key(sha256, extension)
+        target = self._path(key)
+        with self._locked_refs(key) as refs:
+            if target.exists():
+                # Already stored: keep the existing copy
+                Path(source).unlink(missing_ok=True)
+            else:
+                os.replace(source, target)
+            refs["count"] += 1
+        return key
+
+    def put_bytes(self, data: bytes, extension: str) -> str:
+        sha256 = hashlib.sha256(data).hexdigest()
+        temp_path = self.temp_dir() / f".{uuid4().hex}.part"
+        temp_path.write_bytes(data)
+        return self.put_file(temp_path, sha256, extension)
+
+    def incref(self, key: str) -> int:
+        with self._locked_refs(key) as refs:
+            refs["count"] += 1
+            return refs["count"]
+
+    def release(self, key: str) -> int:
+        with self._locked_refs(key) as refs:
+            refs["count"] = max(0, refs["count"] - 1)
+            if refs["count"] == 0:
+                path = self._path(key)
+                path.unlink(missing_ok=True)
+                # Variants are rendered from the blob's path, so they share its stem
+                for variant in (path.parent / VARIANTS_DIRNAME).glob(f"{path.stem}_*"):
+                    variant.unlink(missing_ok=True)
+            return refs["count"]
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def url_for(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        """The key behind a URL from url_for, or None for any other URL."""
+        prefix = self.url_prefix + "/"
+        if not url or not url.startswith(prefix):
+            return None
+        return url[len(prefix):]
+
+    def temp_dir(self) -> Path:
+        path = self.root / ".tmp"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+blob_store: BlobStore = LocalBlobStore(BLOB_ROOT)
+private_blob_store = LocalBlobStore(PRIVATE_BLOB_ROOT, url_prefix=VENDOR_DOCUMENT_URL_PREFIX)
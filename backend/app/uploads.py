@@ -0,0 +1,120 @@
+"""
+Streaming image uploads.
+
+Uploads are copied to disk in fixed-size chunks, so a 12 MB phone photo costs
+one chunk of memory instead of the whole file. While streaming we:
+- sniff the first chunk's magic bytes and reject non-images early (415)
+- stop as soon as the size limit is passed (413)
+- compute a sha256 of the content, which becomes its blob store key
+
+Files are written to the store's temp folder and handed to the blob store
+only once complete, so a failed or rejected upload never leaves a
+half-written image, and a file that is already stored is not kept twice.
+
+Usage in a service:
+
+    saved = await save_image_upload(upload, blob_store)
+    saved.url  # "/app/uploads/blobs/3f/1c/3f1c...e2.jpg"
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from uuid import uuid4
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from .storage import BlobStore
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# ISO-BMFF brands used by HEIC/HEIF photos (iPhone default)
+_HEIF_BRANDS = (b"heic", b"heix", b"hevc", b"hevx", b"mif1", b"msf1")
+
+
+@dataclass
+class SavedUpload:
+    key: str
+    url: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+def sniff_image_type(head: bytes) -> tuple[str, str] | None:
+    """Return (extension, content type) from an image's first bytes, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg", "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png", "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif", "image/gif"
+    if head[4:8] == b"ftyp" and head[8:12] in _HEIF_BRANDS:
+        return "heic", "image/heic"
+    return None
+
+
+async def save_image_upload(
+    upload: UploadFile,
+    store: BlobStore,
+    max_bytes: int = MAX_IMAGE_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SavedUpload:
+    """
+    Stream `upload` into the blob store, adding one reference to it.
+    Raises 415 for non-images and 413 when larger than max_bytes.
+    """
+    head = await upload.read(chunk_size)
+    sniffed = sniff_image_type(head)
+    if sniffed is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"{upload.filename or 'Upload'} is not a supported image (JPEG, PNG, WebP, GIF or HEIC)."
+        )
+    extension, content_type = sniffed
+
+    temp_path = store.temp_dir() / f".{uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(str(temp_path), "wb") as out_file:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"{upload.filename or 'Upload'} is larger than {max_bytes // (1024 * 1024)} MB."
+                    )
+                digest.update(chunk)
+                await out_file.write(chunk)
+                chunk = await upload.read(chunk_size)
+
+        sha256 = digest.hexdigest()
+        # put_file takes a short file lock, keep it off the event loop
+        key = await run_in_threadpool(store.put_file, temp_path, sha256, extension)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(str(temp_path))
+        except FileNotFoundError:
+            pass
+        raise
+
+    return SavedUpload(
+        key=key,
+        url=store.url_for(key),
+        size=size,
+        sha256=sha256,
+        content_type=content_type
+    )
+
+
+def discard_uploads(store: BlobStore, keys: list[str]) -> None:
+    """Drop the references taken by uploads of a request that failed later on."""
+    for key in keys:
+        store.release(key)
@@ -0,0 +1,159 @@
+"""
+Bounded worker pools for blocking or CPU-heavy work called from async routes.
+
+A pool runs at most `max_workers` jobs at once. Up to `max_queue` more callers
+wait their turn; anyone beyond that gets a 503 right away, so a burst cannot
+pile up unbounded work. Queue wait times are tracked for stats().
+
+Usage from async code:
+
+    ok = await password_hash_pool.run(verify_password, password, password_hash)
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+
+# Worker processes are never forked from the app: forking would copy the
+# psycopg pool's threads' locks (and sockets) in whatever state they're in.
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class BoundedWorkerPool:
+    def __init__(self, name: str, max_workers: int, max_queue: int, use_processes: bool = False):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.use_processes = use_processes
+
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.running = 0
+        self.queued = 0
+        self.background = 0  # submit_background jobs in flight
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.waits = 0  # run() jobs that got a worker; background jobs don't wait
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(PROCESS_START_METHOD)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name
+                    )
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result.
+        Raises 503 when every worker is busy and the queue is full.
+        For process pools, fn and its arguments must be picklable.
+        """
+        if self.running + self.queued >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly.",
+                headers={"Retry-After": "1"}
+            )
+
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        wait_s = time.perf_counter() - queued_at
+        self.waits += 1
+        self.total_wait_s += wait_s
+        self.max_wait_s = max(self.max_wait_s, wait_s)
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+            with self._lock:  # background jobs finish on other threads
+                self.completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            semaphore.release()
+
+    def submit_background(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Fire-and-forget from synchronous code (e.g. a service already running
+        in a worker). Skips the queue cap; callers that can pile up work must
+        bound it themselves. Returns the Future for done-callbacks.
+        Shows up in stats() as "background" while in flight, then in
+        completed/failed.
+        """
+        with self._lock:
+            self.background += 1
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.background -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(self._background_done)
+        return future
+
+    def _background_done(self, future: Future) -> None:
+        with self._lock:
+            self.background -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "background": self.background,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_s * 1000 / self.waits, 2) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait_s * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor; call at app shutdown."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
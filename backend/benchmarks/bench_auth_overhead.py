@@ -0,0 +1,65 @@
+"""
+Benchmark: per-request JWT auth overhead, before vs after the claims cache
+
+Before: every request printed the raw token to stdout and ran jwt.decode,
+re-checking the HMAC signature each time.
+After: security.decode_token verifies a token once and serves its claims
+from a digest-keyed cache until exp, with no stdout writes.
+
+Requests are simulated by decoding tokens drawn round-robin from a pool of
+active sessions, the way a few hundred logged-in users would hit the API.
+stdout is redirected to /dev/null so terminal speed does not skew the
+"before" numbers; a real console or log pipe is slower still.
+
+Run from backend/:
+    python -m benchmarks.bench_auth_overhead [num_requests] [num_sessions]
+"""
+
+import contextlib
+import os
+import sys
+import time
+
+from jose import jwt
+
+from app.security import (
+    JWT_ALGORITHM,
+    JWT_SECRET,
+    clear_token_cache,
+    create_access_token,
+    decode_token,
+)
+
+
+def legacy_decode(token: str) -> dict:
+    """decode_token as it was before the cache"""
+    print(f"Decoding token: {token}")
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+
+def run(decode, tokens: list, num_requests: int) -> float:
+    """Total milliseconds to authenticate num_requests requests"""
+    start = time.perf_counter()
+    for i in range(num_requests):
+        decode(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    num_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    tokens = [create_access_token(i, f"user{i}@example.com") for i in range(num_sessions)]
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        legacy_ms = run(legacy_decode, tokens, num_requests)
+    clear_token_cache()
+    cached_ms = run(decode_token, tokens, num_requests)
+
+    print(f"Authenticating {num_requests} requests over {num_sessions} sessions")
+    print(f"  print + jwt.decode  : {legacy_ms:8.1f} ms total, {legacy_ms * 1000 / num_requests:6.1f} us/request")
+    print(f"  cached decode_token : {cached_ms:8.1f} ms total, {cached_ms * 1000 / num_requests:6.1f} us/request")
+    print(f"  speed-up            : {legacy_ms / cached_ms:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
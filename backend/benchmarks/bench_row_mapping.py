@@ -0,0 +1,168 @@
+"""
+Benchmark: dict rows vs namedtuple rows for the bulk store/location reads
+
+Compares point_dict_row (one dict per row) with point_namedtuple_row (one
+tuple per row, lat/lon as a Point) on the three bulk paths:
+
+- GET /stores: 100k store rows mapped, then validated into StoreResponse
+  (namedtuples have to be validated from attributes)
+- GET /vendor/locations?format=columnar|msgpack: 100k location rows mapped,
+  then read field by field into columns
+- GET /vendor/locations (JSON): 100k location rows mapped, then validated
+  into StoreLocationUpdate
+
+Rows are generated in memory and fed through a stand-in cursor description,
+so no database is needed. Timings are the best of 5 runs with the garbage
+collector on, as in the server; peak memory is measured in a separate
+tracemalloc run.
+
+Result (CPython 3.13, pydantic 2.12, 100k rows, best of three runs):
+                           dict rows             namedtuple rows
+  mapping stores only      ~200 ms,  63 MiB      ~150 ms,  23 MiB   1.3x
+  stores + validate        ~680 ms, 229 MiB     ~1280 ms, 189 MiB   0.5x
+  locations -> columns     ~200 ms,  52 MiB      ~190 ms,  23 MiB   1.05x
+  locations + validate     ~450 ms, 184 MiB      ~840 ms, 155 MiB   0.5x
+
+Namedtuples map about 1.3x faster at just over a third of the peak memory,
+but Pydantic validates them from attributes at half the speed of dicts.
+So the columnar feed and nearest-vendor ranking, which read the fields
+themselves, use namedtuple rows (vendor_repo.get_store_location_rows);
+get_all_stores, get_stores_by_ids and the JSON location feed, whose rows
+become models, stay on dicts.
+
+Run from backend/:
+    python -m benchmarks.bench_row_mapping [num_rows]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+
+from app.database import point_dict_row, point_namedtuple_row
+from app.repositories.vendor_repo import StoreLocationRow
+from app.schemas.store_schema import StoreResponse
+from app.schemas.vendor_schema import StoreLocationUpdate
+from app.serialization import list_adapter, validate_rows
+from app.services.vendor_service import build_location_columns
+
+Column = namedtuple("Column", ["name", "type_code"])
+
+STORE_COLUMNS = [
+    "store_id", "vendor_id", "name", "description", "rating", "category_id",
+    "address", "is_open", "is_halal", "open_time", "close_time", "created_at",
+    "store_image_url", "lat", "lon", "location_updated_at",
+]
+LOCATION_COLUMNS = ["store_id", "lat", "lon", "location_updated_at", "speed_mps", "heading_deg"]
+
+StoreRow = namedtuple("StoreRow", [
+    "store_id", "vendor_id", "name", "description", "rating", "category_id",
+    "address", "is_open", "is_halal", "open_time", "close_time", "created_at",
+    "store_image_url", "current_location", "location_updated_at",
+])
+
+
+class StoreCursor:
+    """Only what a psycopg row factory looks at"""
+    description = [Column(name, None) for name in STORE_COLUMNS]
+
+
+class LocationCursor:
+    description = [Column(name, None) for name in LOCATION_COLUMNS]
+
+
+def make_store_rows(count: int) -> list:
+    now = datetime(2025, 1, 1, 8, 0, 0)
+    return [
+        (300 + i, 200 + i, f"Warung {i}", "Aneka makanan", 4.5, 1, "Jl. Pancoran",
+         True, True, 8, 22, now, "/app/uploads/vendors/stores/x.jpg",
+         -6.2443, 106.8385, now)
+        for i in range(count)
+    ]
+
+
+def make_location_rows(count: int) -> list:
+    now = datetime(2025, 1, 1, 8, 0, 0)
+    return [(300 + i, -6.2443, 106.8385, now, 1.2 if i % 4 else 0.0, 90.0) for i in range(count)]
+
+
+def fetch(factory, cursor, rows: list) -> list:
+    """What psycopg does with a row factory: one maker call per row"""
+    make_row = factory(cursor)
+    return [make_row(row) for row in rows]
+
+
+def dict_columns(locations: list) -> dict:
+    """build_location_columns as written for dict rows"""
+    columns = {'store_ids': [], 'lats': [], 'lons': [], 'ts': [], 'speeds': [], 'headings': []}
+    for location in locations:
+        columns['store_ids'].append(location['store_id'])
+        columns['lats'].append(location['current_location']['lat'])
+        columns['lons'].append(location['current_location']['lon'])
+        columns['ts'].append(int(location['location_updated_at'].timestamp()))
+        columns['speeds'].append(location.get('speed_mps') or 0.0)
+        columns['headings'].append(location.get('heading_deg'))
+    return columns
+
+
+def validate_attributes(model: type, rows: list) -> list:
+    return list_adapter(model).validate_python(rows, from_attributes=True)
+
+
+def time_best(func, repeat: int = 5) -> float:
+    """Best wall time in milliseconds over `repeat` runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+        del result
+    return best
+
+
+def peak_mib(func) -> float:
+    """Peak traced allocation in MiB for one run"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / (1024 * 1024)
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    stores = make_store_rows(num_rows)
+    locations = make_location_rows(num_rows)
+    store_dicts, store_tuples = point_dict_row(), point_namedtuple_row(StoreRow)
+    location_dicts, location_tuples = point_dict_row(), point_namedtuple_row(StoreLocationRow)
+
+    cases = [
+        ("mapping stores only",
+         lambda: fetch(store_dicts, StoreCursor, stores),
+         lambda: fetch(store_tuples, StoreCursor, stores)),
+        ("stores + validate",
+         lambda: validate_rows(StoreResponse, fetch(store_dicts, StoreCursor, stores)),
+         lambda: validate_attributes(StoreResponse, fetch(store_tuples, StoreCursor, stores))),
+        ("locations -> columns",
+         lambda: dict_columns(fetch(location_dicts, LocationCursor, locations)),
+         lambda: build_location_columns(fetch(location_tuples, LocationCursor, locations))),
+        ("locations + validate",
+         lambda: validate_rows(StoreLocationUpdate, fetch(location_dicts, LocationCursor, locations)),
+         lambda: validate_attributes(StoreLocationUpdate, fetch(location_tuples, LocationCursor, locations))),
+    ]
+
+    print(f"{num_rows} rows (best of 5)        dict rows              namedtuple rows")
+    for label, with_dicts, with_tuples in cases:
+        dict_ms, tuple_ms = time_best(with_dicts), time_best(with_tuples)
+        dict_mib, tuple_mib = peak_mib(with_dicts), peak_mib(with_tuples)
+        print(f"  {label:<22} {dict_ms:7.1f} ms {dict_mib:6.1f} MiB   "
+              f"{tuple_ms:7.1f} ms {tuple_mib:6.1f} MiB   ({dict_ms / tuple_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: GET /stores with 10k stores, legacy vs fast-path serialization
+
+Legacy path (before app/serialization.py):
+- store_service builds StoreResponse(**row) per row
+- FastAPI validates the list again against response_model and json-encodes it
+
+Fast path (current router):
+- rows are validated once through a TypeAdapter
+- pydantic-core renders the JSON bytes, FastAPI passes them through
+
+The repository layer is patched with synthetic rows, so no database is needed.
+Requests send Accept-Encoding: identity: the real app compresses responses
+(GZip/Brotli middleware) and the legacy app doesn't, so compression would
+otherwise be timed on one side only.
+
+Result (CPython 3.13, pydantic 2.12.3, FastAPI 0.119, 10k stores, 20
+iterations per run, single-core Linux container):
+  legacy (double validation)   ~175 ms/request
+  fast path (TypeAdapter)       ~70 ms/request
+  speed-up                      ~2.5x (2.0x-2.5x over three runs; ~2.67x
+                                on a reviewer's machine)
+
+Run from backend/:
+    python -m benchmarks.bench_store_serialization [num_stores] [iterations]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schemas.store_schema import StoreResponse
+
+
+def make_store_rows(count: int) -> List[dict]:
+    """Rows shaped like store_repo.get_all_stores() output"""
+    base_time = datetime(2025, 1, 1, 8, 0, 0)
+    return [
+        {
+            "store_id": 300 + i,
+            "vendor_id": 200 + i,
+            "name": f"Warung {i}",
+            "description": "Aneka makanan kaki lima",
+            "rating": 4.5,
+            "category_id": 1 + i % 5,
+            "address": f"Jl. Pancoran No. {i}",
+            "is_open": i % 3 != 0,
+            "is_halal": True,
+            "open_time": 8,
+            "close_time": 22,
+            "created_at": base_time,
+            "store_image_url": f"/app/uploads/vendors/stores/{i}.jpg",
+            "current_location": {"lat": -6.2443 + i * 1e-5, "lon": 106.8385 + i * 1e-5},
+            "location_updated_at": base_time + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def build_legacy_app() -> FastAPI:
+    """Recreates the route as it was before the fast path"""
+    from app.repositories import store_repo
+
+    legacy = FastAPI()
+
+    @legacy.get("/stores", response_model=List[StoreResponse])
+    async def get_all_stores():
+        stores = store_repo.get_all_stores()
+        return [StoreResponse(**store) for store in stores]
+
+    return legacy
+
+
+def make_client(asgi_app: FastAPI) -> TestClient:
+    """Client asking for uncompressed responses, so both apps do the same work"""
+    return TestClient(asgi_app, headers={"Accept-Encoding": "identity"})
+
+
+def time_requests(client: TestClient, iterations: int) -> float:
+    """Average milliseconds per GET /stores"""
+    client.get("/stores")  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.get("/stores")
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    num_stores = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rows = make_store_rows(num_stores)
+
+    with patch("app.repositories.store_repo.get_all_stores", return_value=rows):
+        legacy_ms = time_requests(make_client(build_legacy_app()), iterations)
+        fast_ms = time_requests(make_client(app), iterations)
+
+    print(f"GET /stores with {num_stores} stores, {iterations} iterations")
+    print(f"  legacy (double validation): {legacy_ms:8.1f} ms/request")
+    print(f"  fast path (TypeAdapter)   : {fast_ms:8.1f} ms/request")
+    print(f"  speed-up                  : {legacy_ms / fast_ms:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Unit tests for the in-memory store activity counters
+
+This file demonstrates:
+- Counting views/impressions without a database, using a fake bulk writer
+- Checking that counts made during a flush go to the next flush
+- Putting deltas back when the bulk write fails
+- Checking that GET /stores/{id} records a view only for existing stores
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.activity import ActivityCounter
+from app.main import app
+
+
+class FakeWriter:
+    """Collects flushed batches; optionally fails or blocks"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, store_ids, views, impressions):
+        self.release.wait(1)
+        if self.fail:
+            raise RuntimeError("database is down")
+        self.batches.append((store_ids, views, impressions))
+        return len(store_ids)
+
+
+class TestActivityCounter:
+    """Tests for counting and bulk flushing"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_all_touched_stores_in_one_batch(self):
+        # Arrange
+        writer = FakeWriter()
+        counter = ActivityCounter(writer)
+        counter.record_view(7)
+        counter.record_view(7)
+        counter.record_impressions([7, 3, 3])
+
+        # Act
+        written = await counter.flush()
+
+        # Assert
+        assert written == 2
+        assert writer.batches == [([3, 7], [0, 2], [2, 1])]
+        assert counter.pending() == 0
+        assert await counter.flush() == 0  # nothing new, no write
+        assert len(writer.batches) == 1
+
+    @pytest.mark.asyncio
+    async def test_counts_during_a_flush_go_to_the_next_one(self):
+        # Arrange: the write blocks until released
+        writer = FakeWriter()
+        writer.release.clear()
+        counter = ActivityCounter(writer)
+        counter.record_view(1)
+
+        # Act
+        flushing = asyncio.create_task(counter.flush())
+        await asyncio.sleep(0.01)
+        counter.record_view(1)
+        writer.release.set()
+        await flushing
+        await counter.flush()
+
+        # Assert
+        assert writer.batches == [([1], [1], [0]), ([1], [1], [0])]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_the_counts(self):
+        # Arrange
+        writer = FakeWriter(fail=True)
+        counter = ActivityCounter(writer)
+        counter.record_view(5)
+
+        # Act
+        with pytest.raises(RuntimeError):
+            await counter.flush()
+        counter.record_view(5)
+        writer.fail = False
+        await counter.flush()
+
+        # Assert
+        assert writer.batches == [([5], [2], [0])]
+        assert counter.stats()["flushed_views"] == 2
+
+
+class TestStoreDetailViews:
+    """Tests for view counting on GET /stores/{id}"""
+
+    @patch('app.routers.store_router.store_activity.record_view')
+    @patch('app.services.store_service.store_repo.get_store_with_menu')
+    def test_only_found_stores_count_a_view(self, mock_get_store, mock_record_view, sample_store):
+        # Arrange
+        mock_get_store.side_effect = lambda store_id: (
+            {**sample_store, "store_id": store_id, "created_at": "2025-01-01T00:00:00"} if store_id == 301 else None
+        )
+        client = TestClient(app)
+
+        # Act
+        found = client.get("/stores/301")
+        missing = client.get("/stores/999")
+
+        # Assert
+        assert found.status_code == 200
+        assert missing.status_code == 404
+        mock_record_view.assert_called_once_with(301)
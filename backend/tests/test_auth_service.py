@@ -8,6 +8,7 @@ This file demonstrates:
 - Parametrized tests for multiple scenarios
 """
 
+import threading
 import pytest
 from unittest.mock import Mock, patch
 from fastapi import HTTPException
@@ -15,8 +16,10 @@ from datetime import datetime
 from app.services.auth_service import (
     service_register,
     service_login,
+    service_refresh,
     service_verify_email
 )
+from app.security import hash_refresh_token
 from app.schemas.user_schema import User
 
 
@@ -54,10 +57,12 @@ def mock_existing_user_tuple():
 class TestServiceRegister:
     """Tests for user registration service"""
     
+    @pytest.mark.asyncio
+    @patch('app.services.auth_service.insert_refresh_token')
     @patch('app.services.auth_service.get_user_by_email')
     @patch('app.services.auth_service.insert_user')
     @patch('app.services.auth_service.hash_password')
-    def test_register_success(self, mock_hash, mock_insert, mock_get_user):
+    async def test_register_success(self, mock_hash, mock_insert, mock_get_user, mock_insert_refresh):
         """
         Test successful user registration
         
@@ -81,7 +86,7 @@ class TestServiceRegister:
         }
         
         # Act
-        result = service_register(
+        result = await service_register(
             email="newuser@example.com",
             password="MyPassword123",
             full_name="New User"
@@ -98,9 +103,12 @@ class TestServiceRegister:
         mock_get_user.assert_called_once_with("newuser@example.com")
         mock_hash.assert_called_once_with("MyPassword123")
         mock_insert.assert_called_once()
+        mock_insert_refresh.assert_called_once()
+        assert result.refresh_token is not None
     
+    @pytest.mark.asyncio
     @patch('app.services.auth_service.get_user_by_email')
-    def test_register_fails_with_duplicate_email(self, mock_get_user, mock_user_data):
+    async def test_register_fails_with_duplicate_email(self, mock_get_user, mock_user_data):
         """Test that registration fails if email already exists"""
         # Arrange
         mock_get_user.return_value = (
@@ -114,7 +122,7 @@ class TestServiceRegister:
         
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            service_register(
+            await service_register(
                 email=mock_user_data["email"],
                 password="AnyPassword",
                 full_name="Any Name"
@@ -123,10 +131,11 @@ class TestServiceRegister:
         assert exc_info.value.status_code == 400
         assert "already registered" in exc_info.value.detail.lower()
     
+    @pytest.mark.asyncio
     @patch('app.services.auth_service.get_user_by_email')
     @patch('app.services.auth_service.insert_user')
     @patch('app.services.auth_service.hash_password')
-    def test_register_fails_when_database_error(self, mock_hash, mock_insert, mock_get_user):
+    async def test_register_fails_when_database_error(self, mock_hash, mock_insert, mock_get_user):
         """Test that registration fails gracefully on database errors"""
         # Arrange
         mock_get_user.return_value = None
@@ -138,7 +147,7 @@ class TestServiceRegister:
         
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            service_register(
+            await service_register(
                 email="test@example.com",
                 password="password123",
                 full_name="Test User"
@@ -153,16 +162,18 @@ class TestServiceRegister:
 class TestServiceLogin:
     """Tests for user login service"""
     
+    @pytest.mark.asyncio
+    @patch('app.services.auth_service.insert_refresh_token')
     @patch('app.services.auth_service.get_user_by_email')
     @patch('app.services.auth_service.verify_password')
-    def test_login_success(self, mock_verify, mock_get_user, mock_existing_user_tuple):
+    async def test_login_success(self, mock_verify, mock_get_user, mock_insert_refresh, mock_existing_user_tuple):
         """Test successful login with correct credentials"""
         # Arrange
         mock_get_user.return_value = mock_existing_user_tuple
         mock_verify.return_value = True  # Password is correct
         
         # Act
-        result = service_login(
+        result = await service_login(
             email="test@example.com",
             password="correctPassword"
         )
@@ -176,16 +187,92 @@ class TestServiceLogin:
         
         # Verify password was checked
         mock_verify.assert_called_once_with("correctPassword", mock_existing_user_tuple[2])
+
+        # Only the digest of the refresh token is stored
+        stored_user_id, stored_hash, _ = mock_insert_refresh.call_args[0]
+        assert stored_user_id == 123
+        assert stored_hash != result.refresh_token
+        assert len(stored_hash) == 64
     
+    @pytest.mark.asyncio
+    @patch('app.services.auth_service.insert_refresh_token')
+    @patch('app.services.auth_service.get_user_by_email')
+    @patch('app.services.auth_service.verify_password')
+    async def test_only_bcrypt_runs_in_the_password_pool(
+        self, mock_verify, mock_get_user, mock_insert_refresh, mock_existing_user_tuple
+    ):
+        """DB calls stay on the normal threadpool, so hash workers never hold a connection"""
+        # Arrange
+        threads = {}
+
+        def record(name, result):
+            def side_effect(*args):
+                threads[name] = threading.current_thread().name
+                return result
+            return side_effect
+
+        mock_get_user.side_effect = record("lookup", mock_existing_user_tuple)
+        mock_verify.side_effect = record("verify", True)
+        mock_insert_refresh.side_effect = record("insert", None)
+
+        # Act
+        await service_login(email="test@example.com", password="correctPassword")
+
+        # Assert
+        assert threads["verify"].startswith("password-hash")
+        assert not threads["lookup"].startswith("password-hash")
+        assert not threads["insert"].startswith("password-hash")
+
+    @pytest.mark.asyncio
+    @patch('app.services.auth_service.insert_refresh_token')
+    @patch('app.services.auth_service.get_user_by_email')
+    @patch('app.services.auth_service.verify_password')
+    @patch('app.services.auth_service.needs_rehash')
+    @patch('app.services.auth_service.schedule_password_rehash')
+    async def test_login_schedules_rehash_for_outdated_hash(
+        self, mock_schedule, mock_needs_rehash, mock_verify, mock_get_user, mock_insert_refresh,
+        mock_existing_user_tuple
+    ):
+        """A successful login with a weak stored hash queues an upgrade"""
+        # Arrange
+        mock_get_user.return_value = mock_existing_user_tuple
+        mock_verify.return_value = True
+        mock_needs_rehash.return_value = True
+
+        # Act
+        await service_login(email="test@example.com", password="correctPassword")
+
+        # Assert
+        mock_schedule.assert_called_once_with(123, "correctPassword")
+
+    @pytest.mark.asyncio
     @patch('app.services.auth_service.get_user_by_email')
-    def test_login_fails_with_non_existent_email(self, mock_get_user):
+    @patch('app.services.auth_service.verify_password')
+    @patch('app.services.auth_service.schedule_password_rehash')
+    async def test_login_with_wrong_password_never_rehashes(
+        self, mock_schedule, mock_verify, mock_get_user, mock_existing_user_tuple
+    ):
+        """Hashes are only upgraded after the password has been verified"""
+        # Arrange
+        mock_get_user.return_value = mock_existing_user_tuple
+        mock_verify.return_value = False
+
+        # Act & Assert
+        with pytest.raises(HTTPException):
+            await service_login(email="test@example.com", password="wrongPassword")
+
+        mock_schedule.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.services.auth_service.get_user_by_email')
+    async def test_login_fails_with_non_existent_email(self, mock_get_user):
         """Test that login fails for non-existent email"""
         # Arrange
         mock_get_user.return_value = None  # User not found
         
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            service_login(
+            await service_login(
                 email="nonexistent@example.com",
                 password="anyPassword"
             )
@@ -193,9 +280,10 @@ class TestServiceLogin:
         assert exc_info.value.status_code == 401
         assert "Invalid email or password" in exc_info.value.detail
     
+    @pytest.mark.asyncio
     @patch('app.services.auth_service.get_user_by_email')
     @patch('app.services.auth_service.verify_password')
-    def test_login_fails_with_wrong_password(self, mock_verify, mock_get_user, mock_existing_user_tuple):
+    async def test_login_fails_with_wrong_password(self, mock_verify, mock_get_user, mock_existing_user_tuple):
         """Test that login fails with incorrect password"""
         # Arrange
         mock_get_user.return_value = mock_existing_user_tuple
@@ -203,7 +291,7 @@ class TestServiceLogin:
         
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            service_login(
+            await service_login(
                 email="test@example.com",
                 password="wrongPassword"
             )
@@ -211,13 +299,14 @@ class TestServiceLogin:
         assert exc_info.value.status_code == 401
         assert "Invalid email or password" in exc_info.value.detail
     
+    @pytest.mark.asyncio
     @pytest.mark.parametrize("email,password", [
         ("", "password123"),  # Empty email
         ("test@example.com", ""),  # Empty password
         ("", ""),  # Both empty
     ])
     @patch('app.services.auth_service.get_user_by_email')
-    def test_login_with_empty_credentials(self, mock_get_user, email, password):
+    async def test_login_with_empty_credentials(self, mock_get_user, email, password):
         """
         Parametrized test: test multiple scenarios with one test function
         Tests that login fails with empty email/password
@@ -227,7 +316,48 @@ class TestServiceLogin:
         
         # Act & Assert
         with pytest.raises(HTTPException):
-            service_login(email=email, password=password)
+            await service_login(email=email, password=password)
+
+
+# ===== REFRESH TOKEN TESTS =====
+
+class TestServiceRefresh:
+    """Tests for refresh token rotation"""
+
+    @patch('app.services.auth_service.rotate_refresh_token')
+    def test_refresh_rotates_token_and_returns_fresh_user(self, mock_rotate):
+        """The presented token is spent and a different one is issued"""
+        # Arrange
+        mock_rotate.return_value = {
+            "user_id": 123,
+            "email": "test@example.com",
+            "full_name": "Renamed User",
+            "created_at": datetime(2024, 1, 1),
+            "is_verified": True
+        }
+
+        # Act
+        result = service_refresh("old-refresh-token")
+
+        # Assert
+        old_hash, new_hash, _ = mock_rotate.call_args[0]
+        assert old_hash == hash_refresh_token("old-refresh-token")
+        assert new_hash == hash_refresh_token(result.refresh_token)
+        assert result.refresh_token != "old-refresh-token"
+        assert result.user.full_name == "Renamed User"
+        assert result.user.is_verified is True
+
+    @patch('app.services.auth_service.rotate_refresh_token')
+    def test_refresh_fails_for_unknown_or_spent_token(self, mock_rotate):
+        """Unknown, expired, revoked or reused tokens get a 401"""
+        # Arrange
+        mock_rotate.return_value = None
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            service_refresh("spent-token")
+
+        assert exc_info.value.status_code == 401
 
 
 # ===== EMAIL VERIFICATION TESTS =====
@@ -0,0 +1,133 @@
+"""
+Unit tests for periodic background tasks and the store status sweep
+
+This file demonstrates:
+- Testing an asyncio loop with a tiny interval
+- Mocking the repository behind a background job
+"""
+
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from app.background import PeriodicTask
+from app.services.store_service import get_status_changes, sweep_store_status
+
+
+class TestPeriodicTask:
+    """Tests for the lifespan background task runner"""
+
+    @pytest.mark.asyncio
+    async def test_runs_repeatedly_until_stopped(self):
+        """The job runs every interval and stop() cancels the loop"""
+        # Arrange
+        calls = []
+        task = PeriodicTask("test", 0.01, lambda: calls.append(1))
+
+        # Act
+        task.start()
+        await asyncio.sleep(0.1)
+        await task.stop()
+        runs_at_stop = len(calls)
+        await asyncio.sleep(0.05)
+
+        # Assert
+        assert runs_at_stop >= 2
+        assert len(calls) == runs_at_stop
+        assert task.stats()["running"] is False
+
+    @pytest.mark.asyncio
+    async def test_async_jobs_run_on_the_event_loop(self):
+        """A coroutine function is awaited instead of sent to a thread"""
+        # Arrange
+        loop_thread = threading.get_ident()
+        seen = []
+
+        async def job():
+            seen.append(threading.get_ident())
+            return "flushed"
+
+        task = PeriodicTask("test", 60, job)
+
+        # Act
+        result = await task.run_once()
+
+        # Assert
+        assert result == "flushed"
+        assert seen == [loop_thread]
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded_not_raised(self):
+        """A failing sweep is logged and retried on the next tick"""
+        # Arrange
+        def broken():
+            raise RuntimeError("database is down")
+
+        task = PeriodicTask("test", 60, broken)
+
+        # Act
+        result = await task.run_once()
+
+        # Assert
+        assert result is None
+        assert task.stats()["failures"] == 1
+        assert task.stats()["last_error"] == "database is down"
+
+
+class TestStoreStatusSweep:
+    """Tests for publishing store online/offline changes"""
+
+    @patch('app.services.store_service.store_repo.sweep_store_online_status')
+    def test_sweep_returns_only_changed_ids(self, mock_sweep):
+        """The repository's RETURNING rows are the changed stores"""
+        # Arrange
+        mock_sweep.return_value = [
+            {"store_id": 301, "is_online": True},
+            {"store_id": 303, "is_online": False},
+        ]
+
+        # Act
+        changed = sweep_store_status()
+
+        # Assert
+        assert changed == [301, 303]
+        heartbeat_seconds, tz = mock_sweep.call_args[0]
+        assert heartbeat_seconds > 0
+        assert tz == "Asia/Jakarta"
+
+    @patch('app.services.store_service.store_repo.get_store_status_changes')
+    def test_until_comes_from_the_database_cursor(self, mock_changes):
+        """`until` is the lagged database clock, not the newest change returned"""
+        # Arrange
+        since = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        changed = datetime(2025, 1, 1, 12, 0, 30, tzinfo=timezone.utc)
+        cursor = datetime(2025, 1, 1, 12, 0, 50, tzinfo=timezone.utc)
+        mock_changes.return_value = {
+            "changes": [{"store_id": 302, "is_online": False, "online_changed_at": changed}],
+            "until": cursor,
+        }
+
+        # Act
+        result = get_status_changes(since)
+
+        # Assert
+        assert [change.store_id for change in result.changes] == [302]
+        assert result.until == cursor
+        requested_since, lag_seconds = mock_changes.call_args[0]
+        assert requested_since == since
+        assert lag_seconds > 0
+
+    @patch('app.services.store_service.store_repo.get_store_status_changes')
+    def test_no_changes_still_returns_the_cursor(self, mock_changes):
+        """An empty poll passes the database cursor through unchanged"""
+        # Arrange
+        since = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        mock_changes.return_value = {"changes": [], "until": since}
+
+        # Act
+        result = get_status_changes(since)
+
+        # Assert
+        assert result.changes == []
+        assert result.until == since
@@ -0,0 +1,59 @@
+"""
+Unit tests for the repository row factories
+
+This file demonstrates:
+- Driving a psycopg row factory with a stand-in cursor description
+- Checking rows are built positionally into namedtuples
+"""
+
+from collections import namedtuple
+from types import SimpleNamespace
+import pytest
+from app.database import Point, point_namedtuple_row
+from app.repositories.vendor_repo import StoreLocationRow
+
+
+def cursor_for(*names):
+    return SimpleNamespace(description=[SimpleNamespace(name=name) for name in names])
+
+
+LOCATION_COLUMNS = ("store_id", "lat", "lon", "location_updated_at", "speed_mps", "heading_deg")
+
+
+class TestPointNamedtupleRow:
+    """Tests for folding lat/lon into a Point on namedtuple rows"""
+
+    def test_lat_lon_become_one_point(self):
+        """The two coordinate columns collapse into current_location"""
+        # Arrange
+        make_row = point_namedtuple_row(StoreLocationRow)(cursor_for(*LOCATION_COLUMNS))
+
+        # Act
+        row = make_row((301, -6.2443, 106.8385, None, 1.2, 90.0))
+
+        # Assert
+        assert row == StoreLocationRow(301, Point(-6.2443, 106.8385), None, 1.2, 90.0)
+        assert row.current_location.lat == -6.2443
+
+    def test_missing_coordinate_gives_no_point(self):
+        """Either coordinate being NULL means no location"""
+        # Arrange
+        make_row = point_namedtuple_row(StoreLocationRow)(cursor_for(*LOCATION_COLUMNS))
+
+        # Act
+        row = make_row((301, -6.2443, None, None, 0.0, None))
+
+        # Assert
+        assert row.current_location is None
+
+    def test_columns_must_match_the_row_type(self):
+        """A query whose columns drift from the row type fails as soon as it runs"""
+        # Arrange
+        Row = namedtuple("Row", ["store_id", "current_location"])
+        factory = point_namedtuple_row(Row)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            factory(cursor_for("store_id", "lat", "lon", "name"))
+        with pytest.raises(ValueError):
+            factory(cursor_for("store_id", "lon", "lat"))
@@ -0,0 +1,119 @@
+"""
+Unit tests for the image variant pipeline (thumbnails, WebP)
+
+This file demonstrates:
+- Skipping tests when an optional dependency (Pillow) is missing
+- Testing file-producing functions against pytest's tmp_path
+- Running the background pipeline on thread pools to check where its DB write happens
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+from app.worker_pool import BoundedWorkerPool
+from app.images import (
+    IMAGE_VARIANT_SIZES,
+    local_upload_path,
+    render_variants,
+    schedule_image_variants,
+    variant_urls,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+class TestRenderVariants:
+    """Tests for the worker-side rendering"""
+
+    def test_variants_fit_their_size_and_are_webp(self, tmp_path):
+        """Each variant is WebP and its longest edge is at most the configured size"""
+        # Arrange
+        source = tmp_path / "store.jpg"
+        Image.new("RGB", (2400, 1200), (200, 120, 40)).save(source, "JPEG")
+
+        # Act
+        variants = render_variants(str(source), str(tmp_path / "variants"), "store")
+
+        # Assert
+        assert set(variants) == set(IMAGE_VARIANT_SIZES)
+        for name, filename in variants.items():
+            with Image.open(tmp_path / "variants" / filename) as variant:
+                assert variant.format == "WEBP"
+                assert max(variant.size) == IMAGE_VARIANT_SIZES[name]
+                assert variant.size[0] == 2 * variant.size[1]  # aspect ratio kept
+
+    def test_small_images_are_not_upscaled(self, tmp_path):
+        """A 100px image stays 100px in every variant"""
+        # Arrange
+        source = tmp_path / "menu.png"
+        Image.new("RGBA", (100, 80), (0, 0, 0, 0)).save(source, "PNG")
+
+        # Act
+        variants = render_variants(str(source), str(tmp_path / "variants"), "menu")
+
+        # Assert
+        with Image.open(tmp_path / "variants" / variants["thumb"]) as thumb:
+            assert thumb.size == (100, 80)
+
+
+class TestVariantHelpers:
+    """Tests for URL/path mapping and scheduling guards"""
+
+    def test_remote_and_traversal_urls_are_not_local(self):
+        """Only existing files under the uploads folder are processed"""
+        assert local_upload_path("https://example.com/stores/sate.jpg") is None
+        assert local_upload_path("assets/default_store_image.jpg") is None
+        assert local_upload_path("/app/uploads/../main.py") is None
+        assert local_upload_path(None) is None
+
+    def test_variant_urls_sit_next_to_original(self):
+        """Variant URLs use a variants/ folder beside the original image"""
+        # Act
+        urls = variant_urls("/app/uploads/vendors/stores/12_store_ab.jpg", {"thumb": "12_store_ab_thumb.webp"})
+
+        # Assert
+        assert urls == {"thumb": "/app/uploads/vendors/stores/variants/12_store_ab_thumb.webp"}
+
+    @patch('app.images.image_pool')
+    def test_remote_image_is_not_scheduled(self, mock_pool):
+        """Stores pointing at external images get no background job"""
+        # Act
+        scheduled = schedule_image_variants("store", 301, "https://example.com/stores/sate.jpg")
+
+        # Assert
+        assert scheduled is False
+        mock_pool.submit_background.assert_not_called()
+
+
+class TestScheduleImageVariants:
+    """Tests for the render -> save pipeline"""
+
+    def test_variants_are_saved_outside_the_executor_callback(self, tmp_path):
+        """The DB write runs in image_save_pool, not on the render pool's callback thread"""
+        # Arrange
+        (tmp_path / "vendors").mkdir()
+        Image.new("RGB", (800, 600)).save(tmp_path / "vendors" / "12_store_ab.jpg", "JPEG")
+        render_pool = BoundedWorkerPool("render", 1, 0)
+        save_pool = BoundedWorkerPool("save", 1, 0)
+        saved = threading.Event()
+        calls = []
+
+        def record_save(kind, row_id, image_url, variants):
+            calls.append((threading.current_thread().name, kind, row_id, sorted(variants)))
+            saved.set()
+
+        # Act
+        with patch('app.images.UPLOAD_ROOT', tmp_path), \
+                patch('app.images.image_pool', render_pool), \
+                patch('app.images.image_save_pool', save_pool), \
+                patch('app.images._save_variants', side_effect=record_save):
+            scheduled = schedule_image_variants("store", 12, "/app/uploads/vendors/12_store_ab.jpg")
+            assert saved.wait(10)
+
+        # Assert
+        render_pool.shutdown()
+        save_pool.shutdown()
+        assert scheduled is True
+        thread_name, kind, row_id, names = calls[0]
+        assert thread_name.startswith("save")
+        assert (kind, row_id, names) == ("store", 12, sorted(IMAGE_VARIANT_SIZES))
@@ -0,0 +1,275 @@
+"""
+Unit tests for the self-hosted routing service
+
+This file demonstrates:
+- Building a small synthetic road graph instead of loading a city extract
+- Parsing a tiny OSM XML file written to tmp_path
+- Using weak references to check that parsed elements are freed
+- Checking that a cache hit skips the path search
+- Mocking the store locations repository
+"""
+
+import gc
+import io
+import weakref
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from app.database import Point
+from app.repositories.vendor_repo import StoreLocationRow
+from app.services import maps_service
+from app.services.maps_service import (
+    ROUTING_PROFILES,
+    build_road_graph,
+    get_nearest_vendors,
+    get_route,
+    parse_lat_lon,
+    parse_osm,
+    set_road_graph,
+)
+
+# Four corners of a ~550 m square near Sampoerna University
+#   1 ---- 2
+#   |      |
+#   4 ---- 3
+NODES = {
+    1: (-6.2400, 106.8380),
+    2: (-6.2400, 106.8430),
+    3: (-6.2450, 106.8430),
+    4: (-6.2450, 106.8380),
+}
+SLOW = 10 / 3.6
+FAST = 50 / 3.6
+
+OSM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="-6.2400" lon="106.8380"/>
+  <node id="2" lat="-6.2400" lon="106.8430"/>
+  <node id="3" lat="-6.2450" lon="106.8430"/>
+  <node id="9" lat="-6.3000" lon="106.9000"><tag k="amenity" v="cafe"/></node>
+  <way id="100">
+    <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+    <tag k="highway" v="residential"/>
+    <tag k="oneway" v="yes"/>
+  </way>
+  <way id="101">
+    <nd ref="1"/><nd ref="3"/>
+    <tag k="highway" v="footway"/>
+  </way>
+</osm>
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_loaded_graph():
+    """Each test starts (and ends) with no graphs and empty caches"""
+    for profile in ROUTING_PROFILES:
+        set_road_graph(None, profile)
+    yield
+    for profile in ROUTING_PROFILES:
+        set_road_graph(None, profile)
+
+
+def store_at(store_id, node):
+    return StoreLocationRow(store_id, Point(*NODES[node]), None, 0.0, None)
+
+
+class TestRoadGraph:
+    """Tests for snapping and A* on a synthetic graph"""
+
+    def test_faster_road_wins_over_shorter_one(self):
+        """A* minimizes travel time, not distance"""
+        # Arrange: 1-4 is a slow lane, 1-2-3-4 is a fast ring road
+        graph = build_road_graph(NODES, [([1, 4], SLOW, 0), ([1, 2, 3, 4], FAST, 0)])
+
+        # Act
+        nodes, meters, seconds = graph.shortest_path(0, graph.nearest_node(*NODES[4]))
+
+        # Assert
+        assert len(nodes) == 4
+        assert meters == pytest.approx(1650, rel=0.05)
+        assert seconds == pytest.approx(meters / FAST)
+
+    def test_oneway_streets_are_respected(self):
+        """A oneway way can only be driven in its direction"""
+        # Arrange
+        graph = build_road_graph(NODES, [([1, 2], SLOW, 1)])
+        start, end = graph.nearest_node(*NODES[1]), graph.nearest_node(*NODES[2])
+
+        # Act & Assert
+        assert graph.shortest_path(start, end) is not None
+        assert graph.shortest_path(end, start) is None
+
+    def test_points_far_from_any_road_do_not_snap(self):
+        """Snapping gives up beyond the configured distance"""
+        # Arrange
+        graph = build_road_graph(NODES, [([1, 2], SLOW, 0)])
+
+        # Act & Assert
+        assert graph.nearest_node(-6.2401, 106.8381) == 0
+        assert graph.nearest_node(-6.3000, 106.9000, max_meters=500) is None
+
+    def test_nearest_targets_come_in_eta_order_and_stop_at_k(self):
+        """Items are settled fastest first and the search stops after k"""
+        # Arrange: ring 1-2-3-4-1
+        graph = build_road_graph(NODES, [([1, 2, 3, 4, 1], SLOW, 0)])
+        node = {osm_id: graph.nearest_node(*NODES[osm_id]) for osm_id in NODES}
+        targets = {node[3]: [303], node[2]: [302, 312]}
+
+        # Act
+        found = graph.nearest_targets(node[1], targets, k=2)
+
+        # Assert
+        assert [item for item, _, _ in found] == [302, 312]
+        assert found[0][2] == pytest.approx(found[0][1] / SLOW)
+
+    def test_nearest_targets_respects_time_limit(self):
+        """Targets beyond max_seconds are not returned"""
+        # Arrange
+        graph = build_road_graph(NODES, [([1, 2, 3], SLOW, 0)])
+        targets = {graph.nearest_node(*NODES[3]): [303]}
+
+        # Act & Assert
+        assert graph.nearest_targets(0, targets, k=5, max_seconds=60) == []
+
+
+class TestParseOsm:
+    """Tests for reading an OSM XML extract"""
+
+    @pytest.mark.parametrize("filename,opener", [
+        ("roads.osm", open),
+        ("roads.osm.gz", "gzip"),
+    ])
+    def test_each_profile_keeps_its_own_ways(self, tmp_path, filename, opener):
+        """Footways are walking-only, oneway only binds driving, unrelated nodes are dropped"""
+        # Arrange
+        path = tmp_path / filename
+        if opener == "gzip":
+            import gzip
+            with gzip.open(path, "wt") as out:
+                out.write(OSM_XML)
+        else:
+            path.write_text(OSM_XML)
+
+        # Act
+        graphs = parse_osm(str(path))
+
+        # Assert
+        assert len(graphs["driving"]) == 3  # nodes 1, 2, 3; not the cafe
+        assert graphs["driving"].edge_count == 2  # oneway 1->2->3, footway ignored
+        assert graphs["walking"].edge_count == 6  # both ways on the street and the footway
+
+    def test_finished_elements_are_not_kept(self):
+        """Elements are dropped from the document root once they have been handled"""
+        # Arrange
+        source = io.BytesIO(OSM_XML.encode())
+        tags = []
+        previous = None
+        still_alive = []
+
+        # Act - while parsing, the element before the current one must be gone
+        for element in maps_service._iter_osm_elements(source):
+            tags.append(element.tag)
+            gc.collect()
+            if previous is not None and previous() is not None:
+                still_alive.append(tags[-2])
+            previous = weakref.ref(element)
+
+        # Assert
+        assert tags[:2] == ["node", "node"]
+        assert "way" in tags
+        assert still_alive == []
+
+
+class TestGetRoute:
+    """Tests for the cached route lookup"""
+
+    def test_unavailable_without_a_graph(self):
+        """503 until an extract has been loaded"""
+        with pytest.raises(HTTPException) as exc_info:
+            get_route(-6.24, 106.838, -6.245, 106.843)
+
+        assert exc_info.value.status_code == 503
+
+    def test_nearby_requests_share_a_cached_route(self):
+        """Endpoints snapping to the same nodes reuse the first result"""
+        # Arrange
+        graph = build_road_graph(NODES, [([1, 2, 3], SLOW, 0)])
+        set_road_graph(graph)
+
+        # Act
+        with patch.object(graph, "shortest_path", wraps=graph.shortest_path) as spy:
+            first = get_route(-6.2400, 106.8380, -6.2450, 106.8430)
+            second = get_route(-6.2401, 106.8381, -6.2449, 106.8429)
+
+        # Assert
+        assert first is second
+        assert spy.call_count == 1
+        assert first["coordinates"][0] == [106.8380, -6.2400]
+        assert first["coordinates"][-1] == [106.8430, -6.2450]
+        assert first["duration"] > first["distance"] / FAST
+
+    def test_off_network_point_has_no_route(self):
+        """None (404 in the router) when an endpoint can't be snapped"""
+        # Arrange
+        set_road_graph(build_road_graph(NODES, [([1, 2], SLOW, 0)]))
+
+        # Act & Assert
+        assert get_route(-6.2400, 106.8380, -7.0, 110.0) is None
+
+    def test_loading_a_missing_extract_disables_routing(self, tmp_path):
+        """A missing file is not an error at startup"""
+        assert maps_service.load_road_graph(str(tmp_path / "missing.osm")) == {}
+
+
+class TestGetNearestVendors:
+    """Tests for ranking carts by ETA"""
+
+    @patch('app.services.maps_service.vendor_repo.get_store_location_rows')
+    def test_ranks_by_travel_time_not_straight_line(self, mock_locations):
+        """Two carts equally far in a straight line are ordered by the walk"""
+        # Arrange: 2 and 4 are both ~550 m from 1, but 4 is only reachable via 2 and 3
+        set_road_graph(build_road_graph(NODES, [([4, 3, 2, 1], SLOW, 0)]), "walking")
+        mock_locations.return_value = [store_at(304, 4), store_at(302, 2)]
+
+        # Act
+        nearest = get_nearest_vendors(*NODES[1], k=5)
+
+        # Assert
+        assert [row["store_id"] for row in nearest] == [302, 304]
+        assert nearest[0]["duration"] < nearest[1]["duration"]
+        mock_locations.assert_called_once_with(online_only=True)
+
+    @patch('app.services.maps_service.vendor_repo.get_store_location_rows')
+    def test_same_cell_is_served_from_cache(self, mock_locations):
+        """A second user a few meters away costs no search or query"""
+        # Arrange
+        set_road_graph(build_road_graph(NODES, [([1, 2], SLOW, 0)]), "walking")
+        mock_locations.return_value = [store_at(302, 2)]
+
+        # Act
+        first = get_nearest_vendors(-6.24001, 106.83801, k=3)
+        second = get_nearest_vendors(-6.24002, 106.83802, k=3)
+
+        # Assert
+        assert first is second
+        mock_locations.assert_called_once()
+
+    def test_unavailable_without_a_walking_graph(self):
+        """503 until the walking graph is loaded"""
+        with pytest.raises(HTTPException) as exc_info:
+            get_nearest_vendors(-6.24, 106.838)
+
+        assert exc_info.value.status_code == 503
+
+
+class TestParseLatLon:
+    """Tests for the ?from= / ?to= format"""
+
+    def test_valid_point(self):
+        assert parse_lat_lon("-6.2443,106.8385") == (-6.2443, 106.8385)
+
+    @pytest.mark.parametrize("text", ["-6.2443", "abc,def", "95,106", "-6.2,106.8,1"])
+    def test_invalid_points(self, text):
+        with pytest.raises(ValueError):
+            parse_lat_lon(text)
@@ -0,0 +1,224 @@
+"""
+Unit tests for the auth rate limiter (token buckets)
+
+This file demonstrates:
+- Injecting a fake clock instead of sleeping
+- Testing 429 responses and Retry-After headers
+- Checking which buckets a login attempt is charged to
+"""
+
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from app import rate_limit
+from app.rate_limit import (
+    MemoryBucketStore,
+    RateLimiter,
+    enforce_login_rate_limit,
+    enforce_register_rate_limit,
+    normalize_email,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    # 3 attempts, refilling one every 10 seconds
+    return RateLimiter("test", capacity=3, per_seconds=30, store=MemoryBucketStore(ttl=30, clock=clock))
+
+
+class TestRateLimiter:
+    """Tests for per-key token buckets"""
+
+    @pytest.mark.asyncio
+    async def test_allows_burst_up_to_capacity(self, limiter):
+        """A fresh key can spend the whole bucket at once"""
+        # Act & Assert
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_empty_with_retry_after(self, limiter):
+        """The request after the burst gets a 429 saying when to retry"""
+        # Arrange
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.hit("10.0.0.1")
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "10"
+        assert limiter.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_bucket_refills_over_time(self, limiter, clock):
+        """One token comes back per refill interval"""
+        # Arrange
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+        # Act
+        clock.now += 10
+        await limiter.hit("10.0.0.1")
+
+        # Assert - only one token came back
+        with pytest.raises(HTTPException):
+            await limiter.hit("10.0.0.1")
+
+    @pytest.mark.asyncio
+    async def test_keys_have_separate_buckets(self, limiter):
+        """One noisy client does not throttle another"""
+        # Arrange
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+        # Act & Assert
+        await limiter.hit("10.0.0.2")
+
+    @pytest.mark.asyncio
+    async def test_idle_bucket_expires_as_full(self, limiter, clock):
+        """After a full refill period the key starts over with a full bucket"""
+        # Arrange
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+        # Act
+        clock.now += 31
+
+        # Assert
+        for _ in range(3):
+            await limiter.hit("10.0.0.1")
+
+
+def test_normalize_email_ignores_case_and_spaces():
+    """Variants of one address share a bucket"""
+    assert normalize_email("  Test@Example.COM ") == "test@example.com"
+
+
+class TestLoginRateLimit:
+    """Tests for the buckets behind /auth/login"""
+
+    @pytest.fixture(autouse=True)
+    def limiters(self, clock):
+        def make(name, capacity, per_seconds):
+            return RateLimiter(name, capacity, per_seconds, store=MemoryBucketStore(ttl=per_seconds, clock=clock))
+
+        with patch.object(rate_limit, "login_ip_limiter", make("ip", 100, 60)), \
+                patch.object(rate_limit, "login_account_limiter", make("email-ip", 3, 300)), \
+                patch.object(rate_limit, "login_email_limiter", make("email", 10, 3600)):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_guessing_from_one_ip_is_throttled(self):
+        # Arrange
+        for _ in range(3):
+            await enforce_login_rate_limit("10.0.0.9", "victim@example.com")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await enforce_login_rate_limit("10.0.0.9", "Victim@Example.com")
+        assert exc_info.value.status_code == 429
+
+    @pytest.mark.asyncio
+    async def test_attacker_cannot_lock_out_the_owner(self):
+        """Exhausting the strict bucket from one IP leaves the owner's IP alone"""
+        # Arrange
+        for _ in range(3):
+            await enforce_login_rate_limit("10.0.0.9", "victim@example.com")
+
+        # Act & Assert - no 429 for the owner
+        await enforce_login_rate_limit("192.168.1.20", "victim@example.com")
+
+    @pytest.mark.asyncio
+    async def test_guessing_from_many_ips_hits_the_email_ceiling(self):
+        # Arrange
+        for i in range(10):
+            await enforce_login_rate_limit(f"10.0.1.{i}", "victim@example.com")
+
+        # Act & Assert
+        with pytest.raises(HTTPException):
+            await enforce_login_rate_limit("10.0.2.1", "victim@example.com")
+
+
+class TestRegisterRateLimit:
+    """Tests for the buckets behind /auth/register"""
+
+    @pytest.fixture(autouse=True)
+    def limiters(self, clock):
+        def make(name, capacity, per_seconds):
+            return RateLimiter(name, capacity, per_seconds, store=MemoryBucketStore(ttl=per_seconds, clock=clock))
+
+        with patch.object(rate_limit, "register_ip_limiter", make("ip", 100, 3600)), \
+                patch.object(rate_limit, "register_email_limiter", make("email", 2, 3600)):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_one_email_from_many_ips_is_throttled(self):
+        """Rotating IPs does not get around the per-email bucket"""
+        # Arrange
+        await enforce_register_rate_limit("10.0.0.1", "new@example.com")
+        await enforce_register_rate_limit("10.0.0.2", "new@example.com")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await enforce_register_rate_limit("10.0.0.3", " New@Example.com")
+        assert exc_info.value.status_code == 429
+
+    @pytest.mark.asyncio
+    async def test_other_emails_are_unaffected(self):
+        # Arrange
+        for _ in range(2):
+            await enforce_register_rate_limit("10.0.0.1", "new@example.com")
+
+        # Act & Assert - no 429 for a different address
+        await enforce_register_rate_limit("10.0.0.1", "other@example.com")
+
+
+class TestRedisBucketStore:
+    """Tests for the shared Redis backend (with a stand-in async client)"""
+
+    @pytest.mark.asyncio
+    async def test_script_is_awaited(self):
+        # Arrange
+        calls = []
+
+        class FakeAsyncRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    calls.append((keys, args))
+                    return b"2.5"
+                return run
+
+        store = rate_limit.RedisBucketStore(FakeAsyncRedis(), prefix="ratelimit:test")
+
+        # Act
+        wait = await store.take("10.0.0.1", 3, 0.1)
+
+        # Assert
+        assert wait == 2.5
+        assert calls == [(["ratelimit:test:10.0.0.1"], [3, 0.1, 1])]
+
+    @pytest.mark.asyncio
+    async def test_outage_lets_requests_through(self):
+        class DownRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    raise ConnectionError("redis down")
+                return run
+
+        store = rate_limit.RedisBucketStore(DownRedis(), prefix="ratelimit:test")
+        assert await store.take("10.0.0.1", 3, 0.1) == 0.0
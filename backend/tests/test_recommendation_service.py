@@ -0,0 +1,192 @@
+"""
+Unit tests for ranked recommendations
+
+This file demonstrates:
+- Building the candidate matrix from plain dict rows
+- Checking each scoring signal by varying one store attribute at a time
+- Mocking the recommendation repository and clearing the module cache between tests
+- Taking the user from the bearer token, not from the query string
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas.user_schema import User
+from app.security import create_user_access_token
+from app.services import recommendation_service
+from app.services.recommendation_service import (
+    build_candidate_matrix,
+    get_recommendations,
+    score_candidates,
+)
+
+HERE = (-6.2443, 106.8385)
+
+
+def candidate(store_id, lat=-6.2443, lon=106.8385, rating=4.0, reviews=10, category_id=1,
+              is_open=True, is_online=True):
+    return {
+        "store_id": store_id,
+        "vendor_id": store_id,
+        "name": f"Store {store_id}",
+        "description": "",
+        "category_id": category_id,
+        "address": "",
+        "open_time": 8,
+        "close_time": 20,
+        "rating": rating,
+        "is_open": is_open,
+        "is_online": is_online,
+        "created_at": datetime(2025, 1, 1),
+        "current_location": {"lat": lat, "lon": lon} if lat is not None else None,
+        "review_count": reviews,
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_cached_candidates():
+    recommendation_service.clear_candidate_matrix()
+    yield
+    recommendation_service.clear_candidate_matrix()
+
+
+class TestScoreCandidates:
+    """Tests for the vectorized scoring"""
+
+    def test_nearer_store_scores_higher(self):
+        # Arrange: store 2 is ~1.1 km north
+        matrix = build_candidate_matrix([candidate(1), candidate(2, lat=-6.2343)])
+
+        # Act
+        scores, distance = score_candidates(matrix, *HERE, affinity={})
+
+        # Assert
+        assert scores[0] > scores[1]
+        assert distance[1] == pytest.approx(1112, rel=0.01)
+
+    def test_single_perfect_review_does_not_beat_many_good_ones(self):
+        """Ratings are shrunk towards the average by review count"""
+        # Arrange
+        matrix = build_candidate_matrix([
+            candidate(1, rating=5.0, reviews=1),
+            candidate(2, rating=4.7, reviews=80),
+            candidate(3, rating=3.0, reviews=20),
+        ])
+
+        # Act & Assert
+        assert matrix.rating_score[1] > matrix.rating_score[0]
+
+    def test_liked_category_and_open_status_count(self):
+        # Arrange
+        matrix = build_candidate_matrix([
+            candidate(1, category_id=1),
+            candidate(2, category_id=2),
+            candidate(3, category_id=2, is_online=False, is_open=False),
+        ])
+
+        # Act
+        scores, _ = score_candidates(matrix, *HERE, affinity={2: 3.0, 1: -1.0})
+
+        # Assert
+        assert scores[1] > scores[0]  # affinity for category 2, disliked 1 counts as 0
+        assert scores[1] > scores[2]  # closed store loses the open bonus
+
+    def test_without_location_distance_is_ignored(self):
+        # Arrange
+        matrix = build_candidate_matrix([candidate(1), candidate(2, lat=None)])
+
+        # Act
+        scores, distance = score_candidates(matrix, None, None, affinity={})
+
+        # Assert
+        assert scores[0] == pytest.approx(scores[1])
+        assert all(d != d for d in distance)  # NaN
+
+
+class TestGetRecommendations:
+    """Tests for the top-k endpoint logic"""
+
+    @patch('app.services.recommendation_service.recommendation_repo.get_user_category_affinity')
+    @patch('app.services.recommendation_service.recommendation_repo.get_recommendation_candidates')
+    def test_returns_top_k_best_first_without_excluded(self, mock_candidates, mock_affinity):
+        # Arrange
+        mock_candidates.return_value = [
+            candidate(1, lat=-6.30),
+            candidate(2),
+            candidate(3, lat=-6.25),
+            candidate(4, category_id=5, lat=-6.26),
+        ]
+        mock_affinity.return_value = {5: 2.0}
+
+        # Act
+        results = get_recommendations(*HERE, user_id=7, k=2, exclude=[2])
+
+        # Assert
+        assert [r.store_id for r in results] == [4, 3]
+        assert results[0].score >= results[1].score
+        assert results[0].distance_m is not None
+        mock_affinity.assert_called_once_with(7)
+
+    @patch('app.services.recommendation_service.recommendation_repo.get_user_category_affinity')
+    @patch('app.services.recommendation_service.recommendation_repo.get_recommendation_candidates')
+    def test_candidates_are_cached_and_anonymous_users_skip_affinity(self, mock_candidates, mock_affinity):
+        # Arrange
+        mock_candidates.return_value = [candidate(1), candidate(2)]
+
+        # Act
+        get_recommendations(*HERE, k=5)
+        results = get_recommendations(*HERE, k=5)
+
+        # Assert
+        assert len(results) == 2
+        mock_candidates.assert_called_once()
+        mock_affinity.assert_not_called()
+
+
+class TestRecommendationsRoute:
+    """Tests for who GET /recommendations personalizes for"""
+
+    @patch('app.routers.recommendation_router.recommendation_service.get_recommendations')
+    def test_user_comes_from_the_bearer_token(self, mock_recommend):
+        # Arrange
+        mock_recommend.return_value = []
+        token = create_user_access_token(User(
+            user_id=7,
+            email="pembeli@example.com",
+            full_name="Pembeli",
+            created_at=datetime(2025, 1, 1),
+            is_verified=True
+        ))
+        client = TestClient(app)
+
+        # Act
+        response = client.get(
+            "/recommendations",
+            params={"lat": HERE[0], "lon": HERE[1], "user_id": 99},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert mock_recommend.call_args.args[2] == 7
+
+    @patch('app.routers.recommendation_router.recommendation_service.get_recommendations')
+    def test_anonymous_requests_are_not_personalized(self, mock_recommend):
+        """A user_id query parameter no longer picks whose history is used"""
+        # Arrange
+        mock_recommend.return_value = []
+        client = TestClient(app)
+
+        # Act
+        response = client.get("/recommendations", params={"user_id": 7})
+
+        # Assert
+        assert response.status_code == 200
+        assert mock_recommend.call_args.args[2] is None
+
+    def test_invalid_token_is_rejected(self):
+        """Clients get a 401 to refresh on, instead of silently losing personalization"""
+        response = TestClient(app).get("/recommendations", headers={"Authorization": "Bearer nope"})
+        assert response.status_code == 401
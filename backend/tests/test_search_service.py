@@ -0,0 +1,171 @@
+"""
+Unit tests for store search
+
+This file demonstrates:
+- Testing the query normalizer that mirrors the SQL search_normalize()
+- Testing prefix tsquery building with aliases
+- Mocking the search repository
+- Exercising the in-memory autocomplete index directly
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.services import search_service
+from app.services.search_service import (
+    SEARCH_DISTANCE_SCALE_METERS,
+    SuggestIndex,
+    build_prefix_tsquery,
+    load_suggest_index,
+    normalize_search_text,
+    search_stores,
+)
+
+
+class TestNormalizeSearchText:
+    """Tests for query normalization"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("Soto Tjikini", "soto cikini"),
+        ("Es Tjendol Djakarta", "es cendol jakarta"),
+        ("Bakso Soerabaja", "bakso surabaja"),  # old j->y is ambiguous with modern j
+        ("Kopi Chas", "kopi khas"),
+        ("Nasi  Goreng!!", "nasi goreng"),
+        ("Crème brûlée", "creme brulee"),
+        ("  ", ""),
+    ])
+    def test_old_spellings_accents_and_punctuation(self, text, expected):
+        assert normalize_search_text(text) == expected
+
+
+class TestBuildPrefixTsquery:
+    """Tests for the to_tsquery() text"""
+
+    def test_every_word_is_a_required_prefix(self):
+        assert build_prefix_tsquery("bakso ura") == "bakso:* & ura:*"
+
+    def test_aliases_are_alternatives(self):
+        assert build_prefix_tsquery("nasgor pedas") == "(nasgor:* | nasi:* <-> goreng:*) & pedas:*"
+
+
+class TestSearchStores:
+    """Tests for search_stores"""
+
+    @patch('app.services.search_service.search_repo.search_stores')
+    def test_passes_normalized_query_and_location(self, mock_search):
+        """The repo gets the tsquery, the trigram text and the distance scale"""
+        # Arrange
+        mock_search.return_value = [{
+            "store_id": 1,
+            "vendor_id": 2,
+            "name": "Soto Cikini",
+            "description": "Soto Betawi",
+            "category_id": 1,
+            "address": "Jl. Cikini Raya",
+            "open_time": 8,
+            "close_time": 20,
+            "rating": 4.5,
+            "is_open": True,
+            "is_online": True,
+            "created_at": datetime(2025, 1, 1),
+            "current_location": {"lat": -6.19, "lon": 106.84},
+            "distance_m": 250.0,
+            "text_score": 1.2,
+            "score": 0.96,
+            "matched_items": [{"item_id": 7, "name": "Soto Daging", "price": 25000}],
+        }]
+
+        # Act
+        results = search_stores("Soto Tjikini", lat=-6.19, lon=106.84, limit=5)
+
+        # Assert
+        mock_search.assert_called_once_with(
+            tsquery="soto:* & cikini:*",
+            text="soto cikini",
+            lat=-6.19,
+            lon=106.84,
+            distance_scale_m=SEARCH_DISTANCE_SCALE_METERS,
+            limit=5,
+            online_only=False,
+        )
+        assert results[0].store_id == 1
+        assert results[0].matched_items[0].name == "Soto Daging"
+
+    @patch('app.services.search_service.search_repo.search_stores')
+    def test_query_without_letters_or_digits_returns_nothing(self, mock_search):
+        """Punctuation-only queries never reach the database"""
+        assert search_stores("?!") == []
+        mock_search.assert_not_called()
+
+
+class TestSuggestIndex:
+    """Tests for the autocomplete index"""
+
+    @pytest.fixture
+    def index(self):
+        index = SuggestIndex()
+        index.add("store", 1, "Nasi Goreng Pak Kumis", 1)
+        index.add("store", 2, "Bakso Urat Mas Joko", 2)
+        index.add("menu_item", 101, "Nasi Goreng Gila", 1)
+        index.add("menu_item", 201, "Bakso Urat", 2)
+        index.add("menu_item", 301, "Bakso Urat", 3)
+        return index
+
+    def test_any_word_can_be_completed(self, index):
+        """'gor' finds names where a later word starts with it"""
+        # Act
+        names = [s["name"] for s in index.suggest("gor")]
+
+        # Assert
+        assert names == ["Nasi Goreng Pak Kumis", "Nasi Goreng Gila"]
+
+    def test_earlier_words_narrow_the_match(self, index):
+        """'nasi gor' only matches names containing both"""
+        # Act
+        suggestions = index.suggest("nasi gor")
+
+        # Assert: a name starting with the query wins; then stores before dishes
+        assert [(s["kind"], s["id"]) for s in suggestions] == [("store", 1), ("menu_item", 101)]
+
+    def test_dish_sold_by_several_carts_is_suggested_once(self, index):
+        """The same dish name from another store is not repeated"""
+        # Act
+        suggestions = index.suggest("bakso urat")
+
+        # Assert
+        assert [(s["kind"], s["id"]) for s in suggestions] == [("store", 2), ("menu_item", 201)]
+
+    def test_rename_and_delete_update_the_index(self, index):
+        """Re-adding replaces the old words; deleting a store drops its dishes"""
+        # Act
+        index.add("store", 2, "Mie Ayam Mas Joko", 2)
+        index.remove_store(1)
+
+        # Assert
+        assert index.suggest("mie")[0]["id"] == 2
+        assert [s["id"] for s in index.suggest("bakso")] == [201]
+        assert index.suggest("nasi") == []
+        assert len(index) == 3
+
+    def test_full_index_refuses_new_names(self):
+        """Memory is bounded by max_entries"""
+        # Arrange
+        index = SuggestIndex(max_entries=1)
+
+        # Act & Assert
+        assert index.add("store", 1, "Soto Betawi", 1)
+        assert not index.add("store", 2, "Soto Ayam", 2)
+        assert index.add("store", 1, "Soto Lamongan", 1)  # replacing an entry still fits
+
+    @patch('app.services.search_service.search_repo.get_suggest_names')
+    def test_load_replaces_the_shared_index(self, mock_names):
+        """Startup load fills the module-level index from the database"""
+        # Arrange
+        mock_names.return_value = [{"kind": "store", "id": 9, "store_id": 9, "name": "Es Teler 77"}]
+
+        # Act
+        count = load_suggest_index()
+
+        # Assert
+        assert count == 1
+        assert search_service.suggest("teler")[0].id == 9
@@ -8,18 +8,28 @@ This file demonstrates:
 - AAA (Arrange-Act-Assert) pattern
 """
 
+import threading
 import pytest
 from datetime import datetime, timedelta
-from jose import jwt
+from unittest.mock import patch
+from fastapi import HTTPException
+from jose import jwt, JWTError
 from app.security import (
     hash_password,
     verify_password,
     create_access_token,
+    create_user_access_token,
     create_email_token,
     decode_token,
+    get_current_user,
+    clear_token_cache,
+    rounds_for_target,
+    schedule_password_rehash,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
     JWT_SECRET,
     JWT_ALGORITHM
 )
+from app.schemas.user_schema import User
 
 
 class TestPasswordFunctions:
@@ -79,6 +89,52 @@ class TestPasswordFunctions:
         assert result is False, "Passwords should be case-sensitive"
 
 
+class TestBcryptCalibration:
+    """Tests for picking the bcrypt cost from a timing measurement"""
+
+    @pytest.mark.parametrize("measured_ms,target_ms,expected", [
+        (15.0, 250.0, 14),   # 15 ms at cost 10 -> 240 ms at cost 14
+        (60.0, 250.0, 12),   # 60 ms at cost 10 -> 240 ms at cost 12
+        (250.0, 250.0, 10),  # already on target
+    ])
+    def test_picks_highest_cost_within_target(self, measured_ms, target_ms, expected):
+        """Each extra round doubles the cost; never exceed the target"""
+        assert rounds_for_target(measured_ms, 10, target_ms) == expected
+
+    def test_cost_is_clamped(self):
+        """Very fast or very slow machines stay within sane bounds"""
+        assert rounds_for_target(0.01, 10, 250.0) == 15
+        assert rounds_for_target(1000.0, 10, 250.0) == 10
+
+    @patch('app.security.update_password_hash')
+    @patch('app.security.hash_password')
+    def test_rehash_writes_outside_the_bcrypt_pool(self, mock_hash, mock_update):
+        """The upgraded hash is stored by the save pool, not by a bcrypt worker"""
+        # Arrange
+        threads = {}
+        stored = threading.Event()
+
+        def hash_side_effect(plaintxt):
+            threads["hash"] = threading.current_thread().name
+            return "upgraded-hash"
+
+        def update_side_effect(user_id, hashed):
+            threads["update"] = threading.current_thread().name
+            stored.set()
+
+        mock_hash.side_effect = hash_side_effect
+        mock_update.side_effect = update_side_effect
+
+        # Act
+        schedule_password_rehash(7, "secret")
+
+        # Assert
+        assert stored.wait(5)
+        mock_update.assert_called_once_with(7, "upgraded-hash")
+        assert threads["hash"].startswith("password-hash")
+        assert threads["update"].startswith("password-rehash-save")
+
+
 class TestJWTTokens:
     """Tests for JWT token creation and validation"""
     
@@ -125,10 +181,10 @@ class TestJWTTokens:
         exp_time = datetime.utcfromtimestamp(payload["exp"])
         now = datetime.utcnow()
         
-        # Token should expire in approximately 2 hours (within 5 second tolerance)
-        expected_exp = now + timedelta(hours=2)
+        # Token should expire after the configured short lifetime (within 5 second tolerance)
+        expected_exp = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         time_diff = abs((exp_time - expected_exp).total_seconds())
-        assert time_diff < 5, "Token should expire in ~2 hours"
+        assert time_diff < 5, "Token should expire after ACCESS_TOKEN_EXPIRE_MINUTES"
     
     def test_decode_token_successfully_decodes_valid_token(self):
         """Test that decode_token can decode a valid token"""
@@ -176,6 +232,56 @@ class TestJWTTokens:
         assert exc_info.value.status_code == 401
 
 
+class TestDecodedTokenCache:
+    """Tests for caching verified token claims"""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        clear_token_cache()
+        yield
+        clear_token_cache()
+
+    def test_repeated_decode_verifies_signature_once(self):
+        """The second decode of the same token comes from the cache"""
+        # Arrange
+        token = create_access_token(42, "cache@example.com")
+
+        # Act
+        with patch('app.security.jwt.decode', wraps=jwt.decode) as spy_decode:
+            first = decode_token(token)
+            second = decode_token(token)
+
+        # Assert
+        assert first == second
+        assert spy_decode.call_count == 1
+
+    def test_cached_claims_cannot_be_mutated_by_callers(self):
+        """Each call gets its own copy of the claims"""
+        # Arrange
+        token = create_access_token(42, "cache@example.com")
+
+        # Act
+        decode_token(token)["sub"] = "tampered"
+
+        # Assert
+        assert decode_token(token)["sub"] == "42"
+
+    def test_cache_entry_expires_with_the_token(self):
+        """Once exp has passed the claims are no longer served from the cache"""
+        # Arrange
+        token = create_access_token(42, "cache@example.com")
+        exp = decode_token(token)["exp"]
+
+        # Act
+        with patch('app.security.time.time', return_value=exp + 1):
+            with patch('app.security.jwt.decode', side_effect=JWTError("expired")) as mock_decode:
+                with pytest.raises(HTTPException):
+                    decode_token(token)
+
+        # Assert - the signature/expiry check ran again
+        mock_decode.assert_called_once()
+
+
 class TestTokenTypeValidation:
     """Tests for validating token types"""
     
@@ -226,3 +332,65 @@ class TestPasswordAndTokenIntegration:
         assert password_valid is True
         assert token_payload["sub"] == str(user_id)
         assert token_payload["email"] == email
+
+
+class TestSelfContainedAccessToken:
+    """Access tokens that carry the user, so protected routes skip the DB"""
+
+    @patch('app.security.get_user_by_id')
+    def test_user_is_rebuilt_from_claims_without_db(self, mock_get_user):
+        """get_current_user returns the same User that was put in the token"""
+        # Arrange
+        user = User(
+            user_id=9,
+            email="claims@example.com",
+            full_name="Claims User",
+            created_at=datetime(2024, 1, 1, 8, 30),
+            is_verified=True
+        )
+        token = create_user_access_token(user)
+
+        # Act
+        current = get_current_user(token)
+
+        # Assert
+        assert current == user
+        mock_get_user.assert_not_called()
+
+
+class TestTokensWithoutUserClaims:
+    """Tests for access tokens issued before they carried the user"""
+
+    @pytest.fixture
+    def user_row(self):
+        """(user_id, email, password_hash, full_name, created_at, is_verified)"""
+        return (7, "legacy@example.com", "hash", "Legacy User", datetime(2024, 1, 1), True)
+
+    @patch('app.security.get_user_by_id')
+    def test_every_request_reads_the_current_row(self, mock_get_user, user_row):
+        """Nothing is cached, so a changed user row shows up on the next request"""
+        # Arrange
+        mock_get_user.return_value = user_row
+        token = create_access_token(7, "legacy@example.com")
+
+        # Act
+        first = get_current_user(token)
+        mock_get_user.return_value = user_row[:5] + (False,)
+        second = get_current_user(token)
+
+        # Assert
+        assert first.is_verified is True
+        assert second.is_verified is False
+        assert mock_get_user.call_count == 2
+
+    @patch('app.security.get_user_by_id')
+    def test_missing_user_is_rejected(self, mock_get_user):
+        """Unknown users get a 401"""
+        # Arrange
+        mock_get_user.return_value = None
+        token = create_access_token(8, "ghost@example.com")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_user(token)
+        assert exc_info.value.status_code == 401
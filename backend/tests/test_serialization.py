@@ -0,0 +1,89 @@
+"""
+Unit tests for response encoding helpers
+
+This file demonstrates:
+- Table-driven tests for Accept header negotiation
+- Checking the generated OpenAPI document for routes returning raw Responses
+- Calling a route through TestClient with a mocked repository
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from app.database import Point
+from app.main import app
+from app.repositories.vendor_repo import StoreLocationRow
+from app.serialization import preferred_media_type
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+
+class TestPreferredMediaType:
+    """Tests for picking JSON or MessagePack from an Accept header"""
+
+    @pytest.mark.parametrize("accept,expected", [
+        (None, JSON),
+        ("*/*", JSON),
+        ("application/msgpack", MSGPACK),
+        ("Application/MsgPack", MSGPACK),
+        ("application/json, application/msgpack;q=0.5", JSON),
+        ("application/msgpack, */*;q=0.1", MSGPACK),
+        ("application/*;q=0.2, application/msgpack;q=0.9", MSGPACK),
+        ("application/msgpack;q=0", JSON),
+        ("text/html", JSON),
+    ])
+    def test_quality_values_decide(self, accept, expected):
+        assert preferred_media_type(accept, (JSON, MSGPACK)) == expected
+
+    def test_substrings_are_not_matches(self):
+        """A media type merely containing "application/msgpack" is something else"""
+        assert preferred_media_type("application/msgpack-ext", (JSON, MSGPACK)) == JSON
+
+
+class TestVendorLocationsRoute:
+    """Tests for the documented and actual encodings of GET /vendor/locations"""
+
+    @pytest.fixture
+    def locations(self):
+        updated_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        with patch('app.routers.vendor_router.vendor_repo.get_all_stores_with_locations') as mock_locations, \
+                patch('app.routers.vendor_router.vendor_repo.get_store_location_rows') as mock_rows:
+            mock_locations.return_value = [{
+                "store_id": 301,
+                "current_location": {"lat": -6.2443, "lon": 106.8385},
+                "location_updated_at": updated_at,
+                "speed_mps": 1.2,
+                "heading_deg": 90.0,
+            }]
+            mock_rows.return_value = [StoreLocationRow(301, Point(-6.2443, 106.8385), updated_at, 1.2, 90.0)]
+            yield mock_locations
+
+    def test_openapi_lists_every_encoding(self):
+        # Act
+        response_200 = app.openapi()["paths"]["/vendor/locations"]["get"]["responses"]["200"]
+
+        # Assert
+        json_schemas = response_200["content"][JSON]["schema"]["anyOf"]
+        assert {"$ref": "#/components/schemas/StoreLocationColumns"} in json_schemas
+        assert response_200["content"][MSGPACK]["schema"] == {"$ref": "#/components/schemas/StoreLocationColumns"}
+
+    def test_accept_header_selects_msgpack(self, locations):
+        # Act
+        response = TestClient(app).get("/vendor/locations", headers={"Accept": MSGPACK})
+
+        # Assert
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content)["store_ids"] == [301]
+
+    def test_json_preferred_over_msgpack_stays_json(self, locations):
+        # Act
+        response = TestClient(app).get(
+            "/vendor/locations", headers={"Accept": "application/json, application/msgpack;q=0.5"}
+        )
+
+        # Assert
+        assert response.headers["content-type"] == JSON
+        assert response.json()[0]["store_id"] == 301
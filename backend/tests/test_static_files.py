@@ -0,0 +1,135 @@
+"""
+Unit tests for static upload serving
+
+This file demonstrates:
+- Testing an ASGI mount with Starlette's TestClient
+- Checking HTTP caching (ETag/304) and Range (206) behavior
+- Checking which upload paths the real app exposes
+"""
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+from app.compression import BrotliMiddleware
+from app.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    UploadStaticFiles,
+    is_content_hashed,
+)
+
+LEGACY_NAME = "7_store_0bdf9258742340278cf5cbdf66bed241.jpg"
+
+
+@pytest.fixture
+def client(tmp_path):
+    """App serving tmp_path at /app/uploads behind the production compression stack"""
+    (tmp_path / "vendors").mkdir()
+    (tmp_path / "vendors" / LEGACY_NAME).write_bytes(b"\xff\xd8\xff\xe0" + b"a" * 5000)
+    (tmp_path / "vendors" / "default_store_image.jpg").write_bytes(b"\xff\xd8\xff\xe0placeholder")
+    (tmp_path / ".tmp").mkdir()
+    (tmp_path / ".tmp" / "upload.part").write_bytes(b"partial")
+    app = Starlette(
+        routes=[Mount("/app/uploads", UploadStaticFiles(directory=tmp_path))],
+        middleware=[
+            Middleware(BrotliMiddleware, minimum_size=1024, exclude_paths=("/app/uploads/",)),
+            Middleware(GZipMiddleware, minimum_size=1024),
+        ]
+    )
+    return TestClient(app)
+
+
+class TestCacheHeaders:
+    """Tests for choosing Cache-Control per file name"""
+
+    def test_hashed_names_are_immutable(self, client):
+        """uuid/sha256 file names never change content"""
+        # Act
+        response = client.get(f"/app/uploads/vendors/{LEGACY_NAME}")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert "etag" in response.headers
+        assert "last-modified" in response.headers
+
+    def test_plain_names_are_revalidated(self, client):
+        """Placeholders may be replaced, so clients revalidate them"""
+        response = client.get("/app/uploads/vendors/default_store_image.jpg")
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+    def test_matching_etag_gets_304(self, client):
+        """A revalidation with the current ETag costs no body"""
+        # Arrange
+        etag = client.get("/app/uploads/vendors/default_store_image.jpg").headers["etag"]
+
+        # Act
+        response = client.get("/app/uploads/vendors/default_store_image.jpg", headers={"If-None-Match": etag})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.parametrize("name,expected", [
+        ("ab/cd/" + "ab" * 32 + ".jpg", True),
+        (LEGACY_NAME, True),
+        ("12_store_0bdf9258742340278cf5cbdf66bed241_thumb.webp", True),
+        ("default_store_image.jpg", False),
+    ])
+    def test_is_content_hashed(self, name, expected):
+        assert is_content_hashed(name) is expected
+
+
+class TestServing:
+    """Tests for ranges, hidden files and compression"""
+
+    def test_range_request_returns_partial_content(self, client):
+        """Only the requested bytes are sent"""
+        # Act
+        response = client.get(f"/app/uploads/vendors/{LEGACY_NAME}", headers={"Range": "bytes=0-3"})
+
+        # Assert
+        assert response.status_code == 206
+        assert response.content == b"\xff\xd8\xff\xe0"
+        assert response.headers["content-range"] == "bytes 0-3/5004"
+
+    def test_images_are_not_gzipped(self, client):
+        """Already-compressed images keep their Content-Length"""
+        # Act
+        response = client.get(f"/app/uploads/vendors/{LEGACY_NAME}", headers={"Accept-Encoding": "gzip, br"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == "5004"
+
+    def test_blob_store_bookkeeping_is_hidden(self, client):
+        """Partial uploads and refcount files are never served"""
+        assert client.get("/app/uploads/.tmp/upload.part").status_code == 404
+        assert client.get("/app/uploads/vendors/default_store_image.jpg.refs").status_code == 404
+
+
+class TestAppMounts:
+    """Tests for what the production app serves from app/uploads"""
+
+    @pytest.fixture
+    def app_client(self):
+        # Imported here: app.main builds the whole application
+        from app.main import app
+        return TestClient(app)
+
+    def test_store_images_are_served(self, app_client):
+        response = app_client.get("/app/uploads/vendors/stores/default_store_image.jpg")
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("path", [
+        "/app/uploads/vendors/7_ktp_0bdf9258742340278cf5cbdf66bed241.jpg",
+        "/app/uploads/vendors/6_selfie_c31347572e494e8289709ee7a0f8d2ac.jpg",
+        "/app/uploads/vendors/ktp_placeholder.JPG",
+        "/app/uploads/vendors/stores/../7_ktp_0bdf9258742340278cf5cbdf66bed241.jpg",
+    ])
+    def test_identity_documents_are_not_served(self, app_client, path):
+        """Vendor KTP/selfie images sit beside the store images but are never public"""
+        assert app_client.get(path).status_code == 404
@@ -0,0 +1,210 @@
+"""
+Unit tests for the content-addressed blob store
+
+This file demonstrates:
+- Testing reference counting against pytest's tmp_path
+- Serving files through a Starlette app with TestClient
+- Overriding the auth dependency to test an admin-only route
+"""
+
+import hashlib
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi import FastAPI
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+from app.routers import admin_router
+from app.schemas.user_schema import User
+from app.security import get_current_user
+from app.static_files import BlobStaticFiles, IMMUTABLE_CACHE_CONTROL
+from app.storage import VENDOR_DOCUMENT_URL_PREFIX, BlobStore, LocalBlobStore, blob_key
+
+
+def write_temp(store: LocalBlobStore, content: bytes):
+    """Write content to the store's temp folder, as an upload would"""
+    path = store.temp_dir() / f".{hashlib.md5(content).hexdigest()}.part"
+    path.write_bytes(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+
+class TestLocalBlobStore:
+    """Tests for deduplication and reference counting"""
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        """A second copy of the same bytes reuses the blob and its temp file is dropped"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        first_path, sha256 = write_temp(store, b"same photo")
+
+        # Act
+        first_key = store.put_file(first_path, sha256, "JPG")
+        second_path, _ = write_temp(store, b"same photo")
+        second_key = store.put_file(second_path, sha256, "jpg")
+
+        # Assert
+        assert first_key == second_key == blob_key(sha256, "jpg")
+        assert (tmp_path / first_key).read_bytes() == b"same photo"
+        assert not second_path.exists()
+        assert list(store.temp_dir().iterdir()) == []
+
+    def test_blob_is_deleted_when_last_reference_is_released(self, tmp_path):
+        """release() counts down and removes the file at zero"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        key = store.put_bytes(b"placeholder", "jpg")
+        store.incref(key)
+
+        # Act & Assert
+        assert store.release(key) == 1
+        assert store.exists(key)
+        assert store.release(key) == 0
+        assert not store.exists(key)
+
+    def test_variants_are_deleted_with_the_blob(self, tmp_path):
+        """Thumbnails rendered beside a blob go when its last reference does"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        key = store.put_bytes(b"store photo", "jpg")
+        other_key = store.put_bytes(b"other photo", "jpg")
+        variants = store.local_path(key).parent / "variants"
+        variants.mkdir()
+        stem = store.local_path(key).stem
+        (variants / f"{stem}_thumb.webp").write_bytes(b"thumb")
+        (variants / f"{stem}_card.webp").write_bytes(b"card")
+
+        # Act
+        store.release(key)
+
+        # Assert
+        assert list(variants.iterdir()) == []
+        assert store.exists(other_key)
+
+    def test_retain_and_release_by_url(self, tmp_path):
+        """Rows pointing at a blob URL hold references; other URLs are ignored"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        key = store.put_bytes(b"menu photo", "jpg")
+        url = store.url_for(key)
+
+        # Act
+        retained = store.retain_url(url)
+        ignored = store.retain_url("https://example.com/nasi-goreng.jpg")
+        store.release_url(url)
+        store.release_url("https://example.com/nasi-goreng.jpg")
+
+        # Assert
+        assert retained == key
+        assert ignored is None
+        assert store.exists(key)
+        assert store.release(key) == 0
+
+    def test_blob_store_is_abstract(self):
+        with pytest.raises(TypeError):
+            BlobStore()
+
+    def test_url_round_trip(self, tmp_path):
+        """Only URLs produced by the store map back to a key"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        key = store.put_bytes(b"menu", "png")
+
+        # Act
+        url = store.url_for(key)
+
+        # Assert
+        assert url == f"/app/uploads/blobs/{key}"
+        assert store.key_for_url(url) == key
+        assert store.key_for_url("/app/uploads/vendors/7_ktp_abc.jpg") is None
+        assert store.key_for_url(None) is None
+
+    def test_keys_cannot_escape_the_root(self, tmp_path):
+        """Path traversal in a key is rejected"""
+        with pytest.raises(ValueError):
+            LocalBlobStore(tmp_path).exists("../../etc/passwd")
+
+
+class TestBlobStaticFiles:
+    """Tests for serving blobs over HTTP"""
+
+    def test_blobs_are_immutable_and_refs_are_hidden(self, tmp_path):
+        """Blobs get a one-year immutable Cache-Control; bookkeeping files 404"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        key = store.put_bytes(b"\xff\xd8\xff\xe0jpeg", "jpg")
+        app = Starlette(routes=[Mount("/blobs", BlobStaticFiles(directory=tmp_path))])
+        client = TestClient(app)
+
+        # Act
+        blob = client.get(f"/blobs/{key}")
+        refs = client.get(f"/blobs/{key}.refs")
+
+        # Assert
+        assert blob.status_code == 200
+        assert blob.content == b"\xff\xd8\xff\xe0jpeg"
+        assert blob.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert refs.status_code == 404
+
+
+class TestVendorDocuments:
+    """Tests for the admin-only KTP/selfie route"""
+
+    @pytest.fixture
+    def private_store(self, tmp_path):
+        store = LocalBlobStore(tmp_path, url_prefix=VENDOR_DOCUMENT_URL_PREFIX)
+        with patch('app.routers.admin_router.private_blob_store', store):
+            yield store
+
+    @staticmethod
+    def _client(email: str) -> TestClient:
+        app = FastAPI()
+        app.include_router(admin_router.router)
+        app.dependency_overrides[get_current_user] = lambda: User(
+            user_id=1,
+            email=email,
+            full_name="Staff",
+            created_at=datetime(2024, 1, 1),
+            is_verified=True
+        )
+        return TestClient(app)
+
+    @patch('app.security.ADMIN_EMAILS', frozenset({"admin@example.com"}))
+    def test_admin_gets_document_without_caching(self, private_store):
+        """Identity documents must never land in a shared or browser cache"""
+        # Arrange
+        url = private_store.url_for(private_store.put_bytes(b"\xff\xd8\xff\xe0ktp", "jpg"))
+        client = self._client("Admin@example.com")
+
+        # Act
+        response = client.get(url)
+        refs = client.get(url + ".refs")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.content == b"\xff\xd8\xff\xe0ktp"
+        assert response.headers["cache-control"] == "private, no-store"
+        assert refs.status_code == 404
+
+    @patch('app.security.ADMIN_EMAILS', frozenset({"admin@example.com"}))
+    def test_other_users_are_forbidden(self, private_store):
+        # Arrange
+        url = private_store.url_for(private_store.put_bytes(b"\xff\xd8\xff\xe0ktp", "jpg"))
+
+        # Act
+        response = self._client("vendor@example.com").get(url)
+
+        # Assert
+        assert response.status_code == 403
+
+    def test_unauthenticated_requests_are_rejected(self, private_store):
+        # Arrange
+        app = FastAPI()
+        app.include_router(admin_router.router)
+        url = private_store.url_for(private_store.put_bytes(b"\xff\xd8\xff\xe0ktp", "jpg"))
+
+        # Act
+        response = TestClient(app).get(url)
+
+        # Assert
+        assert response.status_code == 401
@@ -0,0 +1,431 @@
+"""
+Unit tests for store listing filters and facet counts
+
+This file demonstrates:
+- Checking that filters are passed down to the repository (SQL), not applied in Python
+- Ordering, de-duplicating and reporting missing stores in a batch fetch
+- Checking the Postgres-rendered store detail never sends null for a required field
+- Turning GROUPING SETS rows into a facet response
+- Calling the route through TestClient to check query parameter parsing
+- Reading precomputed rankings through the mocked repository
+- Zero-filling the vendor dashboard's daily activity series
+- Keeping blob reference counts in step with store and menu image changes
+"""
+
+from datetime import date, datetime, timedelta
+import re
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.store_service import (
+    RANKING_PRIOR_REVIEWS,
+    RANKING_REVIEW_WEIGHT,
+    STORE_TIMEZONE,
+    get_all_stores_with_locations,
+    get_store_activity_stats,
+    get_store_facets,
+    get_stores_batch,
+    get_top_stores,
+    refresh_rankings,
+    remove_menu_item,
+    remove_store,
+    update_store_details,
+)
+from app.repositories.store_repo import _STORE_DETAIL_SQL
+from app.schemas.store_schema import (
+    MenuItemResponse,
+    StoreBatchGetRequest,
+    StoreFilters,
+    StoreUpdate,
+    StoreWithMenuResponse,
+)
+from app.storage import LocalBlobStore
+
+
+class TestGetAllStores:
+    """Tests for the filtered store list"""
+
+    @patch('app.services.store_service.store_repo.get_all_stores')
+    def test_filters_are_pushed_to_the_repository(self, mock_get_all, sample_store):
+        """Every filter reaches the SQL query"""
+        # Arrange
+        mock_get_all.return_value = [{**sample_store, "created_at": datetime(2025, 1, 1)}]
+        filters = StoreFilters(category_id=1, is_halal=True, is_open=True, min_rating=4)
+
+        # Act
+        stores = get_all_stores_with_locations(filters)
+
+        # Assert
+        mock_get_all.assert_called_once_with(
+            online_only=False, category_id=1, is_halal=True, is_open=True, min_rating=4
+        )
+        assert stores[0].store_id == 301
+
+    @patch('app.services.store_service.store_repo.get_all_stores')
+    def test_query_string_becomes_filters(self, mock_get_all):
+        """GET /stores?is_halal=true&min_rating=4 parses into StoreFilters"""
+        # Arrange
+        mock_get_all.return_value = []
+
+        # Act
+        response = TestClient(app).get("/stores?is_halal=true&min_rating=4&online_only=true")
+
+        # Assert
+        assert response.status_code == 200
+        mock_get_all.assert_called_once_with(
+            online_only=True, category_id=None, is_halal=True, is_open=None, min_rating=4
+        )
+
+
+class TestGetStoresBatch:
+    """Tests for fetching several stores in one call"""
+
+    @staticmethod
+    def store_row(sample_store, store_id):
+        return {**sample_store, "store_id": store_id, "created_at": datetime(2025, 1, 1)}
+
+    @patch('app.services.store_service.store_repo.get_stores_by_ids')
+    def test_results_follow_the_requested_order(self, mock_get_by_ids, sample_store):
+        """Stores come back in request order, whatever order the query returns"""
+        # Arrange
+        mock_get_by_ids.return_value = [self.store_row(sample_store, 301), self.store_row(sample_store, 303),
+                                        self.store_row(sample_store, 302)]
+
+        # Act
+        result = get_stores_batch(StoreBatchGetRequest(store_ids=[303, 301, 302]))
+
+        # Assert
+        assert [store.store_id for store in result.stores] == [303, 301, 302]
+        assert result.not_found == []
+
+    @patch('app.services.store_service.store_repo.get_stores_by_ids')
+    def test_duplicate_ids_are_fetched_once(self, mock_get_by_ids, sample_store):
+        """Repeated IDs are dropped, keeping the first occurrence"""
+        # Arrange
+        mock_get_by_ids.return_value = [self.store_row(sample_store, 301), self.store_row(sample_store, 302)]
+
+        # Act
+        result = get_stores_batch(StoreBatchGetRequest(store_ids=[302, 301, 302, 301]))
+
+        # Assert
+        assert mock_get_by_ids.call_args.args[0] == [302, 301]
+        assert [store.store_id for store in result.stores] == [302, 301]
+
+    @patch('app.services.store_service.store_repo.get_stores_by_ids')
+    def test_unknown_ids_are_not_found(self, mock_get_by_ids, sample_store):
+        """IDs the query didn't return are listed in not_found, in request order"""
+        # Arrange
+        mock_get_by_ids.return_value = [self.store_row(sample_store, 301)]
+
+        # Act
+        result = get_stores_batch(StoreBatchGetRequest(store_ids=[999, 301, 998]))
+
+        # Assert
+        assert [store.store_id for store in result.stores] == [301]
+        assert result.not_found == [999, 998]
+
+    @pytest.mark.parametrize("include, flag", [
+        ("menu", "include_menu"),
+        ("reviews_summary", "include_reviews_summary"),
+        ("location", "include_location"),
+    ])
+    @patch('app.services.store_service.store_repo.get_stores_by_ids')
+    def test_each_include_reaches_the_repository(self, mock_get_by_ids, include, flag):
+        """Each `include` entry turns on only its own repository flag"""
+        # Arrange
+        mock_get_by_ids.return_value = []
+        flags = {"include_menu": False, "include_reviews_summary": False, "include_location": False}
+
+        # Act
+        get_stores_batch(StoreBatchGetRequest(store_ids=[301], include={include}))
+
+        # Assert
+        mock_get_by_ids.assert_called_once_with([301], **{**flags, flag: True})
+
+    @patch('app.services.store_service.store_repo.get_stores_by_ids')
+    def test_no_include_fetches_the_store_only(self, mock_get_by_ids, sample_store):
+        """Without `include` no optional part is queried or returned"""
+        # Arrange
+        mock_get_by_ids.return_value = [self.store_row(sample_store, 301)]
+
+        # Act
+        result = get_stores_batch(StoreBatchGetRequest(store_ids=[301]))
+
+        # Assert
+        mock_get_by_ids.assert_called_once_with(
+            [301], include_menu=False, include_reviews_summary=False, include_location=False
+        )
+        assert result.stores[0].menu is None
+        assert result.stores[0].reviews_summary is None
+
+
+class TestGetStoreFacets:
+    """Tests for facet counts"""
+
+    @patch('app.services.store_service.store_repo.get_store_facets')
+    def test_rows_become_facets(self, mock_facets):
+        """Missing boolean values count 0 and star groups become 'at least N' counts"""
+        # Arrange
+        mock_facets.return_value = [
+            {"facet": "category", "value": 1, "name": "Street Food", "count": 5},
+            {"facet": "category", "value": 2, "name": "Beverages", "count": 0},
+            {"facet": "is_halal", "value": 1, "name": None, "count": 4},
+            {"facet": "is_open", "value": 0, "name": None, "count": 2},
+            {"facet": "is_open", "value": 1, "name": None, "count": 3},
+            {"facet": "rating", "value": 3, "name": None, "count": 2},
+            {"facet": "rating", "value": 4, "name": None, "count": 2},
+            {"facet": "rating", "value": 5, "name": None, "count": 1},
+            {"facet": "total", "value": None, "name": None, "count": 3},
+        ]
+
+        # Act
+        facets = get_store_facets(StoreFilters(is_open=True))
+
+        # Assert
+        assert facets.total == 3
+        assert [(c.name, c.count) for c in facets.categories] == [("Street Food", 5)]
+        assert [(f.value, f.count) for f in facets.is_halal] == [(False, 0), (True, 4)]
+        assert [(f.value, f.count) for f in facets.is_open] == [(False, 2), (True, 3)]
+        assert [(f.min_rating, f.count) for f in facets.min_rating] == [(4, 3), (3, 5), (2, 5), (1, 5)]
+        assert mock_facets.call_args.kwargs["is_open"] is True
+
+    def test_facets_route_is_not_a_store_id(self):
+        """/stores/facets is matched before /stores/{store_id}"""
+        with patch('app.services.store_service.store_repo.get_store_facets', return_value=[]):
+            response = TestClient(app).get("/stores/facets?min_rating=9")
+
+        assert response.status_code == 422  # min_rating is validated, not parsed as a store_id
+
+
+class TestStoreDetailQuery:
+    """Tests for the store detail document built by Postgres"""
+
+    # Keys and columns every insert sets, so they are never NULL
+    ALWAYS_SET = {"store_id", "vendor_id", "item_id", "name", "category_id", "created_at"}
+
+    @staticmethod
+    def required_fields(model):
+        return {name for name, field in model.model_fields.items() if field.is_required()}
+
+    @staticmethod
+    def sql_entries(sql):
+        """{key: expression} for each 'key', expression pair in a json_build_object call"""
+        return dict(re.findall(r"'(\w+)', (.+?),?$", sql, re.MULTILINE))
+
+    def store_entries(self):
+        return self.sql_entries(_STORE_DETAIL_SQL.split("json_agg(")[0])
+
+    def menu_entries(self):
+        return self.sql_entries(_STORE_DETAIL_SQL.split("json_agg(")[1])
+
+    def test_required_store_fields_are_never_null(self):
+        """The DB-JSON path can't send null where StoreWithMenuResponse needs a value"""
+        # Arrange
+        entries = self.store_entries()
+
+        # Act
+        nullable = {
+            field for field in self.required_fields(StoreWithMenuResponse) - self.ALWAYS_SET
+            if not entries[field].startswith("COALESCE(")
+        }
+
+        # Assert
+        assert nullable == set()
+
+    def test_required_menu_fields_are_never_null(self):
+        """Same for each aggregated menu item against MenuItemResponse"""
+        # Arrange
+        entries = self.menu_entries()
+
+        # Act
+        nullable = {
+            field for field in self.required_fields(MenuItemResponse) - self.ALWAYS_SET
+            if not entries[field].startswith("COALESCE(")
+        }
+
+        # Assert
+        assert nullable == set()
+
+    def test_defaults_match_the_model_defaults(self):
+        """Fields the models default agree with what the query fills in"""
+        # Arrange
+        store, menu_item = self.store_entries(), self.menu_entries()
+
+        # Act & Assert
+        assert menu_item["is_available"] == "COALESCE(mi.is_available, true)"
+        assert store["is_halal"] == "COALESCE(s.is_halal, false)"
+        assert store["is_online"] == "COALESCE(s.is_online, false)"
+        assert store["menu"] == "COALESCE(m.menu, '[]'::json)"
+
+
+class TestRankings:
+    """Tests for top-rated and trending stores"""
+
+    @patch('app.services.store_service.store_repo.refresh_store_rankings')
+    def test_refresh_uses_configured_prior(self, mock_refresh):
+        """The refresher passes the prior weight and review weight to the SQL"""
+        # Arrange
+        mock_refresh.return_value = 12
+
+        # Act
+        ranked = refresh_rankings()
+
+        # Assert
+        assert ranked == 12
+        mock_refresh.assert_called_once_with(RANKING_PRIOR_REVIEWS, RANKING_REVIEW_WEIGHT)
+
+    @patch('app.services.store_service.store_repo.get_ranked_stores')
+    def test_top_stores_read_the_ranking_table(self, mock_ranked, sample_store):
+        """Results come back in ranking order with their scores"""
+        # Arrange
+        mock_ranked.return_value = [{
+            **sample_store,
+            "created_at": datetime(2025, 1, 1),
+            "review_count": 500,
+            "bayesian_rating": 4.79,
+            "reviews_24h": 3,
+            "views_24h": 120,
+            "trending_score": 1.5,
+            "refreshed_at": datetime(2025, 1, 2),
+        }]
+
+        # Act
+        stores = get_top_stores(limit=5)
+
+        # Assert
+        mock_ranked.assert_called_once_with("top", 5)
+        assert stores[0].bayesian_rating == 4.79
+
+    @patch('app.services.store_service.store_repo.get_ranked_stores')
+    def test_trending_route_is_not_a_store_id(self, mock_ranked):
+        """/stores/trending is matched before /stores/{store_id}"""
+        # Arrange
+        mock_ranked.return_value = []
+
+        # Act
+        response = TestClient(app).get("/stores/trending?limit=3")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == []
+        mock_ranked.assert_called_once_with("trending", 3)
+
+
+class TestStoreActivityStats:
+    """Tests for the vendor dashboard traffic"""
+
+    @patch('app.services.store_service.store_repo.get_store_activity')
+    def test_one_entry_per_day_with_totals(self, mock_activity):
+        """Days without activity appear with zeros"""
+        # Arrange
+        today = datetime.now(ZoneInfo(STORE_TIMEZONE)).date()
+        mock_activity.return_value = [
+            {"day": today - timedelta(days=2), "views": 4, "impressions": 30, "reviews": 1},
+            {"day": today, "views": 6, "impressions": 10, "reviews": 0},
+        ]
+
+        # Act
+        stats = get_store_activity_stats(301, days=3)
+
+        # Assert
+        mock_activity.assert_called_once_with(301, 3, STORE_TIMEZONE)
+        assert [d.views for d in stats.days] == [4, 0, 6]
+        assert stats.days[-1].day == today
+        assert (stats.views, stats.impressions, stats.reviews) == (10, 40, 1)
+
+    @patch('app.services.store_service.datetime')
+    @patch('app.services.store_service.store_repo.get_store_activity')
+    def test_series_ends_on_the_store_timezone_today(self, mock_activity, mock_datetime):
+        """At 01:00 in Jakarta it is still yesterday in UTC; the series uses Jakarta's day"""
+        # Arrange
+        jakarta_now = datetime(2025, 3, 2, 1, 0, tzinfo=ZoneInfo("Asia/Jakarta"))
+        mock_datetime.now.side_effect = lambda tz=None: jakarta_now.astimezone(tz)
+        mock_activity.return_value = [{"day": date(2025, 3, 2), "views": 2, "impressions": 5, "reviews": 0}]
+
+        # Act
+        with patch('app.services.store_service.STORE_TIMEZONE', "Asia/Jakarta"):
+            stats = get_store_activity_stats(301, days=2)
+
+        # Assert
+        assert [d.day for d in stats.days] == [date(2025, 3, 1), date(2025, 3, 2)]
+        assert [d.views for d in stats.days] == [0, 2]
+
+
+class TestImageReferences:
+    """Tests for releasing blobs that no store or menu item uses any more"""
+
+    @pytest.fixture
+    def blob_store(self, tmp_path):
+        store = LocalBlobStore(tmp_path)
+        with patch('app.services.store_service.blob_store', store), \
+                patch('app.services.store_service.schedule_image_variants'), \
+                patch('app.services.store_service.search_service'):
+            yield store
+
+    @patch('app.services.store_service.store_repo.update_store')
+    def test_new_image_replaces_the_old_blob(self, mock_update, blob_store, sample_store):
+        """The store takes a reference on its new image and drops the old one"""
+        # Arrange
+        old_key = blob_store.put_bytes(b"old photo", "jpg")
+        new_key = blob_store.put_bytes(b"new photo", "jpg")
+        new_url = blob_store.url_for(new_key)
+        mock_update.return_value = {
+            **sample_store,
+            "store_image_url": new_url,
+            "created_at": datetime(2025, 1, 1),
+            "previous_image_url": blob_store.url_for(old_key),
+        }
+
+        # Act
+        store = update_store_details(301, StoreUpdate(store_image_url=new_url))
+
+        # Assert
+        assert store.store_image_url == new_url
+        assert not blob_store.exists(old_key)
+        assert blob_store.release(new_key) == 1  # the upload's reference plus the store's
+
+    @patch('app.services.store_service.store_repo.update_store')
+    def test_missing_store_keeps_counts(self, mock_update, blob_store):
+        # Arrange
+        key = blob_store.put_bytes(b"new photo", "jpg")
+        mock_update.return_value = None
+
+        # Act
+        store = update_store_details(999, StoreUpdate(store_image_url=blob_store.url_for(key)))
+
+        # Assert
+        assert store is None
+        assert blob_store.release(key) == 0
+
+    @patch('app.services.store_service.store_repo.delete_store')
+    def test_deleting_a_store_releases_its_menu_images(self, mock_delete, blob_store):
+        """Menu items are cascade-deleted with the store, so their images go too"""
+        # Arrange
+        store_key = blob_store.put_bytes(b"store photo", "jpg")
+        menu_key = blob_store.put_bytes(b"menu photo", "jpg")
+        mock_delete.return_value = {
+            "store_image_url": blob_store.url_for(store_key),
+            "menu_image_urls": [blob_store.url_for(menu_key), "https://example.com/soto.jpg"],
+        }
+
+        # Act
+        deleted = remove_store(301)
+
+        # Assert
+        assert deleted is True
+        assert not blob_store.exists(store_key)
+        assert not blob_store.exists(menu_key)
+
+    @patch('app.services.store_service.store_repo.delete_menu_item')
+    def test_deleting_a_menu_item_releases_its_image(self, mock_delete, blob_store):
+        # Arrange
+        key = blob_store.put_bytes(b"menu photo", "jpg")
+        mock_delete.side_effect = [{"item_id": 1001, "menu_image_url": blob_store.url_for(key)}, None]
+
+        # Act & Assert
+        assert remove_menu_item(1001) is True
+        assert not blob_store.exists(key)
+        assert remove_menu_item(1001) is False
+
@@ -0,0 +1,99 @@
+"""
+Unit tests for streaming image uploads
+
+This file demonstrates:
+- Testing async file I/O against pytest's tmp_path
+- Feeding an UploadFile-like mock chunk by chunk
+"""
+
+import hashlib
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import HTTPException
+from app.storage import LocalBlobStore
+from app.uploads import save_image_upload, sniff_image_type
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def chunked_upload(content: bytes, chunk_size: int, filename: str = "photo.png") -> AsyncMock:
+    """UploadFile stand-in returning content in chunk_size pieces, then b\"\""""
+    chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)] + [b""]
+    upload = AsyncMock()
+    upload.filename = filename
+    upload.read = AsyncMock(side_effect=chunks)
+    return upload
+
+
+class TestSniffImageType:
+    """Tests for magic-byte content type detection"""
+
+    @pytest.mark.parametrize("head,expected", [
+        (b"\xff\xd8\xff\xe1....Exif", "jpg"),
+        (PNG_HEADER + b"....", "png"),
+        (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"GIF89a....", "gif"),
+        (b"\x00\x00\x00\x18ftypheic....", "heic"),
+    ])
+    def test_known_image_types(self, head, expected):
+        """Common phone and web image formats are recognized"""
+        assert sniff_image_type(head)[0] == expected
+
+    def test_client_file_name_is_ignored(self):
+        """A renamed non-image is still rejected"""
+        assert sniff_image_type(b"MZ\x90\x00 windows executable") is None
+
+
+class TestSaveImageUpload:
+    """Tests for streaming an upload to disk"""
+
+    @pytest.mark.asyncio
+    async def test_streams_chunks_and_keys_blob_by_hash(self, tmp_path):
+        """All chunks land in the store and the sha256 is computed along the way"""
+        # Arrange
+        store = LocalBlobStore(tmp_path)
+        content = PNG_HEADER + bytes(range(256)) * 40
+        upload = chunked_upload(content, chunk_size=1000)
+
+        # Act
+        saved = await save_image_upload(upload, store, chunk_size=1000)
+
+        # Assert
+        digest = hashlib.sha256(content).hexdigest()
+        assert saved.sha256 == digest
+        assert saved.size == len(content)
+        assert saved.key == f"{digest[:2]}/{digest[2:4]}/{digest}.png"
+        assert saved.url == f"/app/uploads/blobs/{saved.key}"
+        assert saved.content_type == "image/png"
+        assert (tmp_path / saved.key).read_bytes() == content
+        assert list((tmp_path / ".tmp").iterdir()) == []
+        upload.read.assert_called_with(1000)
+
+    @pytest.mark.asyncio
+    async def test_too_large_upload_is_rejected_and_removed(self, tmp_path):
+        """Streaming stops at the limit and no partial file is left"""
+        # Arrange
+        content = PNG_HEADER + b"\x00" * 5000
+        upload = chunked_upload(content, chunk_size=1000)
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await save_image_upload(upload, LocalBlobStore(tmp_path), max_bytes=2048, chunk_size=1000)
+
+        assert exc_info.value.status_code == 413
+        assert upload.read.call_count == 3  # stopped after passing 2048 bytes
+        assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == []
+
+    @pytest.mark.asyncio
+    async def test_non_image_is_rejected_before_writing(self, tmp_path):
+        """The first chunk is sniffed before anything touches the disk"""
+        # Arrange
+        upload = chunked_upload(b"<html>not an image</html>", chunk_size=1000, filename="fake.jpg")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await save_image_upload(upload, LocalBlobStore(tmp_path))
+
+        assert exc_info.value.status_code == 415
+        assert upload.read.call_count == 1
+        assert list(tmp_path.iterdir()) == []
@@ -9,13 +9,89 @@ This file demonstrates:
 """
 
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import Mock, patch, AsyncMock
+from fastapi import HTTPException
 from app.services.vendor_service import (
+    build_location_columns,
     interpolate_points,
+    suggest_poll_interval,
     simulate_vendor_movement,
     register_vendor_and_store_service
 )
+from app.database import Point
+from app.repositories.vendor_repo import StoreLocationRow
 from app.schemas.vendor_schema import VendorStoreRegistrationForm
+from app.storage import VENDOR_DOCUMENT_URL_PREFIX, LocalBlobStore
+
+
+class TestBuildLocationColumns:
+    """Tests for the compact columnar location feed"""
+
+    def test_columns_keep_row_order(self):
+        """Each column lists values in the same order as the input rows"""
+        # Arrange
+        locations = [
+            StoreLocationRow(301, Point(-6.2440, 106.8385),
+                             datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc), 0.0, None),
+            StoreLocationRow(302, Point(-6.2450, 106.8390),
+                             datetime(2025, 1, 1, 0, 0, 30, tzinfo=timezone.utc), None, None),
+        ]
+
+        # Act
+        result = build_location_columns(locations)
+
+        # Assert
+        assert result["store_ids"] == [301, 302]
+        assert result["lats"] == [-6.2440, -6.2450]
+        assert result["lons"] == [106.8385, 106.8390]
+        assert result["ts"] == [1735689600, 1735689630]
+        assert result["speeds"] == [0.0, 0.0]
+        assert result["headings"] == [None, None]
+
+    def test_motion_columns_follow_rows(self):
+        """Speed and heading are carried along for client-side extrapolation"""
+        # Arrange
+        locations = [StoreLocationRow(301, Point(-6.2440, 106.8385), datetime(2025, 1, 1, tzinfo=timezone.utc), 1.2, 90.0)]
+
+        # Act
+        result = build_location_columns(locations)
+
+        # Assert
+        assert result["speeds"] == [1.2]
+        assert result["headings"] == [90.0]
+
+    def test_empty_feed_has_empty_columns(self):
+        """No locations gives empty lists, not missing keys"""
+        assert build_location_columns([]) == {
+            "store_ids": [], "lats": [], "lons": [], "ts": [], "speeds": [], "headings": []
+        }
+
+
+def moving_at(speed_mps):
+    return StoreLocationRow(301, Point(-6.2440, 106.8385), datetime(2025, 1, 1, tzinfo=timezone.utc), speed_mps, None)
+
+
+class TestSuggestPollInterval:
+    """Tests for the server-suggested polling interval"""
+
+    def test_parked_carts_poll_slowly(self):
+        """GPS jitter below the moving threshold does not count as moving"""
+        locations = [moving_at(0.0), moving_at(0.1), moving_at(None)]
+        assert suggest_poll_interval(locations) == 30
+
+    @pytest.mark.parametrize("moving,expected", [(1, 15), (2, 10), (5, 5), (9, 3), (40, 3)])
+    def test_interval_shrinks_with_moving_carts(self, moving, expected):
+        """More moving carts means more frequent polls, down to the floor"""
+        # Arrange
+        locations = [moving_at(1.4)] * moving + [moving_at(0.0)] * 10
+
+        # Act & Assert
+        assert suggest_poll_interval(locations) == expected
+
+    def test_no_carts(self):
+        """An empty map polls at the slowest rate"""
+        assert suggest_poll_interval([]) == 30
 
 
 class TestInterpolatePoints:
@@ -205,36 +281,49 @@ class TestRegisterVendorAndStore:
         form.longitude = 106.8385
         return form
     
+    @pytest.fixture(autouse=True)
+    def blob_store(self, tmp_path, private_blob_store):
+        """Blob stores in tmp_path, so tests never write to the real upload folders"""
+        store = LocalBlobStore(tmp_path / "public")
+        with patch('app.services.vendor_service.blob_store', store), \
+                patch('app.services.vendor_service._placeholder_keys', {}):
+            yield store
+
+    @pytest.fixture
+    def private_blob_store(self, tmp_path):
+        store = LocalBlobStore(tmp_path / "private", url_prefix=VENDOR_DOCUMENT_URL_PREFIX)
+        with patch('app.services.vendor_service.private_blob_store', store):
+            yield store
+
+    @staticmethod
+    def _mock_upload(filename: str, content: bytes) -> AsyncMock:
+        """UploadFile stand-in whose read(size) returns the content, then b"""""
+        upload = AsyncMock()
+        upload.filename = filename
+        upload.read = AsyncMock(side_effect=[content, b""])
+        return upload
+
     @pytest.mark.asyncio
     @patch('app.services.vendor_service.post_new_vendor')
     @patch('app.services.vendor_service.create_store')
     @patch('app.services.vendor_service.insert_store_location')
-    @patch('app.services.vendor_service.aiofiles.open')
     async def test_register_vendor_with_all_files(
         self,
-        mock_file_open,
         mock_insert_location,
         mock_create_store,
         mock_post_vendor,
-        mock_form_data
+        mock_form_data,
+        tmp_path
     ):
         """Test vendor registration with all file uploads provided"""
         # Arrange
         mock_post_vendor.return_value = {"vendor_id": 201}
         mock_create_store.return_value = {"store_id": 401}
         
-        # Mock file objects
-        mock_ktp = AsyncMock()
-        mock_ktp.filename = "ktp.jpg"
-        mock_ktp.read = AsyncMock(return_value=b"fake_ktp_data")
-        
-        mock_selfie = AsyncMock()
-        mock_selfie.filename = "selfie.jpg"
-        mock_selfie.read = AsyncMock(return_value=b"fake_selfie_data")
-        
-        mock_store_img = AsyncMock()
-        mock_store_img.filename = "store.jpg"
-        mock_store_img.read = AsyncMock(return_value=b"fake_store_data")
+        # Mock file objects (JPEG magic bytes so the type sniffing accepts them)
+        mock_ktp = self._mock_upload("ktp.jpg", b"\xff\xd8\xff\xe0fake_ktp_data")
+        mock_selfie = self._mock_upload("selfie.jpg", b"\xff\xd8\xff\xe0fake_selfie_data")
+        mock_store_img = self._mock_upload("store.jpg", b"\xff\xd8\xff\xe0fake_store_data")
         
         # Act
         result = await register_vendor_and_store_service(
@@ -260,26 +349,67 @@ class TestRegisterVendorAndStore:
             401,
             {"lat": -6.2443, "lon": 106.8385}
         )
+
+        # Verify the images were stored as blobs and linked
+        ktp_url, selfie_url = mock_post_vendor.call_args[0][1:3]
+        store_url = mock_create_store.call_args.kwargs["store_image_url"]
+        private_prefix = VENDOR_DOCUMENT_URL_PREFIX + "/"
+        assert ktp_url.startswith(private_prefix) and ktp_url.endswith(".jpg")
+        private_root = tmp_path / "private"
+        assert (private_root / ktp_url[len(private_prefix):]).read_bytes() == b"\xff\xd8\xff\xe0fake_ktp_data"
+        assert (private_root / selfie_url[len(private_prefix):]).exists()
+
+        # Only the store image is in the public blob store
+        public_prefix = "/app/uploads/blobs/"
+        assert store_url.startswith(public_prefix)
+        assert (tmp_path / "public" / store_url[len(public_prefix):]).exists()
+        public_files = [path for path in (tmp_path / "public").rglob("*") if path.is_file() and path.suffix != ".refs"]
+        assert len(public_files) == 1
+
+    @pytest.mark.asyncio
+    @patch('app.services.vendor_service.post_new_vendor')
+    async def test_register_vendor_rejects_non_image_and_cleans_up(
+        self,
+        mock_post_vendor,
+        mock_form_data,
+        tmp_path
+    ):
+        """One bad upload fails the registration and leaves no files behind"""
+        # Arrange
+        mock_ktp = self._mock_upload("ktp.jpg", b"\xff\xd8\xff\xe0fake_ktp_data")
+        mock_selfie = self._mock_upload("selfie.jpg", b"%PDF-1.4 not an image")
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await register_vendor_and_store_service(
+                form_data=mock_form_data,
+                ktp=mock_ktp,
+                selfie=mock_selfie,
+                store_img=None
+            )
+
+        assert exc_info.value.status_code == 415
+        blobs = [path for path in tmp_path.rglob("*") if path.is_file() and path.suffix != ".refs"]
+        assert blobs == []
+        mock_post_vendor.assert_not_called()
     
     @pytest.mark.asyncio
     @patch('app.services.vendor_service.post_new_vendor')
     @patch('app.services.vendor_service.create_store')
     @patch('app.services.vendor_service.insert_store_location')
-    @patch('app.services.vendor_service.Path.exists')
     async def test_register_vendor_without_files_uses_defaults(
         self,
-        mock_exists,
         mock_insert_location,
         mock_create_store,
         mock_post_vendor,
-        mock_form_data
+        mock_form_data,
+        private_blob_store
     ):
-        """Test vendor registration without file uploads uses default images"""
+        """Vendors without uploads share one stored copy of each default image"""
         # Arrange
         mock_post_vendor.return_value = {"vendor_id": 202}
         mock_create_store.return_value = {"store_id": 402}
-        mock_exists.return_value = True  # Default files exist
-        
+
         # Act
         result = await register_vendor_and_store_service(
             form_data=mock_form_data,
@@ -287,15 +417,25 @@ class TestRegisterVendorAndStore:
             selfie=None,
             store_img=None
         )
-        
+        await register_vendor_and_store_service(
+            form_data=mock_form_data,
+            ktp=None,
+            selfie=None,
+            store_img=None
+        )
+
         # Assert
         assert result.vendor_id == 202
         assert result.store_id == 402
-        
-        # Verify default image paths were used
-        vendor_call_args = mock_post_vendor.call_args[0]
-        assert "placeholder" in vendor_call_args[1].lower() or "ktp_placeholder" in vendor_call_args[1].lower()
-    
+
+        # Both registrations point at the same placeholder blob, referenced twice
+        first_ktp, second_ktp = (call.args[1] for call in mock_post_vendor.call_args_list)
+        assert first_ktp == second_ktp
+        assert first_ktp.startswith(VENDOR_DOCUMENT_URL_PREFIX + "/")
+        key = private_blob_store.key_for_url(first_ktp)
+        assert private_blob_store.exists(key)
+        assert private_blob_store.release(key) == 1
+
     @pytest.mark.asyncio
     @patch('app.services.vendor_service.post_new_vendor')
     @patch('app.services.vendor_service.create_store')
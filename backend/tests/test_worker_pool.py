@@ -0,0 +1,109 @@
+"""
+Unit tests for the bounded worker pool (used for bcrypt hashing)
+
+This file demonstrates:
+- Testing async code with pytest-asyncio
+- Testing back-pressure (rejecting work when the queue is full)
+- Checking fire-and-forget jobs show up in stats()
+"""
+
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.worker_pool import BoundedWorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedWorkerPool("test", max_workers=1, max_queue=1)
+    yield pool
+    pool.shutdown()
+
+
+class TestBoundedWorkerPool:
+    """Tests for running blocking work off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_function_result(self, pool):
+        """Positional and keyword arguments are passed through"""
+        # Act
+        result = await pool.run(pow, 2, exp=10)
+
+        # Assert
+        assert result == 1024
+        assert pool.stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate_and_count_as_failed(self, pool):
+        """Errors raised in the worker reach the caller"""
+        # Arrange
+        def boom():
+            raise ValueError("boom")
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            await pool.run(boom)
+
+        assert pool.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_workers_and_queue_are_full(self, pool):
+        """One running + one queued job fills a 1-worker/1-queue pool"""
+        # Arrange
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.run(release.wait)
+
+        assert exc_info.value.status_code == 503
+        assert pool.stats()["rejected"] == 1
+
+        # Cleanup
+        release.set()
+        await asyncio.gather(running, queued)
+        assert pool.stats()["completed"] == 2
+
+
+class TestBackgroundJobs:
+    """Tests for submit_background"""
+
+    def test_background_jobs_are_counted(self, pool):
+        """/health shows fire-and-forget work too"""
+        # Arrange
+        release = threading.Event()
+
+        # Act
+        running = pool.submit_background(release.wait)
+        in_flight = pool.stats()["background"]
+        release.set()
+        running.result()
+        failing = pool.submit_background(int, "not a number")
+        with pytest.raises(ValueError):
+            failing.result()
+
+        # Assert
+        stats = pool.stats()
+        assert in_flight == 1
+        assert stats["background"] == 0
+        assert (stats["completed"], stats["failed"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_process_workers_are_not_forked(self):
+        """Workers must not inherit the app's DB pool threads"""
+        # Arrange
+        pool = BoundedWorkerPool("test-processes", max_workers=1, max_queue=0, use_processes=True)
+
+        try:
+            # Act
+            result = await pool.run(pow, 2, 10)
+
+            # Assert
+            assert result == 1024
+            assert pool._get_executor()._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            pool.shutdown()
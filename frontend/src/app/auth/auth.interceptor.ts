@@ -1,17 +1,20 @@
-import { Injectable } from "@angular/core";
+import { Injectable, Injector } from "@angular/core";
 import {
+    HttpErrorResponse,
     HttpInterceptor,
     HttpRequest,
     HttpHandler,
     HttpEvent
 } from "@angular/common/http";
-import { Observable } from "rxjs";
+import { catchError, Observable, switchMap, throwError } from "rxjs";
 import { TokenStorageService } from "../services/token-storage.service";
+import { AuthService } from "../services/auth.service";
 
 
 @Injectable()
 export class AuthInterceptor implements HttpInterceptor {
-    constructor(private tokenStorage: TokenStorageService) { }
+    // AuthService is looked up lazily: it depends on HttpClient, which depends on this interceptor
+    constructor(private tokenStorage: TokenStorageService, private injector: Injector) { }
 
     intercept(request: HttpRequest<any>, next: HttpHandler): Observable<HttpEvent<any>> {
         const token = this.tokenStorage.getToken();
@@ -27,15 +30,43 @@ export class AuthInterceptor implements HttpInterceptor {
 
         // Add auth token to all other requests (including localhost API)
         if (token) {
-            const authReq = request.clone({
-                setHeaders: {
-                    Authorization: `Bearer ${token}`
-                }
-            });
-            console.log('🔐 Adding auth token to:', request.url);  // DEBUG
-            return next.handle(authReq);
+            return next.handle(this.withToken(request, token)).pipe(
+                catchError(error => {
+                    // Access tokens are short-lived: refresh once and retry. A 401 from
+                    // login/register means bad credentials, not an expired token.
+                    if (error instanceof HttpErrorResponse && error.status === 401
+                        && !this.isCredentialRequest(request) && this.tokenStorage.getRefreshToken()) {
+                        return this.refreshAndRetry(request, next);
+                    }
+                    return throwError(() => error);
+                })
+            );
         }
-        console.warn('⚠️ No token found for:', request.url);  // DEBUG
         return next.handle(request);
     }
-}
\ No newline at end of file
+
+    private refreshAndRetry(request: HttpRequest<any>, next: HttpHandler): Observable<HttpEvent<any>> {
+        const auth = this.injector.get(AuthService);
+        return auth.refreshSession().pipe(
+            catchError(error => {
+                // Refresh token expired or revoked: sign out
+                this.tokenStorage.clear();
+                return throwError(() => error);
+            }),
+            switchMap(newToken => next.handle(this.withToken(request, newToken)))
+        );
+    }
+
+    private isCredentialRequest(request: HttpRequest<any>): boolean {
+        const path = request.url.split('?')[0];
+        return path.endsWith('/auth/login') || path.endsWith('/auth/register');
+    }
+
+    private withToken(request: HttpRequest<any>, token: string): HttpRequest<any> {
+        return request.clone({
+            setHeaders: {
+                Authorization: `Bearer ${token}`
+            }
+        });
+    }
+}
@@ -1,9 +1,18 @@
-import { User } from './user.model';
+// User as the backend sends it; AuthService maps it to User before storing it
+export interface UserResponse {
+    user_id: number;
+    email: string;
+    full_name: string;
+    created_at: string;
+    is_verified: boolean;
+}
 
 export interface LoginResponse {
     access_token: string;
+    refresh_token: string;
     token_type: string;
-    user: User;
+    expires_in: number;  // access token lifetime in seconds
+    user: UserResponse;
 }
 
 export interface LoginRequest {
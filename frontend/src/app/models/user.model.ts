@@ -1,7 +1,7 @@
 export interface User {
-    userId: string;
+    userId: number;
     email: string;
     fullName: string;
-    createdAt: Date;
+    createdAt: string;  // ISO 8601; User is kept in localStorage as JSON, so no Date
     isVerified: boolean; 
 }
\ No newline at end of file
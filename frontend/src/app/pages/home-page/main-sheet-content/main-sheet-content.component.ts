@@ -189,9 +189,18 @@ export class MainSheetContentComponent implements OnInit, OnDestroy {
     // Near You: Take closest 2 stores
     this.nearYouStores = storesWithDistance.slice(0, 2).map(s => s.store);
 
-    // Stalls You May Like: Random selection of 4 stores (excluding the nearest 2)
+    // Stalls You May Like: 4 stores ranked by the backend (excluding the nearest 2),
+    // personalized when the auth interceptor sends the user's token
     const remainingStores = storesWithDistance.slice(2).map(s => s.store);
-    this.recommendedStores = this.getRandomStores(remainingStores, 4);
+    this.locationService.getRecommendations(
+      this.userLocation, 4, this.nearYouStores.map(s => s.storeId)
+    ).subscribe({
+      next: (stores) => this.recommendedStores = stores,
+      error: (error) => {
+        console.error('Failed to load recommendations:', error);
+        this.recommendedStores = this.getRandomStores(remainingStores, 4);
+      }
+    });
   }
 
   calculateDistance(lat1: number, lon1: number, lat2: number, lon2: number): number {
@@ -98,7 +98,7 @@ export class VendorDashboardComponent implements OnInit, AfterViewInit {
       next: (user) => {
         console.log('Current user:', user); // DEBUG LOG
         // Get vendor's store ID
-        this.vendorService.getVendorStoreId(parseInt(user.userId)).subscribe({
+        this.vendorService.getVendorStoreId(user.userId).subscribe({
           next: (response: any) => {
             console.log('Store ID response:', response); // DEBUG LOG
             this.storeId = response.store_id;
@@ -173,7 +173,7 @@ export class VendorStoreDetailsPageComponent implements OnInit {
 
             // Prepare registration data
             const registrationData = {
-                user_id: parseInt(user.userId),
+                user_id: user.userId,
                 store_name: this.storeForm.value.storeName,
                 store_description: this.storeForm.value.description || 'No description',
                 category_id: parseInt(this.storeForm.value.category),
@@ -28,6 +28,7 @@ describe('AuthService', () => {
       'setSession',
       'clear',
       'getToken',
+      'getRefreshToken',
       'getUser'
     ]);
 
@@ -66,12 +67,14 @@ describe('AuthService', () => {
       const mockResponse: LoginResponse = {
         access_token: 'fake-jwt-token',
         token_type: 'bearer',
+        refresh_token: 'refresh-fake-jwt-token',
+        expires_in: 900,
         user: {
-          userId: '1',
+          user_id: 1,
           email: 'test@example.com',
-          fullName: 'Test User',
-          createdAt: new Date(),
-          isVerified: true
+          full_name: 'Test User',
+          created_at: '2024-01-01T00:00:00Z',
+          is_verified: true
         }
       };
 
@@ -100,12 +103,14 @@ describe('AuthService', () => {
       const mockResponse: LoginResponse = {
         access_token: 'test-token-123',
         token_type: 'bearer',
+        refresh_token: 'refresh-test-token-123',
+        expires_in: 900,
         user: {
-          userId: '1',
+          user_id: 1,
           email: 'test@example.com',
-          fullName: 'Test User',
-          createdAt: new Date(),
-          isVerified: true
+          full_name: 'Test User',
+          created_at: '2024-01-01T00:00:00Z',
+          is_verified: true
         }
       };
 
@@ -115,11 +120,20 @@ describe('AuthService', () => {
       const req = httpMock.expectOne(`${environment.apiUrl}/auth/login`);
       req.flush(mockResponse);
 
-      // Assert - TokenStorage.setSession was called
+      // Assert - TokenStorage.setSession was called with the camelCase User
       expect(tokenStorageService.setSession).toHaveBeenCalledWith(
         'test-token-123',
-        mockResponse.user
+        'refresh-test-token-123',
+        jasmine.objectContaining({
+          userId: 1,
+          email: 'test@example.com',
+          fullName: 'Test User',
+          createdAt: '2024-01-01T00:00:00Z',
+          isVerified: true
+        })
       );
+      const storedUser = tokenStorageService.setSession.calls.mostRecent().args[2];
+      expect((storedUser as any).user_id).toBeUndefined();
     });
 
     it('should handle login error', () => {
@@ -160,12 +174,14 @@ describe('AuthService', () => {
       const mockResponse: LoginResponse = {
         access_token: 'new-user-token',
         token_type: 'bearer',
+        refresh_token: 'refresh-new-user-token',
+        expires_in: 900,
         user: {
-          userId: '2',
+          user_id: 2,
           email: 'newuser@example.com',
-          fullName: 'New User',
-          createdAt: new Date(),
-          isVerified: false
+          full_name: 'New User',
+          created_at: '2024-01-01T00:00:00Z',
+          is_verified: false
         }
       };
 
@@ -193,12 +209,14 @@ describe('AuthService', () => {
       const mockResponse: LoginResponse = {
         access_token: 'registration-token',
         token_type: 'bearer',
+        refresh_token: 'refresh-registration-token',
+        expires_in: 900,
         user: {
-          userId: '3',
+          user_id: 3,
           email: 'test@example.com',
-          fullName: 'Test User',
-          createdAt: new Date(),
-          isVerified: false
+          full_name: 'Test User',
+          created_at: '2024-01-01T00:00:00Z',
+          is_verified: false
         }
       };
 
@@ -211,9 +229,58 @@ describe('AuthService', () => {
       // Assert
       expect(tokenStorageService.setSession).toHaveBeenCalledWith(
         'registration-token',
-        mockResponse.user
+        'refresh-registration-token',
+        jasmine.objectContaining({ userId: mockResponse.user.user_id, fullName: mockResponse.user.full_name })
+      );
+    });
+  });
+
+  // ===== REFRESH TESTS =====
+
+  describe('refreshSession', () => {
+    it('should trade the refresh token for new tokens once for concurrent callers', () => {
+      // Arrange
+      tokenStorageService.getRefreshToken.and.returnValue('old-refresh');
+      const mockResponse: LoginResponse = {
+        access_token: 'new-access',
+        token_type: 'bearer',
+        refresh_token: 'new-refresh',
+        expires_in: 900,
+        user: {
+          user_id: 1,
+          email: 'test@example.com',
+          full_name: 'Test User',
+          created_at: '2024-01-01T00:00:00Z',
+          is_verified: true
+        }
+      };
+      const tokens: string[] = [];
+
+      // Act
+      service.refreshSession().subscribe(token => tokens.push(token));
+      service.refreshSession().subscribe(token => tokens.push(token));
+
+      // Assert - a single request; both callers get the new access token
+      const req = httpMock.expectOne(`${environment.apiUrl}/auth/refresh`);
+      expect(req.request.body).toEqual({ refresh_token: 'old-refresh' });
+      req.flush(mockResponse);
+
+      expect(tokens).toEqual(['new-access', 'new-access']);
+      expect(tokenStorageService.setSession).toHaveBeenCalledWith(
+        'new-access', 'new-refresh', jasmine.objectContaining({ userId: 1, fullName: 'Test User' })
       );
     });
+
+    it('should fail without a refresh token', () => {
+      // Arrange
+      tokenStorageService.getRefreshToken.and.returnValue(null);
+
+      // Act & Assert
+      service.refreshSession().subscribe({
+        next: () => fail('should have failed without a refresh token'),
+        error: (error) => expect(error).toBeTruthy()
+      });
+    });
   });
 
   // ===== LOGOUT TESTS =====
@@ -227,6 +294,20 @@ describe('AuthService', () => {
       expect(tokenStorageService.clear).toHaveBeenCalled();
     });
 
+    it('should revoke the refresh token on the server', () => {
+      // Arrange
+      tokenStorageService.getRefreshToken.and.returnValue('refresh-to-revoke');
+
+      // Act
+      service.logout();
+
+      // Assert
+      const req = httpMock.expectOne(`${environment.apiUrl}/auth/logout`);
+      expect(req.request.body).toEqual({ refresh_token: 'refresh-to-revoke' });
+      req.flush({ detail: 'Logged out successfully.' });
+      expect(tokenStorageService.clear).toHaveBeenCalled();
+    });
+
     it('should be callable multiple times without error', () => {
       // Act - call logout twice
       service.logout();
@@ -251,10 +332,10 @@ describe('AuthService', () => {
       };
 
       const expectedUser: User = {
-        userId: 5 as any,  // API returns number, not string
+        userId: 5,
         email: 'current@example.com',
         fullName: 'Current User',
-        createdAt: '2024-01-01T00:00:00Z' as any,  // API returns string, not Date
+        createdAt: '2024-01-01T00:00:00Z',
         isVerified: true
       };
 
@@ -283,7 +364,7 @@ describe('AuthService', () => {
       // Act
       service.getCurrentUser().subscribe(user => {
         // Assert - frontend model uses camelCase
-        expect(String(user.userId)).toBe('10');
+        expect(user.userId).toBe(10);
         expect(user.fullName).toBe('Test User');
         expect(user.isVerified).toBe(false);
 
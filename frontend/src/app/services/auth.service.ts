@@ -1,59 +1,95 @@
 import { Injectable } from "@angular/core";
-import { HttpClient } from "@angular/common/http";
+import { HttpBackend, HttpClient } from "@angular/common/http";
 import { environment } from "../../environments/environment";
 import {
     LoginResponse,
     LoginRequest,
-    RegisterRequest
+    RegisterRequest,
+    UserResponse
 } from "../models/auth.model";
-import { map, Observable, tap } from "rxjs";
+import { finalize, map, Observable, shareReplay, tap, throwError } from "rxjs";
 import { TokenStorageService } from "../services/token-storage.service";
 import { User } from "../models/user.model";
 
 @Injectable({ providedIn: 'root' })
 export class AuthService {
     private apiUrl = environment.apiUrl;
+    // Bypasses the interceptors, so refreshing never triggers another refresh
+    private rawHttp: HttpClient;
+    private refreshInFlight: Observable<string> | null = null;
 
     constructor(
         private http: HttpClient,
+        httpBackend: HttpBackend,
         private tokenStorage: TokenStorageService
-    ) { }
+    ) {
+        this.rawHttp = new HttpClient(httpBackend);
+    }
 
     login(request: LoginRequest): Observable<LoginResponse> {
         return this.http.post<LoginResponse>(`${this.apiUrl}/auth/login`, request).pipe(
-            tap(response => {
-                this.tokenStorage.setSession(response.access_token, response.user);
-            })
+            tap(response => this.storeSession(response))
         );
     }
 
     register(request: RegisterRequest): Observable<LoginResponse> {
         return this.http.post<LoginResponse>(`${this.apiUrl}/auth/register`, request).pipe(
-            tap(response => {
-                this.tokenStorage.setSession(response.access_token, response.user);
-            })
+            tap(response => this.storeSession(response))
         );
     }
 
+    // Trade the refresh token for a new access token (the refresh token rotates too).
+    // Concurrent callers share one request; emits the new access token.
+    refreshSession(): Observable<string> {
+        const refreshToken = this.tokenStorage.getRefreshToken();
+        if (!refreshToken) {
+            return throwError(() => new Error('No refresh token'));
+        }
+        if (!this.refreshInFlight) {
+            this.refreshInFlight = this.rawHttp.post<LoginResponse>(
+                `${this.apiUrl}/auth/refresh`, { refresh_token: refreshToken }
+            ).pipe(
+                tap(response => this.storeSession(response)),
+                map(response => response.access_token),
+                finalize(() => this.refreshInFlight = null),
+                shareReplay(1)
+            );
+        }
+        return this.refreshInFlight;
+    }
+
     verifyEmail() {
         // TODO: Implement email verification logic
     }
 
     logout(): void {
+        const refreshToken = this.tokenStorage.getRefreshToken();
         this.tokenStorage.clear();
+        if (refreshToken) {
+            // Revoke server-side; the local session is gone either way
+            this.rawHttp.post(`${this.apiUrl}/auth/logout`, { refresh_token: refreshToken })
+                .subscribe({ error: () => undefined });
+        }
     }
 
     getCurrentUser(): Observable<User> {
-        return this.http.get<any>(`${this.apiUrl}/auth/me`).pipe(
-            map(response => {
-                return {
-                    userId: response.user_id,
-                    email: response.email,
-                    fullName: response.full_name,
-                    createdAt: response.created_at,
-                    isVerified: response.is_verified
-                } as User;
-            })
+        return this.http.get<UserResponse>(`${this.apiUrl}/auth/me`).pipe(
+            map(response => this.toUser(response))
         );
     }
+
+    // snake_case API user -> camelCase User
+    private toUser(response: UserResponse): User {
+        return {
+            userId: response.user_id,
+            email: response.email,
+            fullName: response.full_name,
+            createdAt: response.created_at,
+            isVerified: response.is_verified
+        };
+    }
+
+    private storeSession(response: LoginResponse): void {
+        this.tokenStorage.setSession(response.access_token, response.refresh_token, this.toUser(response.user));
+    }
 }
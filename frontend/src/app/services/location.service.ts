@@ -63,6 +63,19 @@ export class LocationService {
         );
     }
 
+    // Server-ranked "Stalls You May Like" (distance, rating, reviews, category affinity, open status)
+    getRecommendations(location: LocationPoint, k: number, exclude: string[] = []): Observable<Store[]> {
+        const params: Record<string, string | string[]> = {
+            lat: location.lat.toString(),
+            lon: location.lon.toString(),
+            k: k.toString(),
+            exclude
+        };
+        return this.http.get<any[]>(`${this.API_URL}/recommendations`, { params }).pipe(
+            map(stores => stores.map(s => this.transformStore(s)))
+        );
+    }
+
     getLocationUpdates(): Observable<LocationUpdate[]> {
         return this.http.get<LocationUpdate[]>(`${this.API_URL}/vendor/locations`).pipe(
             catchError(() => of([]))
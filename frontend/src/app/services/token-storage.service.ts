@@ -2,13 +2,15 @@ import { Injectable } from "@angular/core";
 import { User } from "../models/user.model";
 
 const TOKEN_KEY = 'gbk_token';
+const REFRESH_TOKEN_KEY = 'gbk_refresh_token';
 const USER_KEY = 'gbk_user';
 
 @Injectable({ providedIn: 'root' })
 
 export class TokenStorageService {
-    setSession(token: string, user: User): void {
+    setSession(token: string, refreshToken: string, user: User): void {
         localStorage.setItem(TOKEN_KEY, token);
+        localStorage.setItem(REFRESH_TOKEN_KEY, refreshToken);
         localStorage.setItem(USER_KEY, JSON.stringify(user));
     }
 
@@ -16,6 +18,10 @@ export class TokenStorageService {
         return localStorage.getItem(TOKEN_KEY);
     }
 
+    getRefreshToken(): string | null {
+        return localStorage.getItem(REFRESH_TOKEN_KEY);
+    }
+
     getUser(): User | null {
         const user = localStorage.getItem(USER_KEY);
         return user ? JSON.parse(user) : null;
@@ -23,10 +29,11 @@ export class TokenStorageService {
 
     clear(): void {
         localStorage.removeItem(TOKEN_KEY);
+        localStorage.removeItem(REFRESH_TOKEN_KEY);
         localStorage.removeItem(USER_KEY);
     }
 
     isLoggedIn(): boolean {
         return this.getToken() !== null;
     }
-}
\ No newline at end of file
+}
@@ -57,7 +57,7 @@ export class ProfileModalComponent implements OnInit {
     if (!this.user) return;
 
     this.isCheckingVendor = true;
-    this.vendorService.getVendorStoreId(parseInt(this.user.userId)).subscribe({
+    this.vendorService.getVendorStoreId(this.user.userId).subscribe({
       next: (response: any) => {
         this.hasVendorAccount = !!response.store_id;
         this.isCheckingVendor = false;